@@ -0,0 +1,101 @@
+"""Run the read-only check modules inside the controller.
+
+A module task packs the module with AnsiballZ, writes it to a temporary file,
+starts a Python interpreter and imports ``AnsibleModule`` before its first API
+call. The action plugins next to this file carry the names of the check
+modules, so the tasks stay as they are, and call the same check functions from
+``prechecks`` in the controller's worker process instead: the task arguments
+are validated against the module's argument spec, the check gets the task
+``environment`` (KUBECONFIG, the state directory) without it being applied to
+the process, and the result carries the same fields, warnings and metrics as
+the module's. Tasks on a host reached over another connection than ``local``,
+or with ``become`` or ``async``, still run the module.
+
+The plugins load this file with ``action_loader.get("_controller_checks",
+class_only=True)``, which also makes the repository's module_utils importable
+as ``ansible.module_utils`` on the controller.
+"""
+
+import os
+
+import ansible.module_utils
+from ansible.module_utils.common.text.converters import to_text
+from ansible.plugins.action import ActionBase
+from ansible.utils.vars import merge_hash
+
+# Ansible only puts the repository's module_utils on the import path of modules; the checks live there
+MODULE_UTILS = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "module_utils")
+if MODULE_UTILS not in ansible.module_utils.__path__:
+    ansible.module_utils.__path__.append(MODULE_UTILS)
+
+from ansible.module_utils.prechecks import ARGUMENT_SPECS  # noqa: E402
+from ansible.module_utils import cassette, metrics  # noqa: E402
+
+
+class CheckContext:
+    """The part of ``AnsibleModule`` the check functions use."""
+
+    def __init__(self, name, params, check_mode, environment):
+        self._name = name
+        self.params = params
+        self.check_mode = check_mode
+        self.environment = environment
+        self.no_log_values = set()
+        self.warnings = []
+
+    def warn(self, warning):
+        self.warnings.append(warning)
+
+
+class ControllerCheck(ActionBase):
+    """Action plugin running ``check`` with the argument spec of the module it replaces."""
+
+    TRANSFERS_FILES = False
+    _supports_async = True  # By running the module
+
+    check = None  # check(module, params) -> (result, error), see prechecks
+    supports_check_mode = True
+
+    def _runs_on_controller(self):
+        return (self._connection.transport == "local" and not self._play_context.become
+                and not self._task.async_val)
+
+    def run(self, tmp=None, task_vars=None):
+        result = super().run(tmp, task_vars)
+        del tmp  # tmp no longer has any effect
+
+        if not self._runs_on_controller():
+            wrap_async = self._task.async_val and not self._connection.has_native_async
+            result = merge_hash(result, self._execute_module(task_vars=task_vars, wrap_async=wrap_async))
+            if not wrap_async:
+                self._remove_tmp_path(self._connection._shell.tmpdir)
+            return result
+
+        name = self._task.action.rsplit(".", 1)[-1]
+        if self._task.check_mode and not self.supports_check_mode:
+            return dict(result, skipped=True, msg=f"remote module ({name}) does not support check mode")
+        _, params = self.validate_argument_spec(ARGUMENT_SPECS[name])
+
+        environment = {}
+        self._compute_environment_string(environment)
+        environment = {key: to_text(value) for key, value in environment.items()}
+        context = CheckContext(name, params, self._task.check_mode, environment)
+        metrics.reset()
+        cassette.begin(context)
+        try:
+            check_result, error = self.check(context, params)
+        except Exception as ex:
+            check_result, error = {}, str(ex)
+        finally:
+            cassette.finish()
+
+        result.update(check_result, changed=False, metrics=metrics.snapshot(), invocation={"module_args": params})
+        if context.warnings:
+            result["warnings"] = context.warnings
+        if error:
+            result.update(failed=True, msg=error)
+        return result
+
+
+# The name the plugin loader looks for; every check plugin subclasses it with its own ``check``
+ActionModule = ControllerCheck
@@ -0,0 +1,11 @@
+# Runs the check_oc_client module's check on the controller, see _controller_checks.py
+from ansible.plugins.loader import action_loader
+
+# Loading the shared plugin also puts the repository's module_utils on the import path
+ControllerCheck = action_loader.get("_controller_checks", class_only=True)
+from ansible.module_utils.prechecks import check_oc_client  # noqa: E402
+
+
+class ActionModule(ControllerCheck):
+    check = staticmethod(check_oc_client)
+    supports_check_mode = False
@@ -0,0 +1,352 @@
+"""In-memory stand-in for the Kubernetes API used by the benchmarks.
+
+``FakeAPIServer`` serves the objects of a generated cluster over plain HTTP
+with the subset of the API the modules use: get, list with label and field
+selectors and limit/continue pagination, merge patch, create, delete and
+watch streams. Every request is counted together with the bytes received and
+sent, so the runner can report API calls and traffic per scenario from
+``GET /_bench/stats`` (``POST /_bench/reset`` starts a new count).
+Collections that are not part of the cluster answer 404, like an API group
+that is not installed.
+
+Run it standalone to point the playbooks at a synthetic cluster by hand:
+
+    python benchmarks/fake_api.py --nodes 5000 --pods 100000 --port 18443
+"""
+
+import argparse
+import gc
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from fake_cluster import generate_cluster
+
+
+def _merge(target, patch):
+    for key, value in patch.items():
+        if value is None:
+            target.pop(key, None)
+        elif isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        else:
+            target[key] = value
+    return target
+
+
+def _field(obj, path):
+    for part in path.split("."):
+        obj = obj.get(part) if isinstance(obj, dict) else None
+    return obj
+
+
+def match_labels(obj, selector):
+    """Evaluate an equality/existence label selector (``a=b,c!=d,e,!f``)."""
+    labels = obj.get("metadata", {}).get("labels") or {}
+    for term in filter(None, (selector or "").split(",")):
+        if "!=" in term:
+            key, value = term.split("!=", 1)
+            if labels.get(key) == value:
+                return False
+        elif "=" in term:
+            key, value = term.replace("==", "=").split("=", 1)
+            if labels.get(key) != value:
+                return False
+        elif term.startswith("!"):
+            if term[1:] in labels:
+                return False
+        elif term not in labels:
+            return False
+    return True
+
+
+def match_fields(obj, selector):
+    """Evaluate a field selector (``spec.nodeName=x,status.phase!=Running``)."""
+    for term in filter(None, (selector or "").split(",")):
+        if "!=" in term:
+            path, value = term.split("!=", 1)
+            if str(_field(obj, path)) == value:
+                return False
+        else:
+            path, value = term.replace("==", "=").split("=", 1)
+            if str(_field(obj, path)) != value:
+                return False
+    return True
+
+
+def parse_path(path):
+    """Split an API path into ``(prefix, plural, namespace, name, subresource)``."""
+    parts = path.strip("/").split("/")
+    if parts[0] == "api":
+        prefix, rest = "/".join(parts[:2]), parts[2:]
+    else:
+        prefix, rest = "/".join(parts[:3]), parts[3:]
+    namespace = None
+    if len(rest) >= 3 and rest[0] == "namespaces":
+        namespace, rest = rest[1], rest[2:]
+    rest += [None] * (3 - len(rest))
+    return prefix, rest[0], namespace, rest[1], rest[2]
+
+
+class FakeAPIServer:
+    """Serve a generated cluster on ``http://host:port`` from a background thread."""
+
+    def __init__(self, cluster, host="127.0.0.1", port=0):
+        self.store = {}
+        for key, objects in cluster.items():
+            collection = self.store.setdefault(key, {})
+            for obj in objects:
+                metadata = obj.setdefault("metadata", {})
+                metadata.setdefault("resourceVersion", "1")
+                collection[(metadata.get("namespace"), metadata["name"])] = obj
+        # The store never becomes garbage; keep the collector from rescanning it on every allocation burst
+        gc.freeze()
+        self.resource_version = 1
+        self.events = []
+        self.lock = threading.Condition()
+        self.reset_stats()
+
+        server = self
+
+        class Handler(_Handler):
+            api = server
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://{host}:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reset_stats(self):
+        self.calls = {}
+        self.bytes_received = 0
+        self.bytes_sent = 0
+
+    def stats(self):
+        return {
+            "api_calls": sum(self.calls.values()),
+            "calls": dict(sorted(self.calls.items())),
+            "bytes_received": self.bytes_received,
+            "bytes_sent": self.bytes_sent,
+        }
+
+    def record(self, method, plural, received, sent):
+        with self.lock:
+            key = f"{method} {plural}"
+            self.calls[key] = self.calls.get(key, 0) + 1
+            self.bytes_received += received
+            self.bytes_sent += sent
+
+    def publish(self, key, event_type, obj):
+        """Bump the object's resourceVersion and queue a watch event for it."""
+        with self.lock:
+            self.resource_version += 1
+            obj["metadata"]["resourceVersion"] = str(self.resource_version)
+            self.events.append((self.resource_version, key, event_type, json.loads(json.dumps(obj))))
+            self.lock.notify_all()
+
+    def update(self, prefix, plural, name, patch, namespace=None):
+        """Merge ``patch`` into a stored object, as a scenario step or a test would."""
+        obj = _merge(self.store[(prefix, plural)][(namespace, name)], patch)
+        self.publish((prefix, plural), "MODIFIED", obj)
+        return obj
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    api = None
+
+    def log_message(self, *args):
+        pass
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.received = length
+        return json.loads(self.rfile.read(length)) if length else {}
+
+    def _send(self, code, obj, plural):
+        data = json.dumps(obj).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        self.api.record(self.command, plural, self.received, len(data))
+
+    def _control(self, obj):
+        """Answer a benchmark control request without counting it."""
+        data = json.dumps(obj).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _status(self, code, message, plural):
+        self._send(code, {"kind": "Status", "status": "Failure", "code": code, "message": message}, plural)
+
+    def _resolve(self):
+        self.received = 0
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        prefix, plural, namespace, name, subresource = parse_path(url.path)
+        return (prefix, plural), namespace, name, subresource, query
+
+    def do_GET(self):
+        if self.path == "/_bench/stats":
+            return self._control(self.api.stats())
+        key, namespace, name, _, query = self._resolve()
+        collection = self.api.store.get(key)
+        plural = key[1] if key else "unknown"
+        if collection is None:
+            return self._status(404, f"the server could not find the requested resource ({self.path})", plural)
+        if query.get("watch") in ("true", "1"):
+            return self._watch(key, namespace, query)
+        if name:
+            if name == "~" and key[1] == "users":
+                name = "system:admin"
+            obj = collection.get((namespace, name))
+            if obj is None:
+                return self._status(404, f'{key[1]} "{name}" not found', plural)
+            return self._send(200, obj, plural)
+
+        label_selector, field_selector = query.get("labelSelector"), query.get("fieldSelector")
+        items = (
+            obj for (obj_namespace, _), obj in list(collection.items())
+            if (namespace is None or obj_namespace == namespace)
+            and (not label_selector or match_labels(obj, label_selector))
+            and (not field_selector or match_fields(obj, field_selector))
+        )
+        metadata = {"resourceVersion": str(self.api.resource_version)}
+        limit = int(query.get("limit") or 0)
+        if limit:
+            # Stop filtering once the page and one more item are found, like the API server does
+            start = int(query.get("continue") or 0)
+            items = list(itertools.islice(items, start, start + limit + 1))
+            if len(items) > limit:
+                metadata["continue"] = str(start + limit)
+                items = items[:limit]
+        else:
+            items = list(items)
+        self._send(200, {"kind": "List", "metadata": metadata, "items": items}, plural)
+
+    def _watch(self, key, namespace, query):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        sent = 0
+        resource_version = int(query.get("resourceVersion") or self.api.resource_version)
+        deadline = time.time() + int(query.get("timeoutSeconds") or 30)
+        try:
+            while time.time() < deadline:
+                with self.api.lock:
+                    pending = [event for event in self.api.events if event[0] > resource_version and event[1] == key]
+                    if not pending:
+                        self.api.lock.wait(timeout=min(1, max(0, deadline - time.time())))
+                        continue
+                for event_version, _, event_type, obj in pending:
+                    resource_version = event_version
+                    if namespace and obj["metadata"].get("namespace") != namespace:
+                        continue
+                    if match_labels(obj, query.get("labelSelector")) and match_fields(obj, query.get("fieldSelector")):
+                        data = (json.dumps({"type": event_type, "object": obj}) + "\n").encode()
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                        self.wfile.flush()
+                        sent += len(data)
+            self.wfile.write(b"0\r\n\r\n")
+        except OSError:
+            pass
+        self.api.record("WATCH", key[1], 0, sent)
+
+    def do_PATCH(self):
+        key, namespace, name, _, _ = self._resolve()
+        patch = self._read_body()
+        obj = self.api.store.get(key, {}).get((namespace, name))
+        if obj is None:
+            return self._status(404, f'{key[1]} "{name}" not found', key[1])
+        if isinstance(patch, list):
+            return self._status(415, "only merge patches are supported by the fake API", key[1])
+        _merge(obj, patch)
+        if "spec" in patch:
+            # Spec changes bump the generation, like on a real API server
+            obj["metadata"]["generation"] = obj["metadata"].get("generation", 0) + 1
+        self.api.publish(key, "MODIFIED", obj)
+        self._send(200, obj, key[1])
+
+    def do_POST(self):
+        if self.path == "/_bench/reset":
+            self.api.reset_stats()
+            return self._control({})
+        key, namespace, name, subresource, _ = self._resolve()
+        body = self._read_body()
+        collection = self.api.store.get(key)
+        if collection is None:
+            return self._status(404, f"the server could not find the requested resource ({self.path})", key[1])
+        if subresource == "eviction":
+            obj = collection.pop((namespace, name), None)
+            if obj is None:
+                return self._status(404, f'{key[1]} "{name}" not found', key[1])
+            self.api.publish(key, "DELETED", obj)
+            return self._send(201, {"kind": "Status", "status": "Success"}, key[1])
+        metadata = body.setdefault("metadata", {})
+        if namespace:
+            metadata["namespace"] = namespace
+        if (namespace, metadata.get("name")) in collection:
+            return self._status(409, f'{key[1]} "{metadata.get("name")}" already exists', key[1])
+        collection[(namespace, metadata.get("name"))] = body
+        self.api.publish(key, "ADDED", body)
+        self._send(201, body, key[1])
+
+    def do_PUT(self):
+        key, namespace, name, _, _ = self._resolve()
+        body = self._read_body()
+        collection = self.api.store.get(key)
+        if collection is None or (namespace, name) not in collection:
+            return self._status(404, f'{key[1]} "{name}" not found', key[1])
+        collection[(namespace, name)] = body
+        self.api.publish(key, "MODIFIED", body)
+        self._send(200, body, key[1])
+
+    def do_DELETE(self):
+        key, namespace, name, _, _ = self._resolve()
+        obj = self.api.store.get(key, {}).pop((namespace, name), None)
+        if obj is None:
+            return self._status(404, f'{key[1]} "{name}" not found', key[1])
+        self.api.publish(key, "DELETED", obj)
+        self._send(200, obj, key[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a synthetic cluster on a fake Kubernetes API.")
+    parser.add_argument("--nodes", type=int, default=5000)
+    parser.add_argument("--pods", type=int, default=100000)
+    parser.add_argument("--operators", type=int, default=80)
+    parser.add_argument("--pools", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=0, help="Port to listen on (default: any free port)")
+    args = parser.parse_args()
+
+    cluster = generate_cluster(nodes=args.nodes, pods=args.pods, operators=args.operators, pools=args.pools,
+                               seed=args.seed)
+    server = FakeAPIServer(cluster, port=args.port)
+    # The runner reads the URL from the first line
+    print(server.url, flush=True)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""Synthetic OpenShift cluster generator for the benchmarks.
+
+``generate_cluster`` builds a converged cluster of any size: nodes split
+into MachineConfigPools, daemonset and workload pods spread across the nodes,
+healthy ClusterOperators and the cluster-scoped network objects the modules
+read. The result maps ``(api prefix, plural)`` to a list of objects and is
+served by ``fake_api.FakeAPIServer``.
+"""
+
+import random
+
+NETWORK_CONFIG = ("apis/config.openshift.io/v1", "networks")
+NETWORK_OPERATOR = ("apis/operator.openshift.io/v1", "networks")
+CLUSTER_VERSIONS = ("apis/config.openshift.io/v1", "clusterversions")
+CLUSTER_OPERATORS = ("apis/config.openshift.io/v1", "clusteroperators")
+MACHINE_CONFIG_POOLS = ("apis/machineconfiguration.openshift.io/v1", "machineconfigpools")
+MACHINE_CONFIGS = ("apis/machineconfiguration.openshift.io/v1", "machineconfigs")
+USERS = ("apis/user.openshift.io/v1", "users")
+NODES = ("api/v1", "nodes")
+NAMESPACES = ("api/v1", "namespaces")
+PODS = ("api/v1", "pods")
+DAEMONSETS = ("apis/apps/v1", "daemonsets")
+DEPLOYMENTS = ("apis/apps/v1", "deployments")
+PDBS = ("apis/policy/v1", "poddisruptionbudgets")
+CONFIG_MAPS = ("api/v1", "configmaps")
+
+OCP_VERSION = "4.14.12"
+
+# Daemonsets with one pod per node: (namespace, name, k8s-app label)
+DAEMONSETS_PER_NODE = [
+    ("openshift-machine-config-operator", "machine-config-daemon", "machine-config-daemon"),
+    ("openshift-multus", "multus", "multus"),
+    ("openshift-ovn-kubernetes", "ovnkube-node", "ovnkube-node"),
+]
+
+TRANSITION_TIME = "2024-01-01T00:00:00Z"
+
+
+def _condition(condition_type, status):
+    return {"type": condition_type, "status": status, "lastTransitionTime": TRANSITION_TIME}
+
+
+def _configure_ovs_config(name, network_type, labels=None, pool=None):
+    metadata = {"name": name, "labels": labels or {}}
+    if pool:
+        # Rendered configs belong to their pool; the source configs carry the role label the pool selects
+        metadata["ownerReferences"] = [{"kind": "MachineConfigPool", "name": pool}]
+    return {
+        "metadata": metadata,
+        "spec": {"config": {"systemd": {"units": [{
+            "name": "ovs-configuration.service",
+            "enabled": True,
+            "contents": f"[Service]\nType=oneshot\nExecStart=/usr/local/bin/configure-ovs.sh {network_type}\n",
+        }]}}},
+    }
+
+
+def _node(index, name, pools, rng):
+    pool = pools[index]
+    rendered = f"rendered-{pool}-1"
+    labels = {
+        "kubernetes.io/hostname": name,
+        "kubernetes.io/os": "linux",
+        "topology.kubernetes.io/zone": f"zone-{index % 3}",
+        f"node-role.kubernetes.io/{'master' if pool == 'master' else 'worker'}": "",
+    }
+    if pool not in ("master", "worker"):
+        labels[f"node-role.kubernetes.io/{pool}"] = ""
+    return {
+        "metadata": {
+            "name": name,
+            "labels": labels,
+            "annotations": {
+                "machineconfiguration.openshift.io/currentConfig": rendered,
+                "machineconfiguration.openshift.io/desiredConfig": rendered,
+                "machineconfiguration.openshift.io/state": "Done",
+                "k8s.ovn.org/node-subnets": f'{{"default":"10.{128 + index // 512}.{(index % 512) // 2}.0/23"}}',
+            },
+        },
+        "spec": {"podCIDR": f"10.{128 + index // 512}.{(index % 512) // 2}.0/23"},
+        "status": {
+            "conditions": [
+                _condition("MemoryPressure", "False"),
+                _condition("DiskPressure", "False"),
+                _condition("PIDPressure", "False"),
+                _condition("Ready", "True"),
+            ],
+            "addresses": [
+                {"type": "InternalIP", "address": f"10.0.{index // 250}.{index % 250 + 1}"},
+                {"type": "Hostname", "address": name},
+            ],
+            "nodeInfo": {
+                "bootID": f"{rng.getrandbits(128):032x}",
+                "kubeletVersion": "v1.27.10",
+                "osImage": "Red Hat Enterprise Linux CoreOS",
+            },
+            # Real nodes carry long image lists; they dominate the size of a node list
+            "images": [
+                {"names": [f"quay.io/openshift-release-dev/ocp-v4.0-art-dev@sha256:{rng.getrandbits(256):064x}"],
+                 "sizeBytes": rng.randint(10 ** 8, 10 ** 9)}
+                for _ in range(20)
+            ],
+        },
+    }
+
+
+def _pod(namespace, name, node_name, labels, owner_kind="ReplicaSet"):
+    return {
+        "metadata": {
+            "name": name,
+            "namespace": namespace,
+            "labels": labels,
+            "ownerReferences": [{"kind": owner_kind, "name": name.rsplit("-", 1)[0]}],
+        },
+        "spec": {
+            "nodeName": node_name,
+            "containers": [{"name": "main", "image": f"registry.example.com/{namespace}/main:latest"}],
+        },
+        "status": {
+            "phase": "Running",
+            "conditions": [_condition("Ready", "True")],
+            "containerStatuses": [{"name": "main", "ready": True, "restartCount": 0}],
+        },
+    }
+
+
+def generate_cluster(nodes=5000, pods=100000, operators=80, pools=10, namespaces=200,
+                     masters=3, network_type="OVNKubernetes", seed=0):
+    """Return ``{(prefix, plural): [objects]}`` for a converged synthetic cluster."""
+    rng = random.Random(seed)
+    pool_names = ["master", "worker"] + [f"custom-{index}" for index in range(max(pools - 2, 0))]
+    custom_pools = pool_names[2:]
+
+    # Masters first, the remaining nodes spread round-robin over worker and the custom pools
+    worker_pools = ["worker"] + custom_pools
+    node_pools = ["master"] * masters + [worker_pools[index % len(worker_pools)] for index in range(nodes - masters)]
+    node_names = [f"node-{index:05d}" for index in range(nodes)]
+    cluster = {key: [] for key in (NETWORK_CONFIG, NETWORK_OPERATOR, CLUSTER_VERSIONS, CLUSTER_OPERATORS,
+                                   MACHINE_CONFIG_POOLS, MACHINE_CONFIGS, USERS, NODES, NAMESPACES, PODS,
+                                   DAEMONSETS, DEPLOYMENTS, PDBS, CONFIG_MAPS)}
+
+    cluster[NODES] = [_node(index, name, node_pools, rng) for index, name in enumerate(node_names)]
+
+    for pool in pool_names:
+        count = node_pools.count(pool)
+        cluster[MACHINE_CONFIG_POOLS].append({
+            "metadata": {"name": pool, "generation": 2},
+            "spec": {
+                "paused": False,
+                "configuration": {"name": f"rendered-{pool}-1",
+                                  "source": [{"kind": "MachineConfig", "name": f"00-{pool}"}]},
+                "machineConfigSelector": {"matchLabels": {"machineconfiguration.openshift.io/role": pool}},
+                "nodeSelector": {"matchLabels": {f"node-role.kubernetes.io/{pool}": ""}},
+            },
+            "status": {
+                "observedGeneration": 2,
+                "configuration": {"name": f"rendered-{pool}-1"},
+                "machineCount": count,
+                "readyMachineCount": count,
+                "updatedMachineCount": count,
+                "degradedMachineCount": 0,
+                "conditions": [
+                    _condition("Updated", "True"),
+                    _condition("Updating", "False"),
+                    _condition("Degraded", "False"),
+                ],
+            },
+        })
+        cluster[MACHINE_CONFIGS].append(_configure_ovs_config(
+            f"00-{pool}", network_type, labels={"machineconfiguration.openshift.io/role": pool}))
+        cluster[MACHINE_CONFIGS].append(_configure_ovs_config(f"rendered-{pool}-1", network_type, pool=pool))
+
+    operator_names = ["network", "machine-config", "dns", "ingress", "kube-apiserver", "etcd"]
+    operator_names += [f"operator-{index:02d}" for index in range(max(operators - len(operator_names), 0))]
+    for name in operator_names[:operators]:
+        cluster[CLUSTER_OPERATORS].append({
+            "metadata": {"name": name},
+            "status": {
+                "conditions": [
+                    _condition("Available", "True"),
+                    _condition("Progressing", "False"),
+                    _condition("Degraded", "False"),
+                ],
+                "versions": [{"name": "operator", "version": OCP_VERSION}],
+            },
+        })
+
+    namespace_names = [ds_namespace for ds_namespace, _, _ in DAEMONSETS_PER_NODE]
+    namespace_names += ["openshift-sdn", "openshift-network-operator"]
+    namespace_names += [f"app-{index:03d}" for index in range(namespaces)]
+    cluster[NAMESPACES] = [{"metadata": {"name": name}, "status": {"phase": "Active"}} for name in namespace_names]
+
+    for ds_namespace, ds_name, app in DAEMONSETS_PER_NODE:
+        cluster[DAEMONSETS].append({
+            # A spec change outside the pod template moved the generation past the template's
+            "metadata": {"name": ds_name, "namespace": ds_namespace, "generation": 4,
+                         "annotations": {"deprecated.daemonset.template.generation": "3"}},
+            "status": {
+                "observedGeneration": 4,
+                "desiredNumberScheduled": nodes,
+                "currentNumberScheduled": nodes,
+                "updatedNumberScheduled": nodes,
+                "numberAvailable": nodes,
+                "numberReady": nodes,
+            },
+        })
+        for index, node_name in enumerate(node_names):
+            labels = {"k8s-app": app, "app": app, "pod-template-generation": "3"}
+            cluster[PODS].append(_pod(ds_namespace, f"{ds_name}-{index:05d}", node_name, labels, "DaemonSet"))
+    cluster[DEPLOYMENTS].append({
+        "metadata": {"name": "ovnkube-control-plane", "namespace": "openshift-ovn-kubernetes", "generation": 2},
+        "spec": {"replicas": masters},
+        "status": {"observedGeneration": 2, "replicas": masters, "updatedReplicas": masters,
+                   "availableReplicas": masters, "readyReplicas": masters},
+    })
+
+    app_namespaces = namespace_names[-namespaces:] if namespaces else []
+    workers = node_names[masters:] or node_names
+    for index in range(max(pods - len(cluster[PODS]), 0)):
+        namespace = app_namespaces[index % len(app_namespaces)] if app_namespaces else "default"
+        app = f"app-{index % 50}"
+        cluster[PODS].append(_pod(namespace, f"{app}-{index:06d}", rng.choice(workers), {"app": app}))
+    for namespace in app_namespaces:
+        cluster[PDBS].append({
+            "metadata": {"name": "app", "namespace": namespace},
+            "spec": {"maxUnavailable": 1, "selector": {"matchLabels": {"app": "app-0"}}},
+            "status": {"disruptionsAllowed": 1, "currentHealthy": 2, "desiredHealthy": 1, "expectedPods": 2},
+        })
+
+    cluster[NETWORK_CONFIG].append({
+        "metadata": {"name": "cluster"},
+        "spec": {
+            "clusterNetwork": [{"cidr": "10.128.0.0/14", "hostPrefix": 23}],
+            "serviceNetwork": ["172.30.0.0/16"],
+            "networkType": network_type,
+        },
+        "status": {
+            "networkType": network_type,
+            "clusterNetworkMTU": 1400,
+            "networking": {"machineNetwork": [{"cidr": "10.0.0.0/16"}]},
+        },
+    })
+    cluster[NETWORK_OPERATOR].append({
+        "metadata": {"name": "cluster"},
+        "spec": {"defaultNetwork": {"type": network_type, "openshiftSDNConfig": {"mode": "NetworkPolicy"}}},
+    })
+    cluster[CLUSTER_VERSIONS].append({
+        "metadata": {"name": "version"},
+        "status": {"history": [{"version": OCP_VERSION, "state": "Completed"}]},
+    })
+    cluster[USERS].append({"metadata": {"name": "system:admin"}})
+    return cluster
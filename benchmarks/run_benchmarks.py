@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""Benchmark the modules and role phases against a synthetic cluster.
+
+Starts ``fake_api.py`` in its own process serving a cluster generated by
+``fake_cluster.generate_cluster`` (so the runner's memory does not leak into
+the RSS of the measured processes) and runs every scenario through ``ansible`` /
+``ansible-playbook`` with KUBECONFIG pointing at the fake API and the fake
+``oc`` from benchmarks/bin first in PATH. For each scenario it reports the
+wall time, the API calls and bytes the fake API saw, and the peak RSS of the
+largest process of the run (usually the module itself on big clusters).
+
+Results can be written with --output and compared with a previous run with
+--baseline; the exit code is 1 when a scenario failed or regressed by more
+than --tolerance.
+
+    python benchmarks/run_benchmarks.py --nodes 5000 --pods 100000 --output results.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from urllib.request import Request, urlopen
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+BIN_DIR = os.path.join(BENCH_DIR, "bin")
+
+CONFLICTING_CIDR_RANGES = ["100.64.0.0/16", "169.254.169.0/29", "100.88.0.0/16", "fd98::/64", "fd69::/125", "fd97::/64"]
+CO_CHECKS = [
+    "oc wait co --all --for='condition=Available=True' --timeout=60s",
+    "oc wait co --all --for='condition=Progressing=False' --timeout=60s",
+    "oc wait co --all --for='condition=Degraded=False' --timeout=60s",
+]
+
+# Modules that finish against a converged cluster. Every scenario runs with an empty snapshot cache
+# unless it lists "warm_snapshot", in which case cluster_snapshot runs first and is not measured.
+MODULE_SCENARIOS = [
+    {"name": "check_kubeconfig", "module": "check_kubeconfig"},
+    {"name": "check_oc_client", "module": "check_oc_client"},
+    {"name": "check_whoami", "module": "check_whoami"},
+    {"name": "get_ocp_version", "module": "get_ocp_version"},
+    {"name": "cluster_snapshot", "module": "cluster_snapshot", "args": {"max_age": 0}},
+    {"name": "check_nodes_ready", "module": "check_nodes_ready"},
+    {"name": "check_nodes_ready (warm snapshot)", "module": "check_nodes_ready", "warm_snapshot": True},
+    {"name": "check_network_provider", "module": "check_network_provider",
+     "args": {"expected_network_type": "OVNKubernetes"}},
+    {"name": "check_network_policy_mode", "module": "check_network_policy_mode"},
+    {"name": "check_pod_health", "module": "check_pod_health"},
+    {"name": "check_cidr_ranges", "module": "check_cidr_ranges",
+     "args": {"conflicting_ranges": CONFLICTING_CIDR_RANGES}},
+    {"name": "run_prechecks", "module": "run_prechecks",
+     "args": {"checks": ["oc_client", "kubeconfig", "whoami", "cidr_ranges", "network_policy_mode", "ocp_version"],
+              "conflicting_ranges": CONFLICTING_CIDR_RANGES}},
+    {"name": "check_cluster_operators", "module": "check_cluster_operators", "args": {"timeout": 60}},
+    {"name": "verify_cluster_operators_health", "module": "verify_cluster_operators_health",
+     "args": {"checks": CO_CHECKS, "pause_between_checks": 1, "required_success_count": 3}},
+    {"name": "verify_cluster_operators_health (stability window)", "module": "verify_cluster_operators_health",
+     "args": {"checks": CO_CHECKS, "stability_window": 90}},
+    {"name": "wait_for_mco_completion", "module": "wait_for_mco_completion", "args": {"timeout": 60}},
+    {"name": "verify_machine_config", "module": "verify_machine_config",
+     "args": {"network_type": "OVNKubernetes", "timeout": 120}},
+    {"name": "wait_multus_restart", "module": "wait_multus_restart", "args": {"timeout": 60}},
+    {"name": "wait_multus_restart (OVN-Kubernetes workloads)", "module": "wait_multus_restart",
+     "args": {"timeout": 60, "workloads": [
+         {"kind": "daemonset", "namespace": "openshift-multus", "name": "multus"},
+         {"kind": "daemonset", "namespace": "openshift-ovn-kubernetes", "name": "ovnkube-node"},
+         {"kind": "deployment", "namespace": "openshift-ovn-kubernetes", "name": "ovnkube-control-plane"},
+     ]}},
+    {"name": "configure_network_settings (check mode)", "module": "configure_network_settings", "check": True,
+     "args": {"network_type": "OVNKubernetes", "mtu": 1400, "retries": 1}},
+    {"name": "patch_mcp_paused", "module": "patch_mcp_paused", "args": {"pool_name": "worker", "paused": False}},
+    {"name": "manage_mcp_paused", "module": "manage_mcp_paused", "args": {"paused": False}},
+    {"name": "clean_migration_field", "module": "clean_migration_field", "args": {"timeout": 60}},
+    {"name": "reboot_nodes (check mode)", "module": "reboot_nodes", "check": True,
+     "args": {"role": "worker", "namespace": "openshift-machine-config-operator",
+              "daemonset_label": "machine-config-daemon", "max_parallel": "10%"}},
+    {"name": "reboot_nodes (check mode, drain)", "module": "reboot_nodes", "check": True,
+     "args": {"role": "worker", "namespace": "openshift-machine-config-operator",
+              "daemonset_label": "machine-config-daemon", "max_parallel": "10%", "drain": True}},
+    {"name": "resume_mcp", "module": "resume_mcp"},
+]
+
+# Modules that wait for the cluster to react to a change, which a static fake cluster never does
+SKIPPED_MODULES = {
+    "change_network_type": "waits for the network operator to report the migration",
+    "trigger_network_type": "waits for the network operator to start the rollout",
+    "wait_for_mco": "waits for the pools to start updating",
+    "wait_for_network_co": "waits for the network operator to progress",
+    "manage_network_config": "deletes the openshift-sdn namespace the other scenarios read",
+}
+
+PHASE_SCENARIOS = [
+    {"name": "role prechecks", "role": "prechecks",
+     "vars": {"precheck_checks": ["oc_client", "kubeconfig", "whoami", "cidr_ranges", "network_policy_mode",
+                                  "ocp_version"]}},
+    {"name": "role reboot_nodes (check mode)", "role": "reboot_nodes", "check": True},
+    {"name": "role post_migration", "role": "post_migration",
+     "vars": {"checks": CO_CHECKS, "expected_network_type": "OVNKubernetes",
+              "network_provider_config": "openshiftSDNConfig", "namespace": "openshift-sdn",
+              "clean_migration_timeout": 60}},
+]
+
+# Metrics compared with the baseline; wall time is noisy, so it gets the tolerance twice
+COMPARED_METRICS = {"wall_seconds": 2, "api_calls": 1, "bytes_sent": 1, "peak_rss_mb": 1}
+
+
+def write_kubeconfig(directory, server):
+    path = os.path.join(directory, "kubeconfig")
+    with open(path, "w") as fh:
+        fh.write(
+            "apiVersion: v1\nkind: Config\n"
+            f"clusters:\n- name: bench\n  cluster:\n    server: {server}\n"
+            "users:\n- name: bench\n  user:\n    token: sha256~benchmark\n"
+            "contexts:\n- name: bench\n  context:\n    cluster: bench\n    user: bench\n"
+            "current-context: bench\n"
+        )
+    return path
+
+
+def api_stats(url, reset=False):
+    """Read (or reset) the request counters of the fake API."""
+    request = Request(f"{url}/_bench/reset", data=b"{}", method="POST") if reset else f"{url}/_bench/stats"
+    with urlopen(request) as response:
+        return json.load(response)
+
+
+def scenario_command(scenario, work_dir):
+    """Return the ansible command line running one scenario."""
+    if "role" in scenario:
+        playbook = os.path.join(work_dir, f"{scenario['role']}.yml")
+        with open(playbook, "w") as fh:
+            json.dump([{"hosts": "localhost", "gather_facts": False,
+                        "roles": [{"role": scenario["role"], "vars": scenario.get("vars", {})}]}], fh)
+        command = ["ansible-playbook", playbook]
+    else:
+        command = ["ansible", "localhost", "-m", scenario["module"]]
+        if scenario.get("args"):
+            command += ["-a", json.dumps(scenario["args"])]
+    if scenario.get("check"):
+        command.append("--check")
+    return command
+
+
+def run_scenario(scenario, api_url, env, work_dir, log_dir):
+    """Run one scenario and return its measurements."""
+    if scenario.get("warm_snapshot"):
+        subprocess.run(scenario_command({"module": "cluster_snapshot"}, work_dir), cwd=REPO_DIR, env=env,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    api_stats(api_url, reset=True)
+    log_path = os.path.join(log_dir, scenario["name"].replace(" ", "_").replace("(", "").replace(")", "") + ".log")
+    with open(log_path, "w") as log:
+        started = time.perf_counter()
+        process = subprocess.Popen(scenario_command(scenario, work_dir), cwd=REPO_DIR, env=env,
+                                   stdout=log, stderr=subprocess.STDOUT)
+        # wait4 reports the largest RSS among the process and the descendants it waited for
+        _, status, usage = os.wait4(process.pid, 0)
+        wall = time.perf_counter() - started
+        process.returncode = os.waitstatus_to_exitcode(status)
+    stats = api_stats(api_url)
+    return {
+        "name": scenario["name"],
+        "ok": process.returncode == 0,
+        "wall_seconds": round(wall, 2),
+        "api_calls": stats["api_calls"],
+        "bytes_sent": stats["bytes_sent"],
+        "bytes_received": stats["bytes_received"],
+        "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),
+        "calls": stats["calls"],
+        "log": log_path,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regression messages against a previous results file."""
+    previous = {result["name"]: result for result in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        before = previous.get(result["name"])
+        if not before:
+            continue
+        for metric, factor in COMPARED_METRICS.items():
+            limit = before[metric] * (1 + tolerance * factor)
+            # Ignore noise on tiny values
+            if result[metric] > limit and result[metric] - before[metric] > (1 if metric != "bytes_sent" else 4096):
+                regressions.append(f"{result['name']}: {metric} {before[metric]} -> {result[metric]}")
+    return regressions
+
+
+def print_table(results):
+    header = f"{'scenario':<42} {'ok':<3} {'wall s':>8} {'calls':>7} {'MB sent':>9} {'MB recv':>8} {'RSS MB':>8}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        print(f"{result['name']:<42} {'yes' if result['ok'] else 'NO':<3} {result['wall_seconds']:>8.2f} "
+              f"{result['api_calls']:>7} {result['bytes_sent'] / 2 ** 20:>9.2f} "
+              f"{result['bytes_received'] / 2 ** 20:>8.2f} {result['peak_rss_mb']:>8.1f}")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--nodes", type=int, default=5000)
+    parser.add_argument("--pods", type=int, default=100000)
+    parser.add_argument("--operators", type=int, default=80)
+    parser.add_argument("--pools", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="*", help="Run only the scenarios whose name starts with one of these")
+    parser.add_argument("--skip-phases", action="store_true", help="Benchmark the modules only")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare with the JSON results of a previous run")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression (default 0.25)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cluster_size = {"nodes": args.nodes, "pods": args.pods, "operators": args.operators, "pools": args.pools}
+    print(f"Generating a synthetic cluster: {cluster_size}", flush=True)
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(BENCH_DIR, "fake_api.py"), "--seed", str(args.seed)]
+        + [f"--{key}={value}" for key, value in cluster_size.items()],
+        stdout=subprocess.PIPE, text=True,
+    )
+    api_url = server.stdout.readline().strip()
+    if not api_url:
+        print("The fake API server did not start.", file=sys.stderr)
+        return 1
+
+    scenarios = MODULE_SCENARIOS + ([] if args.skip_phases else PHASE_SCENARIOS)
+    if args.only:
+        scenarios = [scenario for scenario in scenarios if scenario["name"].startswith(tuple(args.only))]
+
+    results = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="sdn-ovn-bench-") as work_dir:
+            log_dir = os.path.join(work_dir, "logs")
+            os.makedirs(log_dir)
+            env = dict(
+                os.environ,
+                KUBECONFIG=write_kubeconfig(work_dir, api_url),
+                BENCH_API_URL=api_url,
+                PATH=f"{BIN_DIR}{os.pathsep}{os.environ.get('PATH', '')}",
+                SDN_OVN_STATE_DIR=os.path.join(work_dir, "state"),
+                SDN_OVN_METRICS_DIR=os.path.join(work_dir, "metrics"),
+                ANSIBLE_CONFIG=os.path.join(REPO_DIR, "ansible.cfg"),
+                ANSIBLE_LIBRARY=os.pathsep.join(os.path.join(REPO_DIR, path) for path in
+                                                ("library", "roles/reboot_nodes/library", "roles/post_rollback/library")),
+                ANSIBLE_ROLES_PATH=os.path.join(REPO_DIR, "roles"),
+                ANSIBLE_LOCALHOST_WARNING="false",
+                ANSIBLE_INVENTORY_UNPARSED_WARNING="false",
+            )
+            for scenario in scenarios:
+                shutil.rmtree(env["SDN_OVN_STATE_DIR"], ignore_errors=True)
+                result = run_scenario(scenario, api_url, env, work_dir, log_dir)
+                log_path = result.pop("log")
+                if not result["ok"]:
+                    with open(log_path) as fh:
+                        result["output"] = fh.read()[-2000:]
+                results.append(result)
+                print(f"  {result['name']}: {result['wall_seconds']}s, {result['api_calls']} calls"
+                      f"{'' if result['ok'] else ' (FAILED)'}", flush=True)
+    finally:
+        server.terminate()
+        server.wait()
+
+    print()
+    print_table(results)
+    print("\nNot benchmarked: " + ", ".join(f"{name} ({reason})" for name, reason in SKIPPED_MODULES.items()))
+
+    report = {"cluster": cluster_size, "seed": args.seed, "taken_at": time.time(), "results": results}
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+    failed = [result["name"] for result in results if not result["ok"]]
+    for name in failed:
+        print(f"FAILED: {name}\n{next(r['output'] for r in results if r['name'] == name)}", file=sys.stderr)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(results, json.load(fh), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+    return 1 if failed or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+DOCUMENTATION = """
+    name: fleet_dashboard
+    type: aggregate
+    short_description: Summarize the phase of every cluster of a fleet migration
+    description:
+      - Keeps one entry per inventory host (cluster) with the role (phase) and task it is running, its status,
+        the failed task and message, and writes it to C(dashboard.json) and C(dashboard.txt) after every task.
+      - Appends every task result of a cluster to its own log, C(logs/<cluster>.log).
+      - Several playbook runs can share the directory; the dashboard is locked and merged, so each run only
+        replaces the entries of its own clusters.
+      - Only plays of a fleet run (playbook-fleet.yml, which sets C(fleet_hosts)) are recorded; a single-cluster
+        run of the migration or rollback playbook writes nothing.
+    requirements:
+      - enable in ansible.cfg (callbacks_enabled = fleet_dashboard)
+    options:
+      output_dir:
+        description: Directory for the dashboard and the per-cluster logs.
+        default: ~/.ansible/sdn_ovn_migration/fleet
+        env:
+          - name: SDN_OVN_FLEET_DIR
+        ini:
+          - section: callback_fleet_dashboard
+            key: output_dir
+"""
+
+import fcntl
+import json
+import os
+import time
+
+from ansible.plugins.callback import CallbackBase
+
+# Final dashboard status from the play recap of a host
+FINAL_STATUS = (("unreachable", "unreachable"), ("failures", "failed"))
+
+
+class CallbackModule(CallbackBase):
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = "aggregate"
+    CALLBACK_NAME = "fleet_dashboard"
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self, display=None):
+        super(CallbackModule, self).__init__(display=display)
+        self.playbook = None
+        self.output_dir = None
+        self.clusters = {}
+        self.tasks = {}
+
+    def v2_playbook_on_start(self, playbook):
+        self.playbook = os.path.basename(playbook._file_name)
+
+    def v2_playbook_on_play_start(self, play):
+        if self.output_dir is not None or "fleet_hosts" not in play.vars:
+            return
+        self.output_dir = os.path.expanduser(self.get_option("output_dir"))
+        try:
+            os.makedirs(os.path.join(self.output_dir, "logs"), exist_ok=True)
+        except OSError as ex:
+            self._display.warning(f"fleet_dashboard: could not create {self.output_dir}: {ex}")
+            self.output_dir = None
+
+    def v2_playbook_on_task_start(self, task, is_conditional):
+        self.tasks[task._uuid] = {
+            "phase": task._role.get_name() if task._role else "(play)",
+            "task": task.name or task.action,
+            "started": time.time(),
+        }
+
+    def v2_playbook_on_handler_task_start(self, task):
+        self.v2_playbook_on_task_start(task, False)
+
+    def _cluster(self, host):
+        return self.clusters.setdefault(host, {
+            "cluster": host,
+            "playbook": self.playbook,
+            "started": time.time(),
+            "status": "running",
+            "phase": None,
+            "task": None,
+            "tasks_done": 0,
+            "failed_task": None,
+            "msg": None,
+        })
+
+    def _record(self, result, status):
+        task = self.tasks.get(result._task._uuid)
+        if task is None or self.output_dir is None:
+            return
+        host = result._host.get_name()
+        msg = result._result.get("msg")
+        msg = str(msg) if msg is not None else None
+        cluster = self._cluster(host)
+        cluster.update(phase=task["phase"], task=task["task"], updated=time.time())
+        cluster["tasks_done"] += 1
+        if status in ("failed", "unreachable"):
+            cluster.update(status=status, failed_task=f"{task['phase']} : {task['task']}", msg=msg)
+
+        line = f"{time.strftime('%Y-%m-%dT%H:%M:%S')} {status:<11} {task['phase']} : {task['task']}"
+        if msg and status != "ok":
+            line += f" - {msg}"
+        try:
+            with open(os.path.join(self.output_dir, "logs", f"{host}.log"), "a") as fh:
+                fh.write(line.replace("\n", " ") + "\n")
+        except OSError as ex:
+            self._display.warning(f"fleet_dashboard: could not write the log of {host}: {ex}")
+        self._write_dashboard()
+
+    def v2_runner_on_ok(self, result):
+        self._record(result, "changed" if result._result.get("changed") else "ok")
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._record(result, "ignored" if ignore_errors else "failed")
+
+    def v2_runner_on_skipped(self, result):
+        self._record(result, "skipped")
+
+    def v2_runner_on_unreachable(self, result):
+        self._record(result, "unreachable")
+
+    def v2_playbook_on_stats(self, stats):
+        if self.output_dir is None:
+            return
+        for host in stats.processed:
+            summary = stats.summarize(host)
+            cluster = self._cluster(host)
+            cluster["status"] = next((status for key, status in FINAL_STATUS if summary.get(key)), "done")
+            cluster["finished"] = time.time()
+        self._write_dashboard()
+        self._display.display(f"Fleet dashboard: {os.path.join(self.output_dir, 'dashboard.txt')}")
+
+    def _write_dashboard(self):
+        """Merge this run's clusters into the shared dashboard under an exclusive lock."""
+        path = os.path.join(self.output_dir, "dashboard.json")
+        try:
+            with open(os.path.join(self.output_dir, ".dashboard.lock"), "w") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    with open(path) as fh:
+                        dashboard = json.load(fh)
+                except (OSError, ValueError):
+                    dashboard = {}
+                dashboard.update(self.clusters)
+                self._write(path, json.dumps(dashboard, indent=2, sort_keys=True))
+                self._write(os.path.join(self.output_dir, "dashboard.txt"), self._table(dashboard))
+        except OSError as ex:
+            self._display.warning(f"fleet_dashboard: could not write the dashboard: {ex}")
+
+    @staticmethod
+    def _table(dashboard):
+        rows = [("CLUSTER", "STATUS", "PHASE", "TASK", "ELAPSED", "MESSAGE")]
+        for name in sorted(dashboard):
+            cluster = dashboard[name]
+            ended = cluster.get("finished") or cluster.get("updated") or cluster["started"]
+            rows.append((
+                name,
+                cluster["status"],
+                cluster.get("phase") or "",
+                (cluster.get("failed_task") or cluster.get("task") or "")[:60],
+                f"{int(ended - cluster['started']) // 60}m",
+                (cluster.get("msg") or "")[:80].replace("\n", " ") if cluster["status"] != "done" else "",
+            ))
+        widths = [max(len(str(row[index])) for row in rows) for index in range(len(rows[0]) - 1)]
+        return "".join(
+            "  ".join(str(value).ljust(width) for value, width in zip(row, widths)) + "  " + row[-1] + "\n"
+            for row in rows
+        )
+
+    @staticmethod
+    def _write(path, content):
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as fh:
+            fh.write(content)
+        os.replace(temp_path, path)
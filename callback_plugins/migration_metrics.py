@@ -0,0 +1,213 @@
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+DOCUMENTATION = """
+    name: migration_metrics
+    type: aggregate
+    short_description: Record task timings and module metrics of the migration playbooks
+    description:
+      - Records the duration and status of every task together with the C(metrics) the modules return
+        (API and C(oc) calls, poll iterations, time spent sleeping and the time-to-condition of each wait).
+      - At the end of the run writes a JSON timeline and a Prometheus textfile that the node_exporter
+        textfile collector can pick up.
+    requirements:
+      - enable in ansible.cfg (callbacks_enabled = migration_metrics)
+    options:
+      output_dir:
+        description: Directory for the JSON timelines.
+        default: ~/.ansible/sdn_ovn_migration/metrics
+        env:
+          - name: SDN_OVN_METRICS_DIR
+        ini:
+          - section: callback_migration_metrics
+            key: output_dir
+      textfile:
+        description: Path of the Prometheus textfile; defaults to sdn_ovn_migration.prom in output_dir.
+        env:
+          - name: SDN_OVN_METRICS_TEXTFILE
+        ini:
+          - section: callback_migration_metrics
+            key: textfile
+"""
+
+import json
+import os
+import time
+
+from ansible.plugins.callback import CallbackBase
+
+PREFIX = "sdn_ovn_migration"
+
+# Module metric counters exported per task: counter name -> (metric name, help)
+EXPORTED_COUNTERS = {
+    "api_calls": ("api_calls", "Kubernetes API requests made by the task."),
+    "oc_calls": ("oc_calls", "oc invocations made by the task."),
+    "poll_iterations": ("poll_iterations", "Poll iterations made by the task."),
+    "watch_events": ("watch_events", "Watch events received by the task."),
+    "sleep_seconds": ("sleep_seconds", "Seconds the task spent sleeping between attempts."),
+}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items() if value is not None) + "}"
+
+
+def _merge_metrics(results):
+    """Sum the counters and collect the waits of a result and its loop items."""
+    counters, waits = {}, []
+    for result in results:
+        metrics = result.get("metrics") if isinstance(result, dict) else None
+        if not metrics:
+            continue
+        for name, value in metrics.get("counters", {}).items():
+            counters[name] = counters.get(name, 0) + value
+        waits.extend(metrics.get("waits", []))
+    return counters, waits
+
+
+class CallbackModule(CallbackBase):
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = "aggregate"
+    CALLBACK_NAME = "migration_metrics"
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self, display=None):
+        super(CallbackModule, self).__init__(display=display)
+        self.started = time.time()
+        self.playbook = None
+        self.play = None
+        self.tasks = {}
+        self.timeline = []
+
+    def v2_playbook_on_start(self, playbook):
+        self.playbook = os.path.basename(playbook._file_name)
+
+    def v2_playbook_on_play_start(self, play):
+        self.play = play.get_name()
+
+    def v2_playbook_on_task_start(self, task, is_conditional):
+        self.tasks[task._uuid] = {
+            "play": self.play,
+            "role": task._role.get_name() if task._role else None,
+            "task": task.get_name(),
+            "action": task.action,
+            "started": time.time(),
+        }
+
+    def v2_playbook_on_handler_task_start(self, task):
+        self.v2_playbook_on_task_start(task, False)
+
+    def _record(self, result, status):
+        task = self.tasks.get(result._task._uuid)
+        if task is None:
+            return
+        ended = time.time()
+        data = result._result
+        counters, waits = _merge_metrics([data] + list(data.get("results") or []))
+        if task["action"] in ("shell", "command", "ansible.builtin.shell", "ansible.builtin.command"):
+            commands = [data.get("cmd")] + [item.get("cmd") for item in data.get("results") or [] if isinstance(item, dict)]
+            for command in commands:
+                command = " ".join(command) if isinstance(command, list) else command or ""
+                if command.strip().startswith("oc "):
+                    counters["oc_calls"] = counters.get("oc_calls", 0) + 1
+        self.timeline.append(dict(
+            task,
+            host=result._host.get_name(),
+            status=status,
+            ended=ended,
+            duration=round(ended - task["started"], 3),
+            counters=counters,
+            waits=waits,
+        ))
+
+    def v2_runner_on_ok(self, result):
+        self._record(result, "changed" if result._result.get("changed") else "ok")
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._record(result, "ignored" if ignore_errors else "failed")
+
+    def v2_runner_on_skipped(self, result):
+        self._record(result, "skipped")
+
+    def v2_runner_on_unreachable(self, result):
+        self._record(result, "unreachable")
+
+    def v2_playbook_on_stats(self, stats):
+        ended = time.time()
+        output_dir = os.path.expanduser(self.get_option("output_dir"))
+        textfile = os.path.expanduser(self.get_option("textfile") or os.path.join(output_dir, f"{PREFIX}.prom"))
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            timeline_path = os.path.join(
+                output_dir, f"timeline-{os.path.splitext(self.playbook or 'adhoc')[0]}-{int(self.started)}.json")
+            self._write(timeline_path, json.dumps({
+                "playbook": self.playbook,
+                "started": self.started,
+                "ended": ended,
+                "duration": round(ended - self.started, 3),
+                "roles": self._role_spans(),
+                "tasks": self.timeline,
+            }, indent=2))
+            os.makedirs(os.path.dirname(os.path.abspath(textfile)), exist_ok=True)
+            self._write(textfile, self._prometheus(ended))
+        except OSError as ex:
+            self._display.warning(f"migration_metrics: could not write the metrics: {ex}")
+            return
+        self._display.display(f"Migration metrics: timeline {timeline_path}, Prometheus textfile {textfile}")
+
+    def _role_spans(self):
+        """Return the first start, last end and duration of every role per host, in order of appearance."""
+        spans = {}
+        for event in self.timeline:
+            role = event["role"] or "(play)"
+            span = spans.setdefault((event["host"], role), {
+                "host": event["host"], "role": role, "started": event["started"], "ended": event["ended"]})
+            span["started"] = min(span["started"], event["started"])
+            span["ended"] = max(span["ended"], event["ended"])
+        for span in spans.values():
+            span["duration"] = round(span["ended"] - span["started"], 3)
+        return list(spans.values())
+
+    def _prometheus(self, ended):
+        playbook = self.playbook or "adhoc"
+        series = {}
+
+        def add(metric, help_text, labels, value):
+            entry = series.setdefault(metric, {"help": help_text, "samples": {}})
+            key = _labels(playbook=playbook, **labels)
+            entry["samples"][key] = entry["samples"].get(key, 0) + value
+
+        add("playbook_duration_seconds", "Wall time of the playbook run.", {}, ended - self.started)
+        add("last_run_timestamp_seconds", "End time of the last playbook run.", {}, ended)
+        for span in self._role_spans():
+            add("role_duration_seconds", "Wall time from the first to the last task of a role.",
+                {"cluster": span["host"], "role": span["role"]}, span["duration"])
+        for event in self.timeline:
+            labels = {"cluster": event["host"], "role": event["role"] or "(play)", "task": event["task"]}
+            add("task_duration_seconds", "Wall time of a task.", dict(labels, status=event["status"]), event["duration"])
+            for counter, (metric, help_text) in EXPORTED_COUNTERS.items():
+                if counter in event["counters"]:
+                    add(metric, help_text, labels, event["counters"][counter])
+            for wait in event["waits"]:
+                add("wait_seconds", "Time until a waited-for condition held (or the wait gave up).",
+                    dict(labels, wait=wait["name"], satisfied=str(wait["satisfied"]).lower()), wait["seconds"])
+
+        lines = []
+        for metric, entry in series.items():
+            lines.append(f"# HELP {PREFIX}_{metric} {entry['help']}")
+            lines.append(f"# TYPE {PREFIX}_{metric} gauge")
+            for labels, value in entry["samples"].items():
+                lines.append(f"{PREFIX}_{metric}{labels} {round(value, 3)}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _write(path, content):
+        """Write atomically so the textfile collector never reads a partial file."""
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as fh:
+            fh.write(content)
+        os.replace(temp_path, path)
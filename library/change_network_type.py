@@ -1,19 +1,10 @@
 #!/usr/bin/python
 
 from ansible.module_utils.basic import AnsibleModule
-import time
-import subprocess
-
-
-def run_command(command):
-    """Run a shell command and return its output or raise an error."""
-    try:
-        result = subprocess.run(
-            command, shell=True, text=True, capture_output=True, check=True
-        )
-        return result.stdout.strip(), None
-    except subprocess.CalledProcessError as err:
-        return None, Exception(f"Command '{command}' failed: {err.stderr.strip()}")
+from ansible.module_utils.metrics import attach
+from ansible.module_utils.kube_client import get_client
+from ansible.module_utils.cluster_snapshot import invalidate_snapshot
+from ansible.module_utils.polling import poll
 
 
 def main():
@@ -23,35 +14,36 @@ def main():
     )
 
     module = AnsibleModule(argument_spec=module_args)
+    attach(module)
 
     timeout = module.params["timeout"]
 
     network_type = module.params["network_type"]
 
     try:
-        # Construct the patch command
-        patch_command = (
-            f"oc patch Network.operator.openshift.io cluster --type='merge' "
-            f"--patch '{{\"spec\":{{\"migration\":{{\"networkType\":\"{network_type}\"}}}}}}'"
+        client = get_client()
+
+        # Patch the migration field of the network operator
+        patch = {"spec": {"migration": {"networkType": network_type}}}
+        _, error = client.patch("networks.operator", "cluster", patch)
+        invalidate_snapshot(client, ["network_operator", "network_config"])
+        if error:
+            module.fail_json(msg=str(error))
+
+        # Wait until the migration field is reported back
+        def migration_set(network_config):
+            migration = network_config.get("status", {}).get("migration") or {}
+            return migration.get("networkType") == network_type
+
+        _, error = poll(
+            lambda timeout: client.get("networks.config", "cluster", timeout=timeout),
+            timeout,
+            predicate=migration_set,
+            name="networks.config/cluster migration",
+            on_error=lambda error: module.warn(f"Retrying as got an error: {error}"),
         )
-
-        # Execute the command
-        run_command(patch_command)
-
-        # Wait until migration field is cleared
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            try:
-                output, error = run_command("oc get network -o yaml")
-                if not error:
-                    if network_type in output:
-                        module.exit_json(changed=True, msg=f"Migration field set to networkType:{network_type}.")
-                elif error:
-                    module.warn(f"Retrying as got an error: {error}")
-                time.sleep(3)
-
-            except Exception as ex:
-                module.fail_json(msg=str(ex))
+        if not error:
+            module.exit_json(changed=True, msg=f"Migration field set to networkType:{network_type}.")
 
         module.fail_json(msg=f"Network type could not be changed to {network_type}.")
     except Exception as ex:
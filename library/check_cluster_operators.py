@@ -1,53 +1,63 @@
 from ansible.module_utils.basic import AnsibleModule
-import subprocess
-import time
+from ansible.module_utils.metrics import attach
+from ansible.module_utils.kube_client import get_client, condition_status
+from ansible.module_utils.kube_wait import wait_for
 
 
-def run_oc_command(command):
-    """Run the `oc` command and return its output."""
-    try:
-        result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
-        return True, result.stdout.strip()
-    except subprocess.CalledProcessError as e:
-        return False, e.stderr.strip()
+DESIRED_CONDITIONS = {"Available": "True", "Progressing": "False", "Degraded": "False"}
+
+
+def summarize_operator(operator):
+    """Summarize a ClusterOperator the way `oc get co` does."""
+    versions = operator.get("status", {}).get("versions") or []
+    return {
+        "name": operator["metadata"]["name"],
+        "version": next((v.get("version") for v in versions if v.get("name") == "operator"), None),
+        "available": condition_status(operator, "Available"),
+        "progressing": condition_status(operator, "Progressing"),
+        "degraded": condition_status(operator, "Degraded"),
+    }
+
+
+def operators_settled(operators):
+    """Return True when every ClusterOperator has the desired conditions."""
+    return bool(operators) and all(
+        condition_status(operator, condition) == status
+        for operator in operators
+        for condition, status in DESIRED_CONDITIONS.items()
+    )
 
 
 def main():
     module_args = dict(
         timeout=dict(type="int", required=True),  # Total timeout in seconds
-        interval=dict(type="int", required=False, default=10)  # Interval between retries
+        interval=dict(type="int", required=False, default=10)  # Interval between retries after an API error
     )
 
     module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
+    attach(module)
 
     timeout = module.params["timeout"]
     interval = module.params["interval"]
 
-    start_time = time.time()
-
-    while time.time() - start_time < timeout:
-        available_cmd = "oc wait co --all --for='condition=AVAILABLE=True' --timeout=60s"
-        progressing_cmd = "oc wait co --all --for='condition=PROGRESSING=False' --timeout=60s"
-        degraded_cmd = "oc wait co --all --for='condition=DEGRADED=False' --timeout=60s"
-
-        available_status, available_output = run_oc_command(available_cmd)
-        progressing_status, progressing_output = run_oc_command(progressing_cmd)
-        degraded_status, degraded_output = run_oc_command(degraded_cmd)
-
-        if available_status and progressing_status and degraded_status:
-            # Print all cluster operators and their conditions
-            get_co_cmd = "oc get co -o wide"
-            _, co_output = run_oc_command(get_co_cmd)
+    try:
+        client = get_client()
+        settled, operators = wait_for(client, "clusteroperators", operators_settled, timeout,
+                                      retry_interval=interval, on_error=lambda error: module.warn(f"Retrying as got an error: {error}"))
+    except Exception as ex:
+        module.fail_json(msg=str(ex))
 
-            module.exit_json(
-                changed=False,
-                message="All ClusterOperators are in the desired state.",
-                operators=co_output
-            )
-        else:
-            time.sleep(interval)
+    if settled:
+        module.exit_json(
+            changed=False,
+            message="All ClusterOperators are in the desired state.",
+            operators=[summarize_operator(operator) for operator in operators]
+        )
 
-    module.fail_json(msg="Timeout waiting for ClusterOperators to reach the desired state.")
+    module.fail_json(
+        msg="Timeout waiting for ClusterOperators to reach the desired state.",
+        operators=[summarize_operator(operator) for operator in operators]
+    )
 
 
 if __name__ == "__main__":
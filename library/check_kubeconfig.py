@@ -1,28 +1,18 @@
 #!/usr/bin/python
 
 from ansible.module_utils.basic import AnsibleModule
-import os
+from ansible.module_utils.metrics import attach
+from ansible.module_utils.prechecks import ARGUMENT_SPECS, check_kubeconfig
 
 
 def main():
-    module = AnsibleModule(argument_spec={})
-    kubeconfig_path = os.environ.get("KUBECONFIG")
-    if not kubeconfig_path:
-        module.fail_json(
-            msg="The KUBECONFIG environment variable is not set."
-        )
+    module = AnsibleModule(argument_spec=ARGUMENT_SPECS["check_kubeconfig"])
+    attach(module)
+    result, error = check_kubeconfig(module, module.params)
+    if error:
+        module.fail_json(msg=error, **result)
 
-    if not os.path.isfile(kubeconfig_path):
-        module.fail_json(
-            msg=f"The KUBECONFIG file does not exist at the specified path: {kubeconfig_path}.",
-            kubeconfig_path=kubeconfig_path
-        )
-
-    module.exit_json(
-        changed=False,
-        msg=f"KUBECONFIG is set, and the file exists at: {kubeconfig_path}.",
-        kubeconfig_path=kubeconfig_path
-    )
+    module.exit_json(changed=False, **result)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,149 @@
+#!/usr/bin/python
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.metrics import attach
+from ansible.module_utils.kube_client import get_client, condition_status, parse_time
+import heapq
+import itertools
+import time
+
+# Container states that never resolve on their own
+WAITING_PROBLEMS = {
+    "CrashLoopBackOff", "ImagePullBackOff", "ErrImagePull", "CreateContainerConfigError", "CreateContainerError",
+    "InvalidImageName", "RunContainerError",
+}
+TERMINATED_PROBLEMS = {"Error", "OOMKilled", "ContainerCannotRun", "DeadlineExceeded"}
+
+
+def classify(pod, now, pending_grace):
+    """Return ``(problem, restarts)`` for a pod; ``problem`` is None for a healthy pod."""
+    status = pod.get("status", {})
+    phase = status.get("phase")
+    containers = status.get("initContainerStatuses", []) + status.get("containerStatuses", [])
+    restarts = sum(container.get("restartCount", 0) for container in containers)
+
+    if phase == "Succeeded":
+        return None, restarts
+    if phase == "Failed":
+        return status.get("reason") or "Failed", restarts
+    if phase not in ("Pending", "Running"):
+        return phase or "Unknown", restarts
+
+    for container in containers:
+        state = container.get("state", {})
+        waiting = state.get("waiting", {}).get("reason")
+        if waiting in WAITING_PROBLEMS:
+            return waiting, restarts
+        terminated = state.get("terminated", {})
+        if terminated.get("reason") in TERMINATED_PROBLEMS and terminated.get("exitCode", 1) != 0:
+            return terminated["reason"], restarts
+
+    created = parse_time(pod["metadata"].get("creationTimestamp"))
+    if created is not None and now - created < pending_grace:
+        return None, restarts
+    if phase == "Pending":
+        return "Pending", restarts
+    if condition_status(pod, "Ready") == "False":
+        return "NotReady", restarts
+    return None, restarts
+
+
+class PodHealthScan:
+    """Classify pods page by page, keeping only per-namespace counters and the top offenders."""
+
+    def __init__(self, top, pending_grace):
+        self.top = top
+        self.pending_grace = pending_grace
+        self.now = time.time()
+        self.pods = 0
+        self.phases = {}
+        self.namespaces = {}
+        self.offenders = []  # min-heap of (restarts, sequence, pod), so the least restarted pod is dropped first
+        self.sequence = itertools.count()
+
+    def add(self, pods):
+        for pod in pods:
+            self.pods += 1
+            phase = pod.get("status", {}).get("phase", "Unknown")
+            self.phases[phase] = self.phases.get(phase, 0) + 1
+            problem, restarts = classify(pod, self.now, self.pending_grace)
+            namespace = pod["metadata"].get("namespace")
+            summary = self.namespaces.setdefault(namespace, {"pods": 0, "unhealthy": 0, "restarts": 0, "problems": {}})
+            summary["pods"] += 1
+            summary["restarts"] += restarts
+            if not problem:
+                continue
+            summary["unhealthy"] += 1
+            summary["problems"][problem] = summary["problems"].get(problem, 0) + 1
+            if self.top:
+                entry = (restarts, next(self.sequence), {
+                    "namespace": namespace,
+                    "name": pod["metadata"]["name"],
+                    "node": pod.get("spec", {}).get("nodeName"),
+                    "problem": problem,
+                    "restarts": restarts,
+                })
+                if len(self.offenders) < self.top:
+                    heapq.heappush(self.offenders, entry)
+                else:
+                    heapq.heappushpop(self.offenders, entry)
+
+    def result(self):
+        unhealthy = {name: summary for name, summary in sorted(self.namespaces.items()) if summary["unhealthy"]}
+        return {
+            "pods": self.pods,
+            "phases": self.phases,
+            "namespaces_scanned": len(self.namespaces),
+            "unhealthy_pods": sum(summary["unhealthy"] for summary in unhealthy.values()),
+            "namespaces": unhealthy,
+            "top_offenders": [entry[2] for entry in sorted(self.offenders, key=lambda entry: (-entry[0], entry[1]))],
+        }
+
+
+def scan_pods(module, namespace, label_selector, page_size, top, pending_grace, retries, delay):
+    """Stream every pod page by page and return the compact health summary."""
+    client = get_client()
+    scan = PodHealthScan(top, pending_grace)
+    for page in client.list_pages("pods", namespace=namespace, label_selector=label_selector, limit=page_size,
+                                  retries=retries, delay=delay):
+        scan.add(page)
+    return scan.result()
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            namespace=dict(type="str", required=False),  # All namespaces unless set
+            label_selector=dict(type="str", required=False),
+            page_size=dict(type="int", default=500),  # Pods fetched per request
+            top=dict(type="int", default=20),  # Unhealthy pods with the most restarts to report
+            pending_grace=dict(type="int", default=300),  # Seconds a new pod may be pending or not ready
+            fail_on_unhealthy=dict(type="bool", default=False),
+            retries=dict(type="int", default=3),
+            delay=dict(type="int", default=5),
+        ),
+        supports_check_mode=True,
+    )
+    attach(module)
+
+    try:
+        result = scan_pods(module, module.params["namespace"], module.params["label_selector"],
+                           module.params["page_size"], module.params["top"], module.params["pending_grace"],
+                           module.params["retries"], module.params["delay"])
+    except Exception as ex:
+        module.fail_json(msg=str(ex))
+
+    if result["unhealthy_pods"]:
+        worst = sorted(result["namespaces"].items(), key=lambda item: -item[1]["unhealthy"])
+        msg = (f"{result['unhealthy_pods']} of {result['pods']} pods are unhealthy in {len(worst)} namespaces: "
+               + ", ".join(f"{name} ({summary['unhealthy']})" for name, summary in worst[:10])
+               + (f" and {len(worst) - 10} more." if len(worst) > 10 else "."))
+        if module.params["fail_on_unhealthy"]:
+            module.fail_json(msg=msg, **result)
+    else:
+        msg = f"All {result['pods']} pods are healthy."
+    module.exit_json(changed=False, msg=msg, **result)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,10 @@
 #!/usr/bin/python
 
 from ansible.module_utils.basic import AnsibleModule
-import time
-import subprocess
-
-
-def run_command(command):
-    """Run a shell command and return its output or raise an error."""
-    try:
-        result = subprocess.run(
-            command, shell=True, text=True, capture_output=True, check=True
-        )
-        return result.stdout.strip(), None
-    except subprocess.CalledProcessError as err:
-        return None, Exception(f"Command '{command}' failed: {err.stderr.strip()}")
+from ansible.module_utils.metrics import attach
+from ansible.module_utils.kube_client import get_client
+from ansible.module_utils.cluster_snapshot import invalidate_snapshot
+from ansible.module_utils.polling import poll
 
 
 def main():
@@ -22,34 +13,35 @@ def main():
     )
 
     module = AnsibleModule(argument_spec=module_args)
+    attach(module)
     timeout = module.params["timeout"]
 
     try:
+        client = get_client()
+
         # Patch the network operator
-        patch_command = (
-            "oc patch Network.operator.openshift.io cluster --type='merge' "
-            "--patch '{\"spec\":{\"migration\":null}}'"
-        )
+        patch = {"spec": {"migration": None}}
+
+        def patch_and_get(timeout):
+            _, error = client.patch("networks.operator", "cluster", patch, timeout=timeout)
+            invalidate_snapshot(client, ["network_operator", "network_config"])
+            if error:
+                return None, error
+            return client.get("networks.config", "cluster", timeout=timeout)
+
+        def migration_cleared(network_config):
+            return not network_config.get("spec", {}).get("migration") and not network_config.get("status", {}).get("migration")
 
         # Wait until migration field is cleared
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            try:
-                output, error = run_command(patch_command)
-                if error:
-                    module.warn(f"Retrying as got an error: {error}")
-                    time.sleep(3)
-                    continue
-
-                output, error = run_command("oc get network -o yaml")
-                if not error:
-                    if "migration" not in output:
-                        module.exit_json(changed=True, msg="Migration field cleared.")
-                elif error:
-                    module.warn(f"Retrying as got an error: {error}")
-                    time.sleep(3)
-            except Exception as ex:
-                module.fail_json(msg=str(ex))
+        _, error = poll(
+            patch_and_get,
+            timeout,
+            predicate=migration_cleared,
+            name="networks.operator/cluster migration cleared",
+            on_error=lambda error: module.warn(f"Retrying as got an error: {error}"),
+        )
+        if not error:
+            module.exit_json(changed=True, msg="Migration field cleared.")
 
         module.fail_json(msg="Timeout waiting for migration field to be cleared.")
     except Exception as ex:
@@ -0,0 +1,57 @@
+#!/usr/bin/python
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.metrics import attach
+from ansible.module_utils.kube_client import get_client
+from ansible.module_utils.cluster_snapshot import (
+    SNAPSHOT_RESOURCES, load_snapshot, state_path, take_snapshot,
+)
+import time
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            resources=dict(type="list", elements="str", choices=list(SNAPSHOT_RESOURCES),
+                           default=list(SNAPSHOT_RESOURCES)),
+            max_age=dict(type="int", default=0),  # Reuse entries younger than this many seconds
+        ),
+        supports_check_mode=True,
+    )
+    attach(module)
+
+    resources = module.params["resources"]
+    max_age = module.params["max_age"]
+
+    try:
+        client = get_client()
+        existing = (load_snapshot(client) or {}).get("resources", {})
+        now = time.time()
+        stale = [key for key in resources if key not in existing or now - existing[key]["taken_at"] > max_age]
+
+        errors = {}
+        snapshot = {"resources": existing}
+        if stale and not module.check_mode:
+            snapshot, errors = take_snapshot(client, stale)
+    except Exception as ex:
+        module.fail_json(msg=str(ex))
+
+    entries = snapshot["resources"]
+    facts = {
+        "path": state_path(client, "snapshot.json"),
+        "taken_at": {key: entries[key]["taken_at"] for key in resources if key in entries},
+        "node_count": len(entries["nodes"]["object"]) if "nodes" in entries else None,
+    }
+    if errors:
+        module.fail_json(msg=f"Failed to snapshot {', '.join(errors)}.", errors=errors,
+                         ansible_facts={"cluster_snapshot": facts})
+    module.exit_json(
+        changed=False,
+        msg=f"Snapshot refreshed for {', '.join(stale)}." if stale else "Snapshot is up to date.",
+        refreshed=stale,
+        ansible_facts={"cluster_snapshot": facts},
+    )
+
+
+if __name__ == "__main__":
+    main()
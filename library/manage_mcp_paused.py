@@ -0,0 +1,49 @@
+#!/usr/bin/python
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.metrics import attach
+from ansible.module_utils.kube_client import get_client
+from ansible.module_utils.machine_config import set_pools_paused
+
+
+def main():
+    module_args = dict(
+        paused=dict(type="bool", required=True),
+        pools=dict(type="list", elements="str", required=False),  # Pool names; every pool when omitted
+        label_selector=dict(type="str", required=False),  # Only the pools with these labels
+        timeout=dict(type="int", default=300),
+        sleep_interval=dict(type="int", default=10),
+    )
+
+    module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
+    attach(module)
+
+    paused = module.params["paused"]
+    paused_value = "true" if paused else "false"
+
+    try:
+        result, error = set_pools_paused(
+            get_client(), paused, names=module.params["pools"], label_selector=module.params["label_selector"],
+            timeout=module.params["timeout"], interval=module.params["sleep_interval"],
+            on_error=lambda error: module.warn(f"Retrying as got an error: {error}"), check_mode=module.check_mode,
+        )
+    except Exception as ex:
+        module.fail_json(msg=str(ex))
+    if result is None:
+        module.fail_json(msg=str(error))
+    if module.check_mode:
+        module.exit_json(changed=bool(result["pending"]), unchanged=result["unchanged"], pending=result["pending"],
+                         msg=f"Check mode: would patch {', '.join(result['pending']) or 'no pool'} "
+                             f"with paused={paused_value}.")
+    if error:
+        module.fail_json(msg=f"Failed to patch {', '.join(result['pending'])} with paused={paused_value}: {error}",
+                         **result)
+
+    msg = f"Successfully patched {', '.join(result['patched']) or 'no pool'} with paused={paused_value}."
+    if result["unchanged"]:
+        msg += f" Already paused={paused_value}: {', '.join(result['unchanged'])}."
+    module.exit_json(changed=bool(result["patched"]), msg=msg, **result)
+
+
+if __name__ == "__main__":
+    main()
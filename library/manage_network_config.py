@@ -1,51 +1,46 @@
 from ansible.module_utils.basic import AnsibleModule
-import time
-import subprocess
-
-
-def run_command(command):
-    """Run a shell command and return its output or raise an error."""
-    try:
-        result = subprocess.run(
-            command, shell=True, text=True, capture_output=True, check=True
-        )
-        return result.stdout.strip(), None
-    except subprocess.CalledProcessError as err:
-        return None, Exception(f"Command '{command}' failed: {err.stderr.strip()}")
+from ansible.module_utils.metrics import attach
+from ansible.module_utils.kube_client import get_client
+from ansible.module_utils.cluster_snapshot import invalidate_snapshot
+from ansible.module_utils.polling import poll
 
 
 def patch_network_operator(module, timeout, network_provider_config):
     """Patch the Network operator configuration."""
-    # command = f"oc patch Network.operator.openshift.io cluster --type='merge' --patch='{"spec": {"defaultNetwork": {network_provider_config}: null } }'"
-    command = f"oc patch Network.operator.openshift.io cluster --type='merge' --patch '{{\"spec\":{{\"defaultNetwork\":{{\"{network_provider_config}\":null}}}}}}'"
-
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        try:
-            output, error = run_command(command)
-            if error:
-                module.warn(f"Retrying as got an error: {error}")
-                time.sleep(3)
-            if not error:
-                return output
-        except Exception as ex:
-            module.fail_json(msg=str(ex))
+    client = get_client()
+    patch = {"spec": {"defaultNetwork": {network_provider_config: None}}}
+
+    output, error = poll(
+        lambda timeout: client.patch("networks.operator", "cluster", patch, timeout=timeout),
+        timeout,
+        name="networks.operator/cluster patch",
+        on_error=lambda error: module.warn(f"Retrying as got an error: {error}"),
+    )
+    invalidate_snapshot(client, ["network_operator", "network_config"])
+    if error:
+        raise error
+    return output
 
 
 def delete_namespace(module, timeout, namespace):
     """Delete a specified namespace."""
-    command = f"oc delete namespace {namespace}"
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        try:
-            output, error = run_command(command)
-            if error:
-                module.warn(f"Retrying as got an error: {error}")
-                time.sleep(3)
-            if not error:
-                return output
-        except Exception as ex:
-            module.fail_json(msg=str(ex))
+    client = get_client()
+
+    def delete(timeout):
+        output, error = client.delete("namespaces", namespace, timeout=timeout)
+        if error and error.status == 404:
+            return None, None
+        return output, error
+
+    output, error = poll(
+        delete,
+        timeout,
+        name="namespace delete",
+        on_error=lambda error: module.warn(f"Retrying as got an error: {error}"),
+    )
+    if error:
+        raise error
+    return output
 
 
 def main():
@@ -57,6 +52,7 @@ def main():
         },
         supports_check_mode=True,
     )
+    attach(module)
 
     network_provider_config = module.params["network_provider_config"]
     namespace = module.params.get("namespace")
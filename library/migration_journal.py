@@ -0,0 +1,87 @@
+#!/usr/bin/python
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.metrics import attach
+from ansible.module_utils.kube_client import get_client
+from ansible.module_utils.journal import (
+    JOURNAL_NAMESPACE, completed_phases, configmap_name, forget_phases, load_journal, new_journal, record_phase,
+    save_journal,
+)
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec={
+            "journal": {"type": "str", "default": "migration"},  # migration or rollback
+            "action": {"type": "str", "choices": ["status", "complete", "reset"], "default": "status"},
+            "phase": {"type": "str", "required": False},
+            # Objects whose generation must stay unchanged for the phase to count as done, as resource[/name]
+            "observe": {"type": "list", "elements": "str", "default": []},
+            # Objects whose resourceVersion and generation are only recorded, as resource[/name]
+            "record": {"type": "list", "elements": "str", "default": []},
+            # Field values the phase leaves behind: [{resource, name, field, value}]
+            "expect": {"type": "list", "elements": "dict", "default": []},
+            "target_network_type": {"type": "str", "required": False},
+            "namespace": {"type": "str", "default": JOURNAL_NAMESPACE},
+        },
+        required_if=[("action", "complete", ["phase"])],
+        supports_check_mode=True,
+    )
+    attach(module)
+
+    name = module.params["journal"]
+    action = module.params["action"]
+    target = module.params["target_network_type"]
+    namespace = module.params["namespace"]
+
+    try:
+        client = get_client()
+        journal = load_journal(client, name, namespace, warn=module.warn)
+
+        if action == "reset" or (target and journal.get("target") not in (None, target)):
+            # A journal for another target network type belongs to a different migration
+            journal = new_journal(name, target)
+            if not module.check_mode:
+                save_journal(client, journal, namespace, warn=module.warn)
+            if action == "reset":
+                module.exit_json(changed=True, msg=f"The {name} journal was reset.", completed_phases=[])
+
+        if target and journal.get("target") != target:
+            journal["target"] = target
+            if not module.check_mode:
+                save_journal(client, journal, namespace, warn=module.warn)
+
+        if action == "complete":
+            for expected in module.params["expect"]:
+                missing = {"resource", "name", "field", "value"} - set(expected)
+                if missing:
+                    module.fail_json(msg=f"expect entries need {', '.join(sorted(missing))}: {expected}")
+            if not module.check_mode:
+                record_phase(client, journal, module.params["phase"], module.params["observe"],
+                             module.params["expect"], record_refs=module.params["record"])
+                save_journal(client, journal, namespace, warn=module.warn)
+            module.exit_json(changed=True, msg=f"Recorded phase {module.params['phase']} as complete.",
+                             completed_phases=journal["order"])
+
+        phases, invalid = completed_phases(client, journal)
+        msg = f"Completed {name} phases: {', '.join(phases)}." if phases else f"No completed {name} phases."
+        if invalid:
+            msg += f" Phase {invalid['phase']} runs again: {invalid['reason']}"
+            # Everything from the invalid phase on has to run again, in order
+            forget_phases(journal, [invalid["phase"]])
+            if not module.check_mode:
+                save_journal(client, journal, namespace, warn=module.warn)
+        module.exit_json(
+            changed=False,
+            msg=msg,
+            completed_phases=phases,
+            invalid_phase=invalid,
+            configmap=f"{namespace}/{configmap_name(name)}",
+            target_network_type=journal.get("target"),
+        )
+    except Exception as ex:
+        module.fail_json(msg=str(ex))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,6 @@
 from ansible.module_utils.basic import AnsibleModule
-import subprocess
-import time
-
-
-def run_command_with_retries(command, retries=3, delay=3):
-    """Execute a shell command with retries on failure."""
-    for attempt in range(retries):
-        try:
-            result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
-            return result.stdout.strip(), None
-        except subprocess.CalledProcessError as e:
-            if attempt < retries - 1:
-                time.sleep(delay)
-            else:
-                return None, f"Command failed after {retries} attempts: {e.stderr.strip()}"
-    return None, "Unknown error"
+from ansible.module_utils.metrics import attach
+from ansible.module_utils.kube_client import get_client
 
 
 def main():
@@ -24,22 +10,22 @@ def main():
     )
 
     module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
+    attach(module)
 
     pool_name = module.params["pool_name"]
     paused = module.params["paused"]
 
-    # Build the patch command
     paused_value = "true" if paused else "false"
-    patch_command = (
-        f"oc patch MachineConfigPool {pool_name} --type='merge' "
-        f"--patch '{{\"spec\":{{\"paused\":{paused_value}}}}}'"
-    )
 
-    # Execute the command
     if module.check_mode:
         module.exit_json(changed=True, msg=f"Check mode: would patch {pool_name} with paused={paused_value}.")
 
-    _, error = run_command_with_retries(patch_command)
+    try:
+        client = get_client()
+    except Exception as ex:
+        module.fail_json(msg=str(ex))
+
+    _, error = client.patch("machineconfigpools", pool_name, {"spec": {"paused": paused}}, retries=3, delay=3)
     if error:
         module.fail_json(msg=f"Failed to patch {pool_name}: {error}")
 
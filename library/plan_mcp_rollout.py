@@ -0,0 +1,148 @@
+#!/usr/bin/python
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.metrics import attach
+from ansible.module_utils.kube_client import get_client, label_selector
+from ansible.module_utils.kube_wait import wait_for
+from ansible.module_utils.machine_config import config_changes, has_changes, render_current, rendered_configs
+from ansible.module_utils.polling import poll
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+
+def owned_by_pool(machine_config):
+    return any(owner.get("kind") == "MachineConfigPool"
+               for owner in machine_config["metadata"].get("ownerReferences") or [])
+
+
+class RenderState:
+    """The pools with their source and rendered MachineConfigs, read again on every ``refresh``.
+
+    Rendered MachineConfigs are named after a hash of their content and never
+    change, so each one is read once.
+    """
+
+    def __init__(self, module):
+        self.module = module
+        self.client = get_client()
+        self.pools = []
+        self.sources = {}  # pool name -> MachineConfigs its selector selects
+        self.configs = {}  # rendered name -> MachineConfig
+        self.current = {}  # pool name -> render_current()
+
+    def list_sources(self, selector):
+        items, error = self.client.list("machineconfigs", label_selector=selector, retries=3, delay=5)
+        if error:
+            raise error
+        return [item for item in items if not owned_by_pool(item)]
+
+    def get_config(self, name):
+        machine_config, error = self.client.get("machineconfigs", name, retries=3, delay=5)
+        if error:
+            self.module.warn(f"Could not read the rendered config {name}: {error}")
+        return machine_config
+
+    def refresh(self, timeout):
+        """Read the pools, their sources and their rendered configs; return ``(pools, error)``."""
+        pools, error = self.client.list("machineconfigpools", timeout=timeout)
+        if error:
+            return None, error
+        selectors = {}
+        for pool in pools:
+            selector = pool.get("spec", {}).get("machineConfigSelector")
+            selectors[pool["metadata"]["name"]] = None if selector is None else label_selector(selector)
+        unique = sorted(set(selector for selector in selectors.values() if selector is not None))
+        names = sorted({name for pool in pools for name in rendered_configs(pool) if name} - set(self.configs))
+        try:
+            with ThreadPoolExecutor(max_workers=min(len(unique) + len(names), 10) or 1) as executor:
+                listed = dict(zip(unique, executor.map(self.list_sources, unique)))
+                self.configs.update(zip(names, executor.map(self.get_config, names)))
+        except Exception as ex:
+            return None, ex
+        for name in names:
+            if self.configs[name] is None:
+                del self.configs[name]  # Read again on the next refresh
+        self.pools = pools
+        self.sources = {name: listed[selector] if selector is not None else []
+                        for name, selector in selectors.items()}
+        self.current = {pool["metadata"]["name"]: render_current(
+            pool, self.sources[pool["metadata"]["name"]], self.configs.get(rendered_configs(pool)[1]))
+            for pool in pools}
+        return pools, None
+
+
+def wait_for_render(module, state, timeout):
+    """Wait until the MCO rendered a new config for a first pool, then until every pool's render is current.
+
+    Returns False when no pool got a new config within ``timeout``; pools
+    whose render is still not current at the deadline stay in
+    ``state.current`` as False.
+    """
+    deadline = time.time() + timeout
+    rendered, _ = wait_for(state.client, "machineconfigpools",
+                           lambda pools: any(len(set(rendered_configs(pool))) > 1 for pool in pools), timeout,
+                           on_error=lambda error: module.warn(f"Retrying as got an error: {error}"))
+    if not rendered:
+        return False
+    _, error = poll(state.refresh, max(deadline - time.time(), 1), lambda pools: all(state.current.values()),
+                    interval=5, max_interval=15,
+                    on_error=lambda error: module.warn(f"Retrying as got an error: {error}"),
+                    name="machineconfigpools rendered")
+    if not state.pools:
+        raise error
+    return True
+
+
+def plan_pools(state):
+    """Return ``{pool: plan}``; a pool changes when its render is not confirmed or its new config differs."""
+    plan = {}
+    for pool in state.pools:
+        name = pool["metadata"]["name"]
+        current, target = rendered_configs(pool)
+        entry = {
+            "current": current,
+            "target": target,
+            "rendered": state.current.get(name, False),
+            "machineCount": pool.get("status", {}).get("machineCount", 0),
+        }
+        if current != target and state.configs.get(current) and state.configs.get(target):
+            changes = config_changes(state.configs[current], state.configs[target])
+            entry.update(changes)
+            entry["changes"] = not entry["rendered"] or has_changes(changes)
+        else:
+            # Without both configs there is nothing to diff; only a confirmed, unmoved render is unchanged
+            entry["changes"] = not entry["rendered"] or current != target
+        plan[name] = entry
+    return plan
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            timeout=dict(type="int", required=False, default=300),  # Seconds to wait for the MCO to render
+        ),
+        supports_check_mode=True,
+    )
+    attach(module)
+
+    try:
+        state = RenderState(module)
+        if not wait_for_render(module, state, module.params["timeout"]):
+            module.fail_json(msg="Timeout waiting for the MCO to render a new config for any MachineConfigPool.")
+        plan = plan_pools(state)
+    except Exception as ex:
+        module.fail_json(msg=str(ex))
+
+    changing = sorted(name for name, entry in plan.items() if entry["changes"])
+    unchanged = sorted(name for name, entry in plan.items() if not entry["changes"])
+    pending = sorted(name for name, entry in plan.items() if not entry["rendered"])
+    if pending:
+        module.warn(f"The MCO did not finish rendering {', '.join(pending)} in time; they are waited on and rebooted.")
+    msg = f"{len(changing)} of {len(plan)} MachineConfigPools roll out a new rendered config: {', '.join(changing)}."
+    if unchanged:
+        msg += f" Unchanged, not waited on or rebooted: {', '.join(unchanged)}."
+    module.exit_json(changed=False, msg=msg, pools=plan, changing=changing, unchanged=unchanged)
+
+
+if __name__ == "__main__":
+    main()
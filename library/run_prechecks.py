@@ -0,0 +1,20 @@
+#!/usr/bin/python
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.metrics import attach
+from ansible.module_utils.prechecks import ARGUMENT_SPECS, run_prechecks
+
+
+def main():
+    module = AnsibleModule(argument_spec=ARGUMENT_SPECS["run_prechecks"], supports_check_mode=True)
+    attach(module)
+
+    # Every check runs concurrently and reports its own outcome, so all failures are reported at once
+    result, error = run_prechecks(module, module.params)
+    if error:
+        module.fail_json(msg=error, **result)
+    module.exit_json(changed=False, **result)
+
+
+if __name__ == "__main__":
+    main()
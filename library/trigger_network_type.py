@@ -1,22 +1,9 @@
 #!/usr/bin/python
 
 from ansible.module_utils.basic import AnsibleModule
-import subprocess
-import time
-
-
-def run_command_with_retries(command, retries=3, delay=3):
-    """Execute a shell command with retries on failure."""
-    for attempt in range(retries):
-        try:
-            result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
-            return result.stdout.strip(), None
-        except subprocess.CalledProcessError as e:
-            if attempt < retries - 1:
-                time.sleep(delay)
-            else:
-                return None, f"Command failed after {retries} attempts: {e.stderr.strip()}"
-    return None, "Unknown error"
+from ansible.module_utils.metrics import attach
+from ansible.module_utils.kube_client import get_client
+from ansible.module_utils.cluster_snapshot import invalidate_snapshot
 
 
 def main():
@@ -26,14 +13,18 @@ def main():
     )
 
     module = AnsibleModule(argument_spec=module_args)
+    attach(module)
 
     network_type = module.params["network_type"]
 
     try:
-        patch_command = f'oc patch Network.config.openshift.io cluster --type=merge --patch "{{\\"spec\\":{{\\"networkType\\":\\"{network_type}\\"}}}}"'
-        result, error = run_command_with_retries(patch_command)
-        if not error:
-            module.exit_json(changed=True, msg=f"Successfully triggered {network_type} deployment.", output=result)
+        client = get_client()
+        patch = {"spec": {"networkType": network_type}}
+        result, error = client.patch("networks.config", "cluster", patch, retries=3, delay=3)
+        invalidate_snapshot(client, ["network_config"])
+        if error:
+            module.fail_json(msg=f"Failed to trigger {network_type} deployment: {error}")
+        module.exit_json(changed=True, msg=f"Successfully triggered {network_type} deployment.")
     except Exception as e:
         module.fail_json(msg=str(e))
 
@@ -1,35 +1,116 @@
 #!/usr/bin/python
 
 from ansible.module_utils.basic import AnsibleModule
-import subprocess
+from ansible.module_utils import metrics
+from ansible.module_utils.metrics import attach
+from ansible.module_utils.kube_client import get_client, get_condition, parse_time
+import re
 import time
 
 
-def run_command(command):
-    """Run a shell command and return its output or raise an error."""
-    try:
-        result = subprocess.run(
-            command, shell=True, text=True, capture_output=True, check=True
-        )
-        return result.stdout.strip(), None
-    except subprocess.CalledProcessError as err:
-        return None, Exception(f"Command '{command}' failed: {err.stderr.strip()}")
-
-
-def check_cluster_operators(checks):
-    """Check the status of cluster operators."""
-    '''
-    checks = [
-        "oc wait co --all --for='condition=Available=True' --timeout=60s",
-        "oc wait co --all --for='condition=Progressing=False' --timeout=60s",
-        "oc wait co --all --for='condition=Degraded=False' --timeout=60s",
-    ]
-    '''
-    for check in checks:
-        output, error = run_command(check)
+RESOURCE_ALIASES = {
+    "co": "clusteroperators",
+    "clusteroperator": "clusteroperators",
+    "clusteroperators": "clusteroperators",
+    "mcp": "machineconfigpools",
+    "machineconfigpool": "machineconfigpools",
+    "machineconfigpools": "machineconfigpools",
+    "node": "nodes",
+    "nodes": "nodes",
+}
+
+CHECK_PATTERN = re.compile(
+    r"oc\s+wait\s+(?P<resource>\S+)\s+(?:--all|(?P<name>[^\s-]\S*))\s.*?"
+    r"--for[= ]['\"]?condition=(?P<condition>[^=\s'\"]+)(?:=(?P<status>[^\s'\"]+))?"
+)
+
+
+def parse_check(check):
+    """Turn an `oc wait ... --for=condition=X=Y` check into (resource, name, condition, status)."""
+    match = CHECK_PATTERN.search(check)
+    if not match or match.group("resource").lower() not in RESOURCE_ALIASES:
+        raise ValueError(f"Unsupported check: {check}")
+    return (
+        RESOURCE_ALIASES[match.group("resource").lower()],
+        match.group("name"),
+        match.group("condition"),
+        match.group("status") or "True",
+    )
+
+
+def fetch_objects(client, checks):
+    """Fetch every object the checks look at: one list per resource, or one get per named object.
+
+    Returns ``({resource: [objects]}, error)``.
+    """
+    names = {}
+    for resource, name, _, _ in checks:
+        names.setdefault(resource, set()).add(name)
+    objects = {}
+    for resource, wanted in names.items():
+        if None in wanted:
+            items, error = client.list(resource)
+        else:
+            items, error = [], None
+            for name in sorted(wanted):
+                obj, error = client.get(resource, name)
+                if error:
+                    break
+                items.append(obj)
         if error:
-            return False, error
-    return True, "Cluster operators meet required conditions."
+            return None, error
+        objects[resource] = items
+    return objects, None
+
+
+def build_matrix(objects, checks, now):
+    """Evaluate every check on every object in one pass; return one row per object, blocking ones first.
+
+    A row lists the checked conditions, the checks it fails and, from the
+    lastTransitionTime of those conditions, for how long it has been blocking.
+    A row that passes every check has ``stable_for``, the seconds since the
+    latest transition of its checked conditions (None when one has no time).
+    """
+    rows = []
+    for resource, items in objects.items():
+        for obj in items:
+            name = obj["metadata"]["name"]
+            row = {"resource": resource, "name": name, "conditions": {}, "blocking": []}
+            since, transitions = None, []
+            for check_resource, check_name, condition_type, status in checks:
+                if check_resource != resource or check_name not in (None, name):
+                    continue
+                condition = get_condition(obj, condition_type) or {}
+                row["conditions"][condition.get("type", condition_type)] = condition.get("status")
+                transitions.append(parse_time(condition.get("lastTransitionTime")))
+                if condition.get("status") == status:
+                    continue
+                row["blocking"].append(f"{condition.get('type', condition_type)}={condition.get('status')}")
+                if condition.get("message") and "message" not in row:
+                    row["message"] = condition["message"][:300]
+                changed = parse_time(condition.get("lastTransitionTime"))
+                if changed and (since is None or changed < since):
+                    since = changed
+            if row["conditions"]:
+                row["blocking_for"] = round(now - since) if row["blocking"] and since else None
+                row["stable_for"] = None
+                if not row["blocking"] and None not in transitions:
+                    row["stable_for"] = round(now - max(transitions))
+                rows.append(row)
+    rows.sort(key=lambda row: (not row["blocking"], -(row["blocking_for"] or 0), row["resource"], row["name"]))
+    return rows
+
+
+def describe_blocking(rows, limit=10):
+    blocking = [row for row in rows if row["blocking"]]
+    described = [
+        f"{row['resource']}/{row['name']} ({', '.join(row['blocking'])}"
+        + (f" for {row['blocking_for']}s)" if row["blocking_for"] is not None else ")")
+        for row in blocking[:limit]
+    ]
+    if len(blocking) > limit:
+        described.append(f"and {len(blocking) - limit} more")
+    return "; ".join(described)
 
 
 def main():
@@ -38,30 +119,88 @@ def main():
             max_timeout=dict(type="int", required=False, default=2700),
             pause_between_checks=dict(type="int", required=False, default=30),
             required_success_count=dict(type="int", required=False, default=3),
+            # Pass once every object held the desired conditions this many seconds, judged from their
+            # lastTransitionTime, instead of after required_success_count passes pause_between_checks apart
+            stability_window=dict(type="int", required=False, default=0),
             checks=dict(type="list", required=True)
         )
     )
+    attach(module)
 
     max_timeout = module.params["max_timeout"]
     pause_between_checks = module.params["pause_between_checks"]
     required_success_count = module.params["required_success_count"]
-    checks = module.params["checks"]
+    stability_window = module.params["stability_window"]
+
+    try:
+        checks = [parse_check(check) for check in module.params["checks"]]
+        client = get_client()
+    except Exception as ex:
+        module.fail_json(msg=str(ex))
 
     start_time = time.time()
     success_count = 0
+    iterations = 0
+    matrix = []
+    waited_on = {}  # "resource/name" -> seconds this run spent waiting on it
+    first_stable = {}  # "resource/name" -> when this run first saw it pass, for conditions without a transition time
+    previous = None
 
     while time.time() - start_time < max_timeout:
-        success, message = check_cluster_operators(checks)
-        if success:
+        iterations += 1
+        metrics.count("poll_iterations")
+        objects, error = fetch_objects(client, checks)
+        if error:
+            module.warn(f"Retrying as got an error: {error}")
+            success_count = 0
+            metrics.sleep(10)
+            continue
+
+        now = time.time()
+        matrix = build_matrix(objects, checks, now)
+        blocking = [row for row in matrix if row["blocking"]]
+        for row in matrix:
+            key = f"{row['resource']}/{row['name']}"
+            if row["blocking"]:
+                waited_on[key] = round(waited_on.get(key, 0) + (now - previous if previous else 0), 1)
+                first_stable.pop(key, None)
+            elif row["stable_for"] is None:
+                row["stable_for"] = round(now - first_stable.setdefault(key, now))
+        previous = now
+
+        if not blocking and stability_window:
+            settling = [row for row in matrix if row["stable_for"] < stability_window]
+            if not settling:
+                metrics.record_wait("clusteroperators stable", start_time, True, iterations)
+                module.exit_json(changed=True,
+                                 msg=f"Every checked object has held the desired conditions for {stability_window}s.",
+                                 matrix=matrix, blocking=[], waited_on=waited_on, iterations=iterations)
+            # Look again when the least settled object completes the window; a flap in between moves its
+            # lastTransitionTime, so it is not missed
+            wait = stability_window - min(row["stable_for"] for row in settling)
+            metrics.sleep(min(max(wait, 1), max(max_timeout - (time.time() - start_time), 0)))
+        elif not blocking:
             success_count += 1
             if success_count >= required_success_count:
-                module.exit_json(changed=True, msg="All checks passed successfully 3 times in a row.")
-            time.sleep(pause_between_checks)
+                metrics.record_wait("clusteroperators stable", start_time, True, iterations)
+                module.exit_json(changed=True,
+                                 msg=f"All checks passed successfully {required_success_count} times in a row.",
+                                 matrix=matrix, blocking=[], waited_on=waited_on, iterations=iterations)
+            metrics.sleep(pause_between_checks)
         else:
             success_count = 0  # Reset success count on failure
-            time.sleep(10)
+            metrics.sleep(10)
 
-    module.fail_json(msg="Timeout reached before cluster operators met the required conditions.")
+    metrics.record_wait("clusteroperators stable", start_time, False, iterations)
+    blocking = [f"{row['resource']}/{row['name']}" for row in matrix if row["blocking"]]
+    settling = [f"{row['resource']}/{row['name']} (stable for {row['stable_for']}s)" for row in matrix
+                if not row["blocking"] and stability_window and row["stable_for"] < stability_window]
+    module.fail_json(
+        msg="Timeout reached before cluster operators met the required conditions."
+            + (f" Still blocking: {describe_blocking(matrix)}." if blocking else "")
+            + (f" Not yet stable for {stability_window}s: {', '.join(settling[:10])}." if settling else ""),
+        matrix=matrix, blocking=blocking, waited_on=waited_on, iterations=iterations,
+    )
 
 
 if __name__ == "__main__":
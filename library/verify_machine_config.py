@@ -1,55 +1,77 @@
 #!/usr/bin/python
 
 from ansible.module_utils.basic import AnsibleModule
-import re
+from ansible.module_utils.metrics import attach
+from ansible.module_utils.kube_client import get_client
+from ansible.module_utils.polling import poll
+from concurrent.futures import ThreadPoolExecutor
 import time
-import subprocess
 
 
-def run_command(command):
-    """Run a shell command and return its output or raise an error."""
-    try:
-        result = subprocess.run(
-            command, shell=True, text=True, capture_output=True, check=True
-        )
-        return result.stdout.strip(), None
-    except subprocess.CalledProcessError as err:
-        return None, Exception(f"Command '{command}' failed: {err.stderr.strip()}")
-
-
-def get_machine_config_status(timeout):
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        output, error = run_command("oc describe node | egrep 'hostname|machineconfig'")
-        if not error:
-            nodes = re.findall(
-                r"kubernetes\.io/hostname=(?P<hostname>.+)\n.*currentConfig: (?P<currentConfig>.+)\n.*desiredConfig: (?P<desiredConfig>.+)\n.*state: (?P<state>.+)",
-                output,
-                re.MULTILINE,
-            )
-        time.sleep(10)  # Check every 10 seconds
+MCO_ANNOTATION = "machineconfiguration.openshift.io"
+CONFIGURE_OVS = "ExecStart=/usr/local/bin/configure-ovs.sh"
+
+
+def get_machine_config_status(module, timeout):
+    """Read every node's MachineConfig state from its annotations in one list call."""
+    client = get_client()
+    items, error = poll(
+        lambda timeout: client.list("nodes", timeout=timeout),
+        timeout,
+        interval=10,
+        on_error=lambda error: module.warn(f"Retrying as got an error: {error}"),
+    )
+    if error:
+        raise error
+    nodes = []
+    for item in items:
+        metadata = item.get("metadata", {})
+        annotations = metadata.get("annotations", {})
+        nodes.append({
+            "hostname": metadata.get("labels", {}).get("kubernetes.io/hostname", metadata.get("name")),
+            "currentConfig": annotations.get(f"{MCO_ANNOTATION}/currentConfig"),
+            "desiredConfig": annotations.get(f"{MCO_ANNOTATION}/desiredConfig"),
+            "state": annotations.get(f"{MCO_ANNOTATION}/state"),
+        })
     return nodes
 
 
-def verify_machine_config(module, config_name, network_type):
-    start_time = time.time()
-    while time.time() - start_time < module.params["timeout"]:
-        try:
-            output, error = run_command(f"oc get machineconfig {config_name} -o yaml | grep ExecStart")
-            if not error:
-                if network_type == "OVNKubernetes":
-                    if "ExecStart=/usr/local/bin/configure-ovs.sh OVNKubernetes" in output:
-                        return True
-                if network_type == "OpenShiftSDN":
-                    if "ExecStart=/usr/local/bin/configure-ovs.sh OpenShiftSDN" in output:
-                        return True
-            if error:
-                module.warn(f"Retrying as got an error: {error}")
-            time.sleep(3)
-        except Exception as ex:
-            module.fail_json(msg=str(ex))
+def configure_ovs_network_type(machine_config):
+    """Return the network type the configure-ovs.sh unit is started with, or None."""
+    units = machine_config.get("spec", {}).get("config", {}).get("systemd", {}).get("units") or []
+    for unit in units:
+        contents = [unit.get("contents") or ""] + [dropin.get("contents") or "" for dropin in unit.get("dropins") or []]
+        for content in contents:
+            for line in content.splitlines():
+                if line.strip().startswith(CONFIGURE_OVS):
+                    arguments = line.strip()[len(CONFIGURE_OVS):].split()
+                    return arguments[0] if arguments else None
+    return None
+
 
-    return False
+def verify_machine_configs(module, config_names, network_type, deadline):
+    """Verify each distinct rendered config once and return {name: network type found}.
+
+    The configs are checked concurrently and share one deadline, so the cost
+    no longer grows with the number of nodes.
+    """
+    client = get_client()
+
+    def verify(config_name):
+        machine_config, _ = poll(
+            lambda timeout: client.get("machineconfigs", config_name, timeout=timeout),
+            max(deadline - time.time(), 1),
+            predicate=lambda machine_config: configure_ovs_network_type(machine_config) == network_type,
+            name=f"machineconfigs/{config_name}",
+            on_error=lambda error: module.warn(f"Retrying as got an error: {error}"),
+        )
+        return configure_ovs_network_type(machine_config) if machine_config else None
+
+    config_names = sorted(config_names)
+    if not config_names:
+        return {}
+    with ThreadPoolExecutor(max_workers=len(config_names)) as executor:
+        return dict(zip(config_names, executor.map(verify, config_names)))
 
 
 def main():
@@ -59,10 +81,16 @@ def main():
             network_type=dict(type="str", required=True),
         )
     )
+    attach(module)
     timeout = module.params["timeout"]
     network_type = module.params["network_type"]
     try:
-        nodes = get_machine_config_status(timeout)
+        deadline = time.time() + timeout
+        nodes = get_machine_config_status(module, timeout)
+        rendered_configs = verify_machine_configs(
+            module, {node["currentConfig"] for node in nodes if node["currentConfig"]}, network_type, deadline
+        )
+
         issues = []
         for node in nodes:
             if node["state"] != "Done":
@@ -71,15 +99,16 @@ def main():
                 issues.append(
                     f"Node {node['hostname']} currentConfig ({node['currentConfig']}) does not match desiredConfig ({node['desiredConfig']})."
                 )
-            if not verify_machine_config(module, node["currentConfig"], network_type):
+            if rendered_configs.get(node["currentConfig"]) != network_type:
                 issues.append(
                     f"Node {node['hostname']} configuration {node['currentConfig']} does not contain expected ExecStart."
                 )
 
         if issues:
-            module.fail_json(msg="Issues detected with machine configuration.", issues=issues)
+            module.fail_json(msg="Issues detected with machine configuration.", issues=issues,
+                             rendered_configs=rendered_configs)
 
-        module.exit_json(changed=False, msg="All machine configurations are correct.")
+        module.exit_json(changed=False, msg="All machine configurations are correct.", rendered_configs=rendered_configs)
     except Exception as e:
         module.fail_json(msg=str(e))
 
@@ -1,30 +1,26 @@
 #!/usr/bin/python
 
 from ansible.module_utils.basic import AnsibleModule
-import subprocess
-import time
+from ansible.module_utils.metrics import attach
+from ansible.module_utils.kube_client import get_client, condition_status
+from ansible.module_utils.kube_wait import wait_for
 
 
-def run_command(command):
-    """Run a shell command and return its output or raise an error."""
-    try:
-        result = subprocess.run(
-            command, shell=True, text=True, capture_output=True, check=True
-        )
-        return result.stdout.strip(), None
-    except subprocess.CalledProcessError as err:
-        return None, Exception(f"Command '{command}' failed: {err.stderr.strip()}")
+def pools_updating(pools, names=None):
+    """Return True once every MachineConfigPool (of ``names``, when given) reports UPDATING=True."""
+    pools = [pool for pool in pools if names is None or pool["metadata"]["name"] in names]
+    return bool(pools) and all(condition_status(pool, "Updating") == "True" for pool in pools)
 
 
-def wait_for_mco(timeout):
+def wait_for_mco(module, timeout, names=None):
     """Wait until the MCO starts applying the new machine config."""
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        command = "oc wait mcp --all --for='condition=UPDATING=True' --timeout=10s"
-        _, error = run_command(command)
-        if not error:
-            return "MCO started updating nodes successfully."
-        time.sleep(10)  # Check every 10 seconds
+    if names is not None and not names:
+        return "No MachineConfigPool has a new machine config to apply."
+    client = get_client()
+    updating, _ = wait_for(client, "machineconfigpools", lambda pools: pools_updating(pools, names), timeout,
+                           on_error=lambda error: module.warn(f"Retrying as got an error: {error}"))
+    if updating:
+        return "MCO started updating nodes successfully."
     return "Timeout waiting for MCO to start updating nodes."
 
 
@@ -32,12 +28,17 @@ def main():
     module = AnsibleModule(
         argument_spec=dict(
             timeout=dict(type="int", required=True),
+            pools=dict(type="list", elements="str", required=False),  # Only these pools, see plan_mcp_rollout
         )
     )
+    attach(module)
 
     timeout = module.params["timeout"]
 
-    result_message = wait_for_mco(timeout)
+    try:
+        result_message = wait_for_mco(module, timeout, module.params["pools"])
+    except Exception as ex:
+        module.fail_json(msg=str(ex))
     if "Timeout" in result_message:
         module.fail_json(msg=result_message)
     else:
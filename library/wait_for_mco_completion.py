@@ -1,63 +1,140 @@
 #!/usr/bin/python
 
 from ansible.module_utils.basic import AnsibleModule
-import subprocess
+from ansible.module_utils.metrics import attach
+from ansible.module_utils.kube_client import get_client, condition_status
+from ansible.module_utils.kube_wait import wait_for
+from ansible.module_utils.cluster_snapshot import state_path
+import json
 import time
 
 
-def run_command(command):
-    """Run a shell command and return its output or raise an error."""
-    try:
-        result = subprocess.run(
-            command, shell=True, text=True, capture_output=True, check=True
-        )
-        return result.stdout.strip(), None
-    except subprocess.CalledProcessError as err:
-        return None, Exception(f"Command '{command}' failed: {err.stderr.strip()}")
-
-
-def wait_for_mco(timeout):
-    """Wait until MCO conditions are satisfied or timeout."""
-    start_time = time.time()
-    interval = 10
+DESIRED_CONDITIONS = {"Updated": "True", "Updating": "False", "Degraded": "False"}
+MACHINE_COUNTS = ("machineCount", "updatedMachineCount", "readyMachineCount", "degradedMachineCount")
 
-    while time.time() - start_time < timeout:
-        try:
-            # Check MCP conditions
-            _, _ = run_command("oc wait mcp --all --for='condition=UPDATED=True' --timeout=60s")
-            _, _ = run_command("oc wait mcp --all --for='condition=UPDATING=False' --timeout=60s")
-            _, _ = run_command("oc wait mcp --all --for='condition=DEGRADED=False' --timeout=60s")
 
-            # If all conditions are met, return success
-            return True
-        except Exception as e:
-            # Log the error and retry
-            print(f"Retrying due to error: {str(e)}")
+def pools_finished(pools):
+    """Return True once every MachineConfigPool is updated and not degraded."""
+    return all(
+        condition_status(pool, condition) == status
+        for pool in pools
+        for condition, status in DESIRED_CONDITIONS.items()
+    )
 
-        # Wait before retrying
-        time.sleep(interval)
 
-    # Timeout reached
-    return False
+class RolloutProgress:
+    """Follow the machine counts of every pool and estimate when the rollout finishes.
+
+    Every change of a pool's counts or of its done state is appended to ``progress_file`` as one
+    JSON line, so the rollout can be followed with ``tail -f``. The update
+    rate of a pool is measured from the first time it was seen; the ETA of the
+    whole rollout is the one of the slowest pool, as pools update in parallel.
+    With ``names`` only those pools are followed.
+    """
+
+    def __init__(self, progress_file, names=None):
+        self.progress_file = progress_file
+        self.names = names
+        self.started = time.time()
+        self.pools = {}
+        with open(progress_file, "w"):
+            pass
+
+    def event(self, kind, **data):
+        with open(self.progress_file, "a") as fh:
+            fh.write(json.dumps(dict(time=round(time.time(), 3), event=kind, **data)) + "\n")
+
+    def observe(self, items):
+        """Update the per-pool progress from the current pool list; True once every pool is done."""
+        now = time.time()
+        items = [pool for pool in items if self.names is None or pool["metadata"]["name"] in self.names]
+        for pool in items:
+            name = pool["metadata"]["name"]
+            status = pool.get("status", {})
+            counts = {key: status.get(key, 0) for key in MACHINE_COUNTS}
+            done = all(condition_status(pool, condition) == value for condition, value in DESIRED_CONDITIONS.items())
+            progress = self.pools.get(name)
+            if progress is None or counts["updatedMachineCount"] < progress["baseline_updated"]:
+                # First sight of the pool, or a new rendered config restarted its rollout
+                progress = self.pools[name] = {"first_seen": now, "baseline_updated": counts["updatedMachineCount"]}
+            elif counts == progress["counts"] and done == progress["done"]:
+                continue
+            progress["counts"] = counts
+            progress["done"] = done
+            progress.update(self.estimate(progress, now))
+            self.event("pool", pool=name, done=progress["done"], rate_per_hour=progress["rate_per_hour"],
+                       eta_seconds=progress["eta_seconds"],
+                       maxUnavailable=pool.get("spec", {}).get("maxUnavailable", 1), **counts)
+        return pools_finished(items)
+
+    @staticmethod
+    def estimate(progress, now):
+        """Return the node update rate per hour and the seconds left at that rate."""
+        counts = progress["counts"]
+        remaining = counts["machineCount"] - counts["updatedMachineCount"]
+        updated = counts["updatedMachineCount"] - progress["baseline_updated"]
+        elapsed = now - progress["first_seen"]
+        if remaining <= 0:
+            return {"rate_per_hour": round(updated * 3600 / elapsed, 1) if updated and elapsed else None,
+                    "eta_seconds": 0}
+        if not updated or not elapsed:
+            return {"rate_per_hour": None, "eta_seconds": None}
+        rate = updated / elapsed
+        return {"rate_per_hour": round(rate * 3600, 1), "eta_seconds": round(remaining / rate)}
+
+    def eta(self):
+        etas = [progress["eta_seconds"] for progress in self.pools.values()]
+        return None if None in etas or not etas else max(etas)
+
+    def summary(self):
+        return {
+            name: dict(progress["counts"], done=progress["done"], rate_per_hour=progress["rate_per_hour"],
+                       eta_seconds=progress["eta_seconds"])
+            for name, progress in sorted(self.pools.items())
+        }
+
+
+def wait_for_mco(module, timeout, progress):
+    """Wait until MCO conditions are satisfied or timeout."""
+    client = get_client()
+    finished, _ = wait_for(client, "machineconfigpools", progress.observe, timeout,
+                           on_error=lambda error: module.warn(f"Retrying due to error: {error}"))
+    progress.event("finished" if finished else "timeout", duration=round(time.time() - progress.started, 1),
+                   eta_seconds=progress.eta())
+    return finished
 
 
 def main():
     module_args = dict(
         timeout=dict(type="int", required=False, default=2700),  # Timeout in seconds
+        progress_file=dict(type="path", required=False),  # JSON-lines progress events, to follow with tail -f
+        pools=dict(type="list", elements="str", required=False),  # Only these pools, see plan_mcp_rollout
     )
 
     module = AnsibleModule(argument_spec=module_args)
+    attach(module)
 
     timeout = module.params["timeout"]
 
     try:
-        if wait_for_mco(timeout):
-            module.exit_json(changed=False, msg="MCO finished successfully.")
-        else:
-            module.fail_json(msg="Timeout reached while waiting for MCO to finish.")
+        progress_file = module.params["progress_file"] or state_path(get_client(), "mco-progress.jsonl")
+        progress = RolloutProgress(progress_file, module.params["pools"])
+        finished = wait_for_mco(module, timeout, progress)
     except Exception as ex:
         module.fail_json(msg=str(ex))
 
+    result = dict(pools=progress.summary(), progress_file=progress_file,
+                  duration=round(time.time() - progress.started, 1))
+    if finished:
+        module.exit_json(changed=False, msg="MCO finished successfully.", **result)
+    pending = [name for name, pool in result["pools"].items() if not pool["done"]]
+    eta = progress.eta()
+    module.fail_json(
+        msg=f"Timeout reached while waiting for MCO to finish; pools still updating: {', '.join(pending)}"
+            + (f" (estimated {eta} more seconds)." if eta is not None else "."),
+        **result,
+    )
+
 
 if __name__ == "__main__":
     main()
@@ -1,28 +1,22 @@
 #!/usr/bin/python
 
 from ansible.module_utils.basic import AnsibleModule
-import subprocess
-import time
+from ansible.module_utils.metrics import attach
+from ansible.module_utils.kube_client import get_client, condition_status
+from ansible.module_utils.kube_wait import wait_for
 
 
-def run_command(command):
-    """Run a shell command and return the output."""
-    try:
-        result = subprocess.run(command, shell=True, text=True, capture_output=True, check=True)
-        return result.stdout.strip(), None
-    except subprocess.CalledProcessError as e:
-        return None, e.stderr.strip()
+def network_co_progressing(operators):
+    return any(condition_status(operator, "Progressing") == "True" for operator in operators)
 
 
-def wait_for_network_co(timeout):
+def wait_for_network_co(module, timeout):
     """Wait until the Network CO enters the PROGRESSING=True condition."""
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        command = "oc wait co network --for='condition=PROGRESSING=True' --timeout=60s"
-        _, error = run_command(command)
-        if not error:
-            return "Network Cluster Operator is in PROGRESSING=True state."
-        time.sleep(10)  # Retry every 10 seconds
+    client = get_client()
+    progressing, _ = wait_for(client, "clusteroperators", network_co_progressing, timeout,
+                              name="network", on_error=lambda error: module.warn(f"Retrying as got an error: {error}"))
+    if progressing:
+        return "Network Cluster Operator is in PROGRESSING=True state."
     return "Timeout waiting for Network Cluster Operator to reach PROGRESSING=True."
 
 
@@ -32,10 +26,14 @@ def main():
             timeout=dict(type="int", required=True),
         )
     )
+    attach(module)
 
     timeout = module.params["timeout"]
 
-    result_message = wait_for_network_co(timeout)
+    try:
+        result_message = wait_for_network_co(module, timeout)
+    except Exception as ex:
+        module.fail_json(msg=str(ex))
     if "Timeout" in result_message:
         module.fail_json(msg=result_message)
     else:
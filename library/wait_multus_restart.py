@@ -1,57 +1,47 @@
 #!/usr/bin/python
 
 from ansible.module_utils.basic import AnsibleModule
-import subprocess
-import time
+from ansible.module_utils.metrics import attach
+from ansible.module_utils.kube_client import get_client
+from ansible.module_utils.rollout import PLURALS, RolloutTracker, describe_lagging, wait_for_rollouts
 
-
-def run_command(command):
-    """Run a shell command and return its output or raise an error."""
-    try:
-        result = subprocess.run(
-            command, shell=True, text=True, capture_output=True, check=True
-        )
-        return result.stdout.strip(), None
-    except subprocess.CalledProcessError as err:
-        return None, Exception(f"Command '{command}' failed: {err.stderr.strip()}")
-
-
-def wait_for_multus_pods(timeout):
-    """Wait for the Multus pods to restart."""
-    start_time = time.time()
-    interval = 10
-
-    while time.time() - start_time < timeout:
-        try:
-            command = "oc rollout status ds/multus -n openshift-multus"
-            output, error = run_command(command)
-            if not error:
-                if "successfully rolled out" in output:
-                    return True
-        except Exception as e:
-            print(f"Retrying due to error: {str(e)}")
-        time.sleep(interval)
-
-    # Timeout reached
-    return False
+DEFAULT_WORKLOADS = [{"kind": "daemonset", "namespace": "openshift-multus", "name": "multus"}]
 
 
 def main():
     module_args = dict(
         timeout=dict(type="int", required=False, default=300),  # Timeout in seconds
+        # DaemonSets and Deployments followed together; optional ones are skipped when they do not exist
+        workloads=dict(type="list", elements="dict", required=False, default=DEFAULT_WORKLOADS, options=dict(
+            kind=dict(type="str", required=True, choices=list(PLURALS)),
+            namespace=dict(type="str", required=True),
+            name=dict(type="str", required=True),
+            optional=dict(type="bool", default=False),
+        )),
+        stuck_after=dict(type="int", required=False, default=300),  # Seconds a node may lag before it is flagged
+        check_interval=dict(type="int", required=False, default=15),  # Seconds between looks at the lagging pods
     )
 
     module = AnsibleModule(argument_spec=module_args)
+    attach(module)
 
     timeout = module.params["timeout"]
+    tracker = RolloutTracker(module.params["workloads"], module.params["stuck_after"])
+
+    def on_stuck(entry):
+        module.warn(f"{entry['workload']} is stuck on node {entry['node']}: pod {entry['pod']} {entry['reason']}, "
+                    f"lagging for {entry['lagging_for']}s.")
 
     try:
-        if wait_for_multus_pods(timeout):
-            module.exit_json(changed=False, msg="Multus pods restarted successfully.")
-        else:
-            module.fail_json(msg="Timeout reached while waiting for Multus pods to restart.")
+        converged = wait_for_rollouts(get_client(), tracker, timeout, module.params["check_interval"],
+                                      on_error=lambda error: module.warn(f"Retrying due to error: {error}"),
+                                      on_stuck=on_stuck)
     except Exception as ex:
         module.fail_json(msg=str(ex))
+    if converged:
+        module.exit_json(changed=False, msg=f"Rolled out {', '.join(sorted(tracker.workloads))}.", **tracker.summary())
+    module.fail_json(msg=f"Timeout reached while waiting for the rollouts: {describe_lagging(tracker)}.",
+                     **tracker.summary())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,289 @@
+"""Record and replay every cluster interaction of a module.
+
+With ``$SDN_OVN_CASSETTE_MODE=record`` every module process writes the API
+requests and responses, watch streams and shell commands it makes, together
+with its name and parameters, to a gzipped JSON cassette in the directory
+``$SDN_OVN_CASSETTE``. Tokens, passwords, keys, Secret data and the module's
+``no_log`` values are redacted before anything is written.
+
+With ``$SDN_OVN_CASSETTE_MODE=replay`` and ``$SDN_OVN_CASSETTE`` pointing at
+one cassette file, nothing talks to the cluster: every request is answered
+with the response recorded for it, in recorded order, sleeps between
+attempts are skipped, and a request the cassette does not hold raises
+``CassetteMiss``. ``benchmarks/replay_cassette.py`` runs a module against a
+cassette, optionally under the profiler.
+"""
+
+import atexit
+import gzip
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+MODE_ENV = "SDN_OVN_CASSETTE_MODE"
+PATH_ENV = "SDN_OVN_CASSETTE"
+FORMAT_VERSION = 1
+REDACTED = "**REDACTED**"
+
+# String values under these keys are credentials wherever they appear (kubeconfigs, configs, params)
+SECRET_KEY = re.compile(r"(token|password|passwd|secret|key-data|certificate-data)$", re.IGNORECASE)
+SECRET_PATTERNS = [
+    (re.compile(r"(--(?:token|password)[= ])\S+"), r"\1" + REDACTED),
+    (re.compile(r"\b(Bearer|Basic) [\w.~+/=-]+"), r"\1 " + REDACTED),
+    (re.compile(r"sha256~[\w-]+"), REDACTED),  # OpenShift OAuth tokens
+    (re.compile(r"eyJ[\w-]+\.[\w-]+\.[\w-]+"), REDACTED),  # Service account JWTs
+    (re.compile(r"-----BEGIN [A-Z ]*PRIVATE KEY-----.*?-----END [A-Z ]*PRIVATE KEY-----", re.DOTALL), REDACTED),
+]
+# Query parameters that differ between a run and its replay without changing the answer
+VOLATILE_PARAMS = ("timeoutSeconds",)
+
+
+class CassetteMiss(Exception):
+    """Raised on replay when the cassette holds no response for a request."""
+
+
+def redact(value, secrets=(), in_secret=False):
+    """Return ``value`` with credentials, Secret data and the ``secrets`` strings replaced."""
+    if isinstance(value, dict):
+        in_secret = in_secret or value.get("kind") in ("Secret", "SecretList")
+        result = {}
+        for key, item in value.items():
+            if isinstance(item, str) and SECRET_KEY.search(key):
+                result[key] = REDACTED
+            elif in_secret and key in ("data", "stringData") and isinstance(item, dict):
+                result[key] = dict.fromkeys(item, REDACTED)
+            else:
+                result[key] = redact(item, secrets, in_secret)
+        return result
+    if isinstance(value, list):
+        return [redact(item, secrets, in_secret) for item in value]
+    if isinstance(value, str):
+        for secret in secrets:
+            value = value.replace(secret, REDACTED)
+        for pattern, replacement in SECRET_PATTERNS:
+            value = pattern.sub(replacement, value)
+    return value
+
+
+def _loose_key(request):
+    """Key of a request without its query and body, used when the exact request was not recorded."""
+    kind, method, target, _ = request
+    return json.dumps([kind, method, target if kind == "command" else urlsplit(target).path])
+
+
+def _canonical_url(url):
+    parts = urlsplit(url)
+    params = [(key, value) for key, value in parse_qsl(parts.query) if key not in VOLATILE_PARAMS]
+    return parts.path + ("?" + urlencode(params) if params else "")
+
+
+def _decode_body(data):
+    if not data:
+        return None
+    try:
+        return {"json": json.loads(data)}
+    except ValueError:
+        return {"text": data.decode(errors="replace") if isinstance(data, bytes) else data}
+
+
+def _encode_body(body):
+    if not body:
+        return b""
+    if "json" in body:
+        return json.dumps(body["json"]).encode()
+    return body["text"].encode()
+
+
+class Cassette:
+    """The interactions of one module process, being recorded or replayed."""
+
+    def __init__(self, mode, path):
+        self.mode = mode
+        self.path = path
+        self.replaying = mode == "replay"
+        self.started = time.time()
+        self.module = None
+        self.params = {}
+        self.server = None
+        self.secrets = set()
+        self.interactions = []
+        self._lock = threading.Lock()
+        self._exact = {}
+        self._loose = {}
+        if self.replaying:
+            self._load()
+        else:
+            atexit.register(self.save)
+
+    def _load(self):
+        with gzip.open(self.path, "rt") as fh:
+            data = json.load(fh)
+        self.module, self.params, self.server = data["module"], data["params"], data.get("server")
+        for entry in data["interactions"]:
+            entry["served"] = False
+            self.interactions.append(entry)
+            self._exact.setdefault(json.dumps(entry["request"]), deque()).append(entry)
+            self._loose.setdefault(_loose_key(entry["request"]), deque()).append(entry)
+
+    def begin(self, module):
+        """Take the module's name, parameters and ``no_log`` values for the recording."""
+        self.secrets = {str(value) for value in getattr(module, "no_log_values", ()) if value}
+        self.module = getattr(module, "_name", None)
+        self.params = redact(dict(module.params), self.secrets)
+
+    def record(self, request, response, started):
+        entry = {
+            "request": redact(request, self.secrets),
+            "response": redact(response, self.secrets),
+            "offset": round(started - self.started, 3),
+            "seconds": round(time.time() - started, 3),
+        }
+        with self._lock:
+            self.interactions.append(entry)
+
+    def replay(self, request):
+        """Return the next recorded response for ``request``."""
+        request = redact(request, self.secrets)
+        with self._lock:
+            for index, key in ((self._exact, json.dumps(request)), (self._loose, _loose_key(request))):
+                queue = index.get(key)
+                while queue:
+                    entry = queue.popleft()
+                    if not entry["served"]:
+                        entry["served"] = True
+                        return entry["response"]
+        raise CassetteMiss(f"The cassette {self.path} holds no response for {request[1] or ''} {request[2]}.")
+
+    def unserved(self):
+        """Return the recorded requests the replay did not ask for."""
+        return [entry["request"] for entry in self.interactions if not entry.get("served", True)]
+
+    def save(self):
+        if not self.interactions and self.module is None:
+            return
+        os.makedirs(self.path, mode=0o700, exist_ok=True)
+        name = f"{time.strftime('%Y%m%dT%H%M%S', time.localtime(self.started))}-{self.module or 'module'}" \
+               f"-{os.getpid()}.json.gz"
+        data = {
+            "version": FORMAT_VERSION,
+            "module": self.module,
+            "params": self.params,
+            "server": self.server,
+            "recorded": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(self.started)),
+            "duration": round(time.time() - self.started, 3),
+            "interactions": self.interactions,
+        }
+        path = os.path.join(self.path, name)
+        with open(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb") as fh:
+                fh.write(json.dumps(data, separators=(",", ":")).encode())
+
+
+_CASSETTE = None
+_CASSETTE_LOCK = threading.Lock()
+
+
+def active():
+    """Return the cassette of this process, or None when neither recording nor replaying."""
+    global _CASSETTE
+    mode = os.environ.get(MODE_ENV)
+    if mode not in ("record", "replay"):
+        return None
+    with _CASSETTE_LOCK:
+        if _CASSETTE is None:
+            path = os.environ.get(PATH_ENV)
+            if not path:
+                raise ValueError(f"${PATH_ENV} must name the cassette directory or file to {mode}.")
+            _CASSETTE = Cassette(mode, os.path.expanduser(path))
+        return _CASSETTE
+
+
+def replaying():
+    cassette = active()
+    return cassette is not None and cassette.replaying
+
+
+def begin(module):
+    cassette = active()
+    if cassette is not None and not cassette.replaying:
+        cassette.begin(module)
+
+
+def finish():
+    """Save the recording of this process now and start a new one on the next interaction."""
+    global _CASSETTE
+    with _CASSETTE_LOCK:
+        recording, _CASSETTE = _CASSETTE, None
+    if recording is not None and not recording.replaying:
+        atexit.unregister(recording.save)
+        recording.save()
+
+
+def http_exchange(method, url, body, send):
+    """Return ``send()`` -> ``(status, reason, data)``, recorded or served from the cassette."""
+    cassette = active()
+    if cassette is None:
+        return send()
+    request = ["http", method, _canonical_url(url), _decode_body(body)]
+    if cassette.replaying:
+        response = cassette.replay(request)
+        if "error" in response:
+            raise OSError(response["error"])
+        return response["status"], response["reason"], _encode_body(response["body"])
+    started = time.time()
+    try:
+        status, reason, data = send()
+    except Exception as ex:
+        cassette.record(request, {"error": str(ex)}, started)
+        raise
+    cassette.record(request, {"status": status, "reason": reason, "body": _decode_body(data)}, started)
+    return status, reason, data
+
+
+def stream_exchange(url, stream, make_error):
+    """Yield the events of ``stream()``, recorded or served from the cassette.
+
+    A stream that failed is replayed up to the failure, which is raised again
+    as ``make_error(message, status)``.
+    """
+    cassette = active()
+    if cassette is None:
+        yield from stream()
+        return
+    request = ["watch", "GET", _canonical_url(url), None]
+    if cassette.replaying:
+        response = cassette.replay(request)
+        yield from response["events"]
+        if "error" in response:
+            raise make_error(response["error"], response.get("status"))
+        return
+    started = time.time()
+    response = {"events": []}
+    try:
+        for event in stream():
+            response["events"].append(event)
+            yield event
+    except Exception as ex:
+        response.update(error=str(ex), status=getattr(ex, "status", None))
+        raise
+    finally:
+        cassette.record(request, response, started)
+
+
+def command_exchange(command, run):
+    """Return ``run()`` -> ``(returncode, stdout, stderr)``, recorded or served from the cassette."""
+    cassette = active()
+    if cassette is None:
+        return run()
+    request = ["command", None, command, None]
+    if cassette.replaying:
+        response = cassette.replay(request)
+        return response["returncode"], response["stdout"], response["stderr"]
+    started = time.time()
+    returncode, stdout, stderr = run()
+    cassette.record(request, {"returncode": returncode, "stdout": stdout, "stderr": stderr}, started)
+    return returncode, stdout, stderr
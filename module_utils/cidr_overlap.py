@@ -0,0 +1,73 @@
+"""Sorted-interval overlap detection for IPv4 and IPv6 ranges.
+
+Every CIDR (or single address) becomes an integer interval tagged with the
+kind of address space it belongs to. ``find_overlaps`` sorts the intervals
+once per address family and sweeps them with a heap of open intervals, so all
+overlapping pairs are reported in O(n log n + k) instead of comparing every
+range with every other one. A range listed twice by the same owner, such as a
+node whose InternalIP is also its ExternalIP, is swept once.
+"""
+
+import heapq
+import ipaddress
+from collections import namedtuple
+
+AddressRange = namedtuple("AddressRange", ["version", "start", "end", "cidr", "kind", "source"])
+
+# Kinds supplied by the user rather than read from the cluster
+USER_KINDS = ("conflicting", "external")
+
+# Overlaps that are part of a healthy cluster, e.g. node addresses inside the machine network
+EXPECTED_OVERLAPS = {
+    frozenset(["clusterNetwork", "hostSubnet"]),
+    frozenset(["machineNetwork", "nodeAddress"]),
+    frozenset(["machineNetwork", "egressIP"]),
+    frozenset(["machineNetwork", "egressCIDR"]),
+    frozenset(["egressCIDR", "egressIP"]),
+    frozenset(["egressCIDR", "nodeAddress"]),
+    frozenset(["egressCIDR"]),
+    frozenset(["egressIP"]),
+}
+
+
+def to_range(cidr, kind, source=None):
+    """Parse a CIDR or a bare address into an AddressRange."""
+    network = ipaddress.ip_network(cidr, strict=False)
+    return AddressRange(
+        network.version,
+        int(network.network_address),
+        int(network.broadcast_address),
+        str(network),
+        kind,
+        source or kind,
+    )
+
+
+def is_conflict(first, second):
+    """Decide whether an overlap between two ranges is a real conflict."""
+    if first.kind in USER_KINDS and second.kind in USER_KINDS:
+        return False
+    return frozenset([first.kind, second.kind]) not in EXPECTED_OVERLAPS
+
+
+def find_overlaps(ranges, relevant=is_conflict):
+    """Return every pair of overlapping ranges for which ``relevant(a, b)`` holds.
+
+    Ranges are sorted by (family, start) and swept left to right; the heap
+    holds the ranges still open at the current start address, each of which
+    overlaps the range being added. Identical ranges of the same kind and
+    source are dropped first.
+    """
+    overlaps = []
+    active = []
+    version = None
+    for index, current in enumerate(sorted(dict.fromkeys(ranges), key=lambda r: (r.version, r.start, -r.end))):
+        if current.version != version:
+            version, active = current.version, []
+        while active and active[0][0] < current.start:
+            heapq.heappop(active)
+        for _, _, other in active:
+            if relevant(other, current):
+                overlaps.append((other, current))
+        heapq.heappush(active, (current.end, index, current))
+    return overlaps
@@ -0,0 +1,115 @@
+"""Controller-side snapshot of the cluster objects the checks keep re-reading.
+
+``take_snapshot`` fetches the network configuration, the network operator,
+the cluster version and the node list concurrently and stores them in a JSON
+file per API server. ``get_resource`` serves later reads from that file while
+it is younger than the caller's ``max_age`` and falls back to a live read
+otherwise. Modules that change one of these objects drop it from the snapshot
+with ``invalidate_snapshot``.
+"""
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Snapshot key -> (resource, name); a name of None means the whole list
+SNAPSHOT_RESOURCES = {
+    "network_config": ("networks.config", "cluster"),
+    "network_operator": ("networks.operator", "cluster"),
+    "cluster_version": ("clusterversions", "version"),
+    "nodes": ("nodes", None),
+}
+
+DEFAULT_MAX_AGE = 120  # Seconds
+
+
+def state_path(client, filename):
+    """Return the path of a per-cluster state file under the client's state directory or ``$SDN_OVN_STATE_DIR``."""
+    base_dir = client.state_dir or os.environ.get("SDN_OVN_STATE_DIR") or os.path.expanduser("~/.ansible/sdn_ovn_migration")
+    cluster_dir = os.path.join(base_dir, hashlib.sha1(client.server.encode()).hexdigest()[:12])
+    os.makedirs(cluster_dir, mode=0o700, exist_ok=True)
+    return os.path.join(cluster_dir, filename)
+
+
+def write_json(path, data):
+    """Write ``data`` as JSON, readable only by the owner, replacing ``path`` atomically."""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as fh:
+        json.dump(data, fh)
+    os.replace(temp_path, path)
+
+
+def _compact_node(node):
+    """Keep only the node fields the checks use; full node objects carry large image lists."""
+    metadata = node.get("metadata", {})
+    status = node.get("status", {})
+    return {
+        "metadata": {key: metadata.get(key) for key in ("name", "labels", "annotations", "resourceVersion")},
+        "spec": node.get("spec", {}),
+        "status": {key: status.get(key) for key in ("conditions", "nodeInfo", "addresses")},
+    }
+
+
+def _fetch(client, key, **kwargs):
+    resource, name = SNAPSHOT_RESOURCES[key]
+    if name:
+        return client.get(resource, name, **kwargs)
+    items, error = client.list(resource, **kwargs)
+    if error:
+        return None, error
+    return [_compact_node(item) for item in items] if resource == "nodes" else items, None
+
+
+def load_snapshot(client):
+    """Return the stored snapshot for this cluster, or None."""
+    try:
+        with open(state_path(client, "snapshot.json")) as fh:
+            snapshot = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    return snapshot if snapshot.get("server") == client.server else None
+
+
+def take_snapshot(client, keys=None):
+    """Fetch the snapshot resources concurrently and store them.
+
+    Returns ``(snapshot, errors)`` where ``errors`` maps the keys that could
+    not be fetched to their error message.
+    """
+    keys = list(keys or SNAPSHOT_RESOURCES)
+    with ThreadPoolExecutor(max_workers=len(keys)) as executor:
+        fetched = dict(zip(keys, executor.map(lambda key: _fetch(client, key), keys)))
+
+    now = time.time()
+    snapshot = load_snapshot(client) or {"server": client.server, "resources": {}}
+    errors = {}
+    for key, (obj, error) in fetched.items():
+        if error:
+            errors[key] = str(error)
+            snapshot["resources"].pop(key, None)
+        else:
+            snapshot["resources"][key] = {"taken_at": now, "object": obj}
+    write_json(state_path(client, "snapshot.json"), snapshot)
+    return snapshot, errors
+
+
+def get_resource(client, key, max_age=DEFAULT_MAX_AGE, **kwargs):
+    """Return ``(obj, error)`` for a snapshot key, reading live when the snapshot is stale."""
+    if max_age:
+        snapshot = load_snapshot(client)
+        entry = (snapshot or {}).get("resources", {}).get(key)
+        if entry and time.time() - entry["taken_at"] <= max_age:
+            return entry["object"], None
+    return _fetch(client, key, **kwargs)
+
+
+def invalidate_snapshot(client, keys=None):
+    """Drop the given keys (or everything) from the stored snapshot."""
+    snapshot = load_snapshot(client)
+    if not snapshot:
+        return
+    for key in keys or list(snapshot["resources"]):
+        snapshot["resources"].pop(key, None)
+    write_json(state_path(client, "snapshot.json"), snapshot)
@@ -0,0 +1,155 @@
+"""PodDisruptionBudget-aware reboot batches and node drains.
+
+``plan_drain_batches`` indexes the pods and PodDisruptionBudgets once and
+packs the nodes into the largest batches that stay within the batch size
+(and one zone) and whose budgeted pods, taken down together, stay within
+every budget's ``disruptionsAllowed``. A node whose own pods exceed a budget
+gets a batch without other nodes of that budget. ``drain_nodes`` cordons a
+batch and evicts its pods concurrently through the eviction API, which
+enforces the budgets again: an eviction refused with 429 is retried until
+the drain deadline, then the drain waits for the evicted pods to be gone.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ansible.module_utils import metrics
+from ansible.module_utils.kube_client import KubeAPIError, condition_status, selector_matches
+from ansible.module_utils.kube_wait import wait_for
+from ansible.module_utils.polling import Backoff
+
+MIRROR_ANNOTATION = "kubernetes.io/config.mirror"
+
+
+def evictable(pod):
+    """Return True for the pods a drain evicts: not DaemonSet, static or finished pods."""
+    metadata = pod.get("metadata", {})
+    if MIRROR_ANNOTATION in (metadata.get("annotations") or {}):
+        return False
+    if any(owner.get("kind") == "DaemonSet" for owner in metadata.get("ownerReferences") or []):
+        return False
+    return pod.get("status", {}).get("phase") not in ("Succeeded", "Failed")
+
+
+def budget_usage(pods, pdbs):
+    """Return ``({node: {budget: pods}}, {budget: disruptionsAllowed})`` for the healthy budgeted pods.
+
+    ``pods`` may be a generator over list pages; only the labels and node of
+    the pods that count against a budget are kept.
+    """
+    by_namespace = {}
+    for pod in pods:
+        if evictable(pod) and condition_status(pod, "Ready") == "True":
+            by_namespace.setdefault(pod["metadata"].get("namespace"), []).append(
+                (pod["metadata"].get("labels") or {}, pod.get("spec", {}).get("nodeName")))
+
+    usage, allowed = {}, {}
+    for pdb in pdbs:
+        metadata = pdb["metadata"]
+        key = f"{metadata.get('namespace')}/{metadata['name']}"
+        allowed[key] = pdb.get("status", {}).get("disruptionsAllowed", 0)
+        selector = pdb.get("spec", {}).get("selector")
+        for labels, node_name in by_namespace.get(metadata.get("namespace"), []):
+            if selector_matches(selector, labels):
+                node = usage.setdefault(node_name, {})
+                node[key] = node.get(key, 0) + 1
+    return usage, allowed
+
+
+def plan_drain_batches(nodes, pods, pdbs, batch_size, zone_label=None):
+    """Split nodes into the fewest batches of at most ``batch_size`` nodes that respect every budget.
+
+    Nodes with the most budgeted pods are placed first, each into the first
+    batch of its zone that still has room in its size and in every budget
+    its pods count against (first-fit decreasing).
+    """
+    usage, allowed = budget_usage(pods, pdbs)
+    zones = {}
+    for node in nodes:
+        labels = node["metadata"].get("labels", {})
+        zones.setdefault(labels.get(zone_label, "") if zone_label else "", []).append(node["metadata"]["name"])
+
+    batches = []
+    for zone in sorted(zones):
+        zone_batches = []
+        for name in sorted(zones[zone], key=lambda name: (-sum(usage.get(name, {}).values()), name)):
+            needs = usage.get(name, {})
+            for batch in zone_batches:
+                if len(batch["nodes"]) < batch_size and all(
+                        batch["budgets"].get(key, 0) + count <= allowed[key] for key, count in needs.items()):
+                    break
+            else:
+                batch = {"nodes": [], "budgets": {}}
+                zone_batches.append(batch)
+            batch["nodes"].append(name)
+            for key, count in needs.items():
+                batch["budgets"][key] = batch["budgets"].get(key, 0) + count
+        batches.extend({"zone": zone or None, "nodes": sorted(batch["nodes"]),
+                        "budgets": dict(sorted(batch["budgets"].items()))} for batch in zone_batches)
+    return batches
+
+
+def set_unschedulable(client, names, unschedulable):
+    """Cordon (or uncordon) the nodes concurrently; return the errors."""
+    body = {"spec": {"unschedulable": True if unschedulable else None}}
+    with ThreadPoolExecutor(max_workers=min(len(names), 10) or 1) as executor:
+        results = executor.map(lambda name: client.patch("nodes", name, body, retries=3, delay=3), names)
+    return [error for _, error in results if error]
+
+
+def evict(client, pod, deadline, retry_interval=5):
+    """Evict one pod, retrying while a budget refuses it (429) until ``deadline``; return the error."""
+    metadata = pod["metadata"]
+    body = {"apiVersion": "policy/v1", "kind": "Eviction",
+            "metadata": {"name": metadata["name"], "namespace": metadata["namespace"]}}
+    backoff = Backoff(interval=retry_interval, max_interval=max(retry_interval, 30))
+    while True:
+        _, error = client.create("pods", body, namespace=metadata["namespace"], name=metadata["name"],
+                                 subresource="eviction")
+        if not error or error.status == 404:
+            return None
+        if error.status != 429 or time.time() >= deadline:
+            return error
+        metrics.count("evictions_refused")
+        metrics.sleep(min(backoff.next_delay(), max(deadline - time.time(), 0)))
+
+
+def drain_nodes(client, names, timeout, on_error=None):
+    """Cordon the nodes, evict their pods concurrently and wait until they are gone.
+
+    Returns ``(evicted, error)`` with the ``namespace/name`` of every evicted pod.
+    """
+    deadline = time.time() + timeout
+    errors = set_unschedulable(client, names, True)
+    if errors:
+        return [], errors[0]
+
+    def node_pods(name):
+        items, error = client.list("pods", field_selector=f"spec.nodeName={name}", retries=3, delay=3)
+        if error:
+            raise error
+        return [pod for pod in items if evictable(pod)]
+
+    try:
+        with ThreadPoolExecutor(max_workers=min(len(names), 10)) as executor:
+            pods = [pod for items in executor.map(node_pods, names) for pod in items]
+    except KubeAPIError as ex:
+        return [], ex
+    evicted = [f"{pod['metadata']['namespace']}/{pod['metadata']['name']}" for pod in pods]
+    if pods:
+        with ThreadPoolExecutor(max_workers=min(len(pods), 20)) as executor:
+            errors = [error for error in executor.map(lambda pod: evict(client, pod, deadline), pods) if error]
+        if errors:
+            return evicted, errors[0]
+
+    def drained(name):
+        gone, _ = wait_for(client, "pods", lambda items: not any(evictable(pod) for pod in items),
+                           max(deadline - time.time(), 1), field_selector=f"spec.nodeName={name}",
+                           on_error=on_error)
+        return gone
+
+    with ThreadPoolExecutor(max_workers=min(len(names), 10)) as executor:
+        pending = [name for name, gone in zip(names, executor.map(drained, names)) if not gone]
+    if pending:
+        return evicted, KubeAPIError(f"Pods are still running on {', '.join(pending)} after the drain timeout.")
+    return evicted, None
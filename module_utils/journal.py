@@ -0,0 +1,187 @@
+"""Phase journal that lets an interrupted migration or rollback resume.
+
+The journal records every completed phase together with the resourceVersion
+and generation of the objects it touched and the field values it left behind,
+plus the bootID each node came back with after its reboot. It is stored in a
+local file per API server and mirrored to a ConfigMap, so a re-run from
+another controller host sees the same progress.
+
+On a re-run ``completed_phases`` re-reads only the recorded objects: a phase
+still counts as done while none of its observed objects changed generation
+(their spec was not edited since) and every expected field still has its
+value. Objects that other components legitimately edit later are only
+recorded for reference and not compared. Phases are checked in completion
+order and the first one that no longer holds makes it and every later phase
+run again.
+"""
+
+import json
+import time
+
+from ansible.module_utils.cluster_snapshot import state_path, write_json
+
+JOURNAL_NAMESPACE = "openshift-network-operator"
+JOURNAL_KEY = "journal.json"
+
+
+def configmap_name(name):
+    return f"sdn-ovn-{name}-journal"
+
+
+def get_field(obj, path):
+    """Return the value at a dotted ``path`` such as ``status.migration.networkType``."""
+    for part in path.split("."):
+        if not isinstance(obj, dict):
+            return None
+        obj = obj.get(part)
+    return obj
+
+
+def new_journal(name, target=None):
+    return {"journal": name, "target": target, "updated_at": 0, "phases": {}, "order": [], "nodes": {}}
+
+
+def load_journal(client, name, namespace=JOURNAL_NAMESPACE, warn=None):
+    """Return the newer of the local and the ConfigMap copy of journal ``name``."""
+    copies = []
+    try:
+        with open(state_path(client, f"journal-{name}.json")) as fh:
+            copies.append(json.load(fh))
+    except (OSError, ValueError):
+        pass
+
+    configmap, error = client.get("configmaps", configmap_name(name), namespace=namespace)
+    if error and error.status != 404:
+        if warn:
+            warn(f"Could not read the journal ConfigMap, using the local copy: {error}")
+    elif configmap:
+        try:
+            copies.append(json.loads(configmap.get("data", {}).get(JOURNAL_KEY, "")))
+        except ValueError:
+            pass
+
+    copies = [copy for copy in copies if isinstance(copy, dict) and copy.get("journal") == name]
+    if not copies:
+        return new_journal(name)
+    return max(copies, key=lambda copy: copy.get("updated_at", 0))
+
+
+def save_journal(client, journal, namespace=JOURNAL_NAMESPACE, warn=None):
+    """Store the journal locally and mirror it to its ConfigMap; mirroring failures only warn."""
+    journal["updated_at"] = time.time()
+    write_json(state_path(client, f"journal-{journal['journal']}.json"), journal)
+
+    name = configmap_name(journal["journal"])
+    data = {"data": {JOURNAL_KEY: json.dumps(journal, sort_keys=True)}}
+    _, error = client.patch("configmaps", name, data, namespace=namespace)
+    if error and error.status == 404:
+        body = dict(data, metadata={"name": name, "labels": {"app.kubernetes.io/managed-by": "sdn-ovn-migration"}})
+        _, error = client.create("configmaps", body, namespace=namespace)
+    if error and warn:
+        warn(f"Could not mirror the journal to ConfigMap {namespace}/{name}: {error}")
+
+
+def observe(client, refs):
+    """Return the resourceVersion and generation of each ``resource[/name]`` reference.
+
+    A reference without a name records every object of that resource.
+    """
+    observed = []
+    for ref in refs:
+        resource, _, name = ref.partition("/")
+        if name:
+            obj, error = client.get(resource, name)
+            objects = [obj] if not error else []
+            if error and error.status != 404:
+                raise error
+        else:
+            objects, error = client.list(resource)
+            if error:
+                raise error
+        for obj in objects:
+            metadata = obj.get("metadata", {})
+            observed.append({
+                "resource": resource,
+                "name": metadata.get("name"),
+                "resourceVersion": metadata.get("resourceVersion"),
+                "generation": metadata.get("generation"),
+            })
+    return observed
+
+
+def validate_phase(client, phase):
+    """Return ``(valid, reason)`` for a recorded phase, re-reading only the objects it recorded."""
+    for recorded in phase.get("observed", []):
+        obj, error = client.get(recorded["resource"], recorded["name"])
+        if error:
+            return False, f"{recorded['resource']}/{recorded['name']} could not be read: {error}"
+        generation = obj.get("metadata", {}).get("generation")
+        if recorded.get("generation") is not None and generation != recorded["generation"]:
+            return False, (f"{recorded['resource']}/{recorded['name']} changed since the phase completed "
+                           f"(generation {recorded['generation']} -> {generation})")
+    for expected in phase.get("expect", []):
+        obj, error = client.get(expected["resource"], expected["name"])
+        if error:
+            return False, f"{expected['resource']}/{expected['name']} could not be read: {error}"
+        value = get_field(obj, expected["field"])
+        if value != expected["value"]:
+            return False, (f"{expected['resource']}/{expected['name']} {expected['field']} is {value!r}, "
+                           f"expected {expected['value']!r}")
+    return True, None
+
+
+def completed_phases(client, journal):
+    """Return ``(phases, invalid)``: the leading run of still-valid phases and the first invalid one."""
+    phases = []
+    for name in journal.get("order", []):
+        valid, reason = validate_phase(client, journal["phases"][name])
+        if not valid:
+            return phases, {"phase": name, "reason": reason}
+        phases.append(name)
+    return phases, None
+
+
+def record_phase(client, journal, phase, refs=(), expect=(), data=None, record_refs=()):
+    """Mark ``phase`` complete with the current state of the referenced objects.
+
+    ``refs`` must keep their generation for the phase to stay complete,
+    ``record_refs`` are stored for reference only.
+    """
+    if phase in journal["order"]:
+        journal["order"].remove(phase)
+    journal["order"].append(phase)
+    journal["phases"][phase] = {
+        "completed_at": time.time(),
+        "observed": observe(client, refs),
+        "recorded": observe(client, record_refs),
+        "expect": list(expect),
+        "data": data or {},
+    }
+
+
+def forget_phases(journal, phases):
+    """Drop phases (and everything completed after them) so they run again."""
+    order = journal.get("order", [])
+    indexes = [order.index(phase) for phase in phases if phase in order]
+    if not indexes:
+        return
+    for phase in order[min(indexes):]:
+        journal["phases"].pop(phase, None)
+    journal["order"] = order[:min(indexes)]
+
+
+def record_node(journal, node, boot_id, phase):
+    """Remember the bootID a node came back with after it was rebooted in ``phase``."""
+    journal["nodes"][node] = {"phase": phase, "boot_id": boot_id, "rebooted_at": time.time()}
+
+
+def rebooted_nodes(journal, nodes, phase):
+    """Return the names of ``nodes`` that still run the boot recorded for ``phase``."""
+    done = set()
+    for node in nodes:
+        name = node["metadata"]["name"]
+        entry = journal.get("nodes", {}).get(name)
+        boot_id = node.get("status", {}).get("nodeInfo", {}).get("bootID")
+        if entry and entry.get("phase") == phase and boot_id and entry.get("boot_id") == boot_id:
+            done.add(name)
+    return done
@@ -0,0 +1,472 @@
+"""Minimal in-process Kubernetes/OpenShift API client shared by the modules.
+
+The client reads ``$KUBECONFIG`` (or a given kubeconfig) once per process and
+keeps a small pool of keep-alive HTTP(S) connections to the API server, so
+modules no longer fork ``/bin/sh`` and ``oc`` for every read.
+"""
+
+import base64
+import http.client
+import json
+import os
+import ssl
+import tempfile
+import threading
+from datetime import datetime, timezone
+from urllib.parse import urlencode, urlsplit
+
+from ansible.module_utils import cassette, metrics
+
+try:
+    import yaml
+    HAS_YAML = True
+except ImportError:
+    HAS_YAML = False
+
+
+# Short resource names used by the modules -> (API prefix, plural, namespaced)
+RESOURCES = {
+    "nodes": ("api/v1", "nodes", False),
+    "pods": ("api/v1", "pods", True),
+    "namespaces": ("api/v1", "namespaces", False),
+    "configmaps": ("api/v1", "configmaps", True),
+    "daemonsets": ("apis/apps/v1", "daemonsets", True),
+    "deployments": ("apis/apps/v1", "deployments", True),
+    "poddisruptionbudgets": ("apis/policy/v1", "poddisruptionbudgets", True),
+    "networks.config": ("apis/config.openshift.io/v1", "networks", False),
+    "networks.operator": ("apis/operator.openshift.io/v1", "networks", False),
+    "clusterversions": ("apis/config.openshift.io/v1", "clusterversions", False),
+    "clusteroperators": ("apis/config.openshift.io/v1", "clusteroperators", False),
+    "machineconfigpools": ("apis/machineconfiguration.openshift.io/v1", "machineconfigpools", False),
+    "machineconfigs": ("apis/machineconfiguration.openshift.io/v1", "machineconfigs", False),
+    "users": ("apis/user.openshift.io/v1", "users", False),
+    "hostsubnets": ("apis/network.openshift.io/v1", "hostsubnets", False),
+    "netnamespaces": ("apis/network.openshift.io/v1", "netnamespaces", False),
+    "egressips": ("apis/k8s.ovn.org/v1", "egressips", False),
+}
+
+TRANSIENT_STATUS = (429, 500, 502, 503, 504)
+
+
+class KubeConfigError(Exception):
+    """Raised when the kubeconfig cannot be loaded or is not supported."""
+
+
+class KubeAPIError(Exception):
+    """Raised when a request to the API server fails."""
+
+    def __init__(self, message, status=None, reason=None):
+        super().__init__(message)
+        self.status = status
+        self.reason = reason
+
+
+def resource_path(resource, name=None, namespace=None, subresource=None):
+    """Build the API path for a resource from the RESOURCES table."""
+    try:
+        prefix, plural, namespaced = RESOURCES[resource]
+    except KeyError:
+        raise KubeAPIError(f"Unknown resource '{resource}'.")
+    path = f"/{prefix}"
+    if namespaced and namespace:
+        path += f"/namespaces/{namespace}"
+    path += f"/{plural}"
+    if name:
+        path += f"/{name}"
+    if subresource:
+        path += f"/{subresource}"
+    return path
+
+
+def get_condition(obj, condition_type):
+    """Return a status condition of ``obj`` as a dict, or None if absent.
+
+    Condition types are compared case-insensitively, like ``oc wait --for=condition=``.
+    """
+    for condition in obj.get("status", {}).get("conditions") or []:
+        if condition.get("type", "").lower() == condition_type.lower():
+            return condition
+    return None
+
+
+def condition_status(obj, condition_type):
+    """Return the status of a status condition ("True"/"False"/"Unknown"), or None if absent."""
+    condition = get_condition(obj, condition_type)
+    return condition.get("status") if condition else None
+
+
+def selector_matches(selector, labels):
+    """Return True when a label selector (matchLabels and matchExpressions) selects ``labels``.
+
+    A missing selector selects nothing, an empty one everything.
+    """
+    if selector is None:
+        return False
+    for key, value in (selector.get("matchLabels") or {}).items():
+        if labels.get(key) != value:
+            return False
+    for expression in selector.get("matchExpressions") or []:
+        key, operator, values = expression.get("key"), expression.get("operator"), expression.get("values") or []
+        if operator == "In" and labels.get(key) not in values:
+            return False
+        if operator == "NotIn" and key in labels and labels[key] in values:
+            return False
+        if operator == "Exists" and key not in labels:
+            return False
+        if operator == "DoesNotExist" and key in labels:
+            return False
+    return True
+
+
+def label_selector(selector):
+    """Return a label selector (matchLabels and matchExpressions) as a ``labelSelector`` query string."""
+    terms = [f"{key}={value}" for key, value in sorted((selector.get("matchLabels") or {}).items())]
+    for expression in selector.get("matchExpressions") or []:
+        key, operator, values = expression.get("key"), expression.get("operator"), expression.get("values") or []
+        if operator in ("In", "NotIn"):
+            terms.append(f"{key} {operator.lower()} ({','.join(values)})")
+        elif operator == "Exists":
+            terms.append(key)
+        elif operator == "DoesNotExist":
+            terms.append(f"!{key}")
+    return ",".join(terms)
+
+
+def parse_time(value):
+    """Return the epoch seconds of a Kubernetes timestamp such as ``2024-01-01T00:00:00Z``."""
+    if not value:
+        return None
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc).timestamp()
+
+
+def _materialize(data, directory, suffix):
+    """Write base64 kubeconfig data to a temporary file and return its path."""
+    handle, path = tempfile.mkstemp(suffix=suffix, dir=directory)
+    with os.fdopen(handle, "wb") as fh:
+        fh.write(base64.b64decode(data))
+    return path
+
+
+def _named(entries, name, kind):
+    for entry in entries or []:
+        if entry.get("name") == name:
+            return entry.get(kind) or {}
+    raise KubeConfigError(f"{kind} '{name}' not found in kubeconfig.")
+
+
+class KubeClient:
+    """Talk to the API server over a pool of keep-alive connections."""
+
+    def __init__(self, server, token=None, username=None, password=None,
+                 ca_file=None, cert_file=None, key_file=None, insecure=False,
+                 timeout=30, pool_size=8):
+        parts = urlsplit(server)
+        self.server = server.rstrip("/")
+        self.scheme = parts.scheme or "https"
+        self.host = parts.hostname
+        self.port = parts.port or (443 if self.scheme == "https" else 80)
+        self.base_path = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.state_dir = None  # Per-cluster state files go under $SDN_OVN_STATE_DIR unless set
+        self.headers = {"Accept": "application/json", "User-Agent": "sdn-to-ovn-migration"}
+        if token:
+            self.headers["Authorization"] = f"Bearer {token}"
+        elif username and password:
+            basic = base64.b64encode(f"{username}:{password}".encode()).decode()
+            self.headers["Authorization"] = f"Basic {basic}"
+
+        self.ssl_context = None
+        if self.scheme == "https":
+            self.ssl_context = ssl.create_default_context(cafile=ca_file)
+            if insecure:
+                self.ssl_context.check_hostname = False
+                self.ssl_context.verify_mode = ssl.CERT_NONE
+            if cert_file:
+                self.ssl_context.load_cert_chain(cert_file, key_file)
+
+        self._idle = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_kubeconfig(cls, path=None, **kwargs):
+        """Build a client from the current context of a kubeconfig file."""
+        path = path or os.environ.get("KUBECONFIG", "").split(os.pathsep)[0]
+        if not path:
+            raise KubeConfigError("The KUBECONFIG environment variable is not set.")
+        if not os.path.isfile(path):
+            raise KubeConfigError(f"The KUBECONFIG file does not exist at the specified path: {path}.")
+        if not HAS_YAML:
+            raise KubeConfigError("PyYAML is required to read the kubeconfig file.")
+
+        with open(path) as fh:
+            config = yaml.safe_load(fh) or {}
+
+        base_dir = os.path.dirname(os.path.abspath(path))
+        context = _named(config.get("contexts"), config.get("current-context"), "context")
+        cluster = _named(config.get("clusters"), context.get("cluster"), "cluster")
+        user = _named(config.get("users"), context.get("user"), "user")
+
+        if user.get("exec") or user.get("auth-provider"):
+            raise KubeConfigError(
+                "Credential plugins are not supported; log in with `oc login` to get a token-based kubeconfig."
+            )
+
+        def resolve(value):
+            return value if not value or os.path.isabs(value) else os.path.join(base_dir, value)
+
+        token = user.get("token")
+        if not token and user.get("tokenFile"):
+            with open(resolve(user["tokenFile"])) as fh:
+                token = fh.read().strip()
+
+        temp_dir = tempfile.mkdtemp(prefix="kubeclient-")
+        temp_files = []
+        try:
+            ca_file = resolve(cluster.get("certificate-authority"))
+            if cluster.get("certificate-authority-data"):
+                ca_file = _materialize(cluster["certificate-authority-data"], temp_dir, ".crt")
+                temp_files.append(ca_file)
+            cert_file = resolve(user.get("client-certificate"))
+            if user.get("client-certificate-data"):
+                cert_file = _materialize(user["client-certificate-data"], temp_dir, ".crt")
+                temp_files.append(cert_file)
+            key_file = resolve(user.get("client-key"))
+            if user.get("client-key-data"):
+                key_file = _materialize(user["client-key-data"], temp_dir, ".key")
+                temp_files.append(key_file)
+
+            # The SSL context loads everything into memory, so the temporary files can go right away.
+            return cls(
+                cluster["server"],
+                token=token,
+                username=user.get("username"),
+                password=user.get("password"),
+                ca_file=ca_file,
+                cert_file=cert_file,
+                key_file=key_file,
+                insecure=cluster.get("insecure-skip-tls-verify", False),
+                **kwargs,
+            )
+        finally:
+            for temp_file in temp_files:
+                os.unlink(temp_file)
+            os.rmdir(temp_dir)
+
+    def _connect(self, timeout):
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, self.port, timeout=timeout, context=self.ssl_context)
+        return http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+
+    def _acquire(self, timeout):
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            return self._connect(timeout), False
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+
+    def _release(self, conn):
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        """Close every idle pooled connection."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def _send(self, method, url, body, headers, timeout):
+        """Send one request (or serve it from the cassette being replayed)."""
+        return cassette.http_exchange(method, url, body, lambda: self._send_live(method, url, body, headers, timeout))
+
+    def _send_live(self, method, url, body, headers, timeout):
+        """Send one request, retrying once if a pooled connection went stale."""
+        while True:
+            conn, reused = self._acquire(timeout)
+            try:
+                conn.request(method, url, body=body, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                conn.close()
+                if reused:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+            if response.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            return response.status, response.reason, data
+
+    def request(self, method, path, params=None, body=None, content_type="application/json",
+                retries=1, delay=3, timeout=None):
+        """Perform an API request and return the decoded JSON body.
+
+        Connection failures and transient HTTP statuses are retried up to
+        ``retries`` attempts; any other failure raises ``KubeAPIError``.
+        """
+        url = self.base_path + path
+        if params:
+            url += "?" + urlencode({k: v for k, v in params.items() if v is not None})
+        headers = dict(self.headers)
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers["Content-Type"] = content_type
+
+        error = None
+        for attempt in range(max(retries, 1)):
+            if attempt:
+                metrics.count("api_retries")
+                metrics.sleep(delay)
+            metrics.count("api_calls")
+            metrics.count(f"api_calls_{method.lower()}")
+            try:
+                status, reason, data = self._send(method, url, payload, headers, timeout or self.timeout)
+            except (OSError, http.client.HTTPException) as ex:
+                error = KubeAPIError(f"{method} {path} failed: {ex}")
+                continue
+
+            metrics.count("api_bytes_received", len(data))
+            if 200 <= status < 300:
+                return json.loads(data) if data else {}
+
+            message = reason
+            try:
+                message = json.loads(data).get("message", reason)
+            except ValueError:
+                pass
+            error = KubeAPIError(f"{method} {path} failed: {status} {message}", status=status, reason=reason)
+            if status not in TRANSIENT_STATUS:
+                break
+        raise error
+
+    def _call(self, method, path, **kwargs):
+        try:
+            return self.request(method, path, **kwargs), None
+        except KubeAPIError as ex:
+            return None, ex
+
+    def watch(self, resource, namespace=None, params=None, timeout=None):
+        """Open a watch stream and yield its events as decoded dicts.
+
+        The stream uses its own connection, which is closed when the server
+        ends the watch or the caller stops iterating.
+        """
+        url = self.base_path + resource_path(resource, namespace=namespace)
+        params = {k: v for k, v in dict(params or {}, watch="true").items() if v is not None}
+        url += "?" + urlencode(params)
+        return cassette.stream_exchange(url, lambda: self._watch_live(resource, url, timeout),
+                                        lambda message, status: KubeAPIError(message, status=status))
+
+    def _watch_live(self, resource, url, timeout):
+        conn = self._connect(timeout or self.timeout)
+        metrics.count("api_watches")
+        try:
+            conn.request("GET", url, headers=self.headers)
+            response = conn.getresponse()
+            if response.status != 200:
+                message = response.reason
+                try:
+                    message = json.loads(response.read()).get("message", message)
+                except ValueError:
+                    pass
+                raise KubeAPIError(f"WATCH {resource} failed: {response.status} {message}",
+                                   status=response.status, reason=response.reason)
+            while True:
+                line = response.readline()
+                if not line:
+                    return
+                if line.strip():
+                    metrics.count("watch_events")
+                    metrics.count("api_bytes_received", len(line))
+                    yield json.loads(line)
+        except (OSError, http.client.HTTPException) as ex:
+            raise KubeAPIError(f"WATCH {resource} failed: {ex}")
+        finally:
+            conn.close()
+
+    def get(self, resource, name=None, namespace=None, params=None, **kwargs):
+        """Fetch one object (or a raw list) and return ``(obj, error)``."""
+        return self._call("GET", resource_path(resource, name, namespace), params=params, **kwargs)
+
+    def list(self, resource, namespace=None, label_selector=None, field_selector=None, **kwargs):
+        """List objects and return ``(items, error)``."""
+        params = {"labelSelector": label_selector, "fieldSelector": field_selector}
+        result, error = self.get(resource, namespace=namespace, params=params, **kwargs)
+        if error:
+            return None, error
+        return result.get("items", []), None
+
+    def list_pages(self, resource, namespace=None, label_selector=None, field_selector=None, limit=500, **kwargs):
+        """Yield the objects of a list one page of at most ``limit`` items at a time.
+
+        The pages are chained with the ``continue`` token, so only one page is
+        held in memory. A page that cannot be fetched raises ``KubeAPIError``.
+        """
+        params = {"labelSelector": label_selector, "fieldSelector": field_selector, "limit": limit}
+        path = resource_path(resource, namespace=namespace)
+        while True:
+            result = self.request("GET", path, params=params, **kwargs)
+            yield result.get("items", [])
+            token = result.get("metadata", {}).get("continue")
+            if not token:
+                return
+            params["continue"] = token
+
+    def patch(self, resource, name, body, namespace=None, patch_type="merge", **kwargs):
+        """Apply a patch (merge by default) and return ``(obj, error)``."""
+        content_type = {
+            "merge": "application/merge-patch+json",
+            "strategic": "application/strategic-merge-patch+json",
+            "json": "application/json-patch+json",
+        }[patch_type]
+        return self._call("PATCH", resource_path(resource, name, namespace), body=body,
+                          content_type=content_type, **kwargs)
+
+    def create(self, resource, body, namespace=None, subresource=None, name=None, **kwargs):
+        """Create an object (or post to a subresource) and return ``(obj, error)``."""
+        return self._call("POST", resource_path(resource, name, namespace, subresource), body=body, **kwargs)
+
+    def delete(self, resource, name, namespace=None, **kwargs):
+        """Delete an object and return ``(status, error)``."""
+        return self._call("DELETE", resource_path(resource, name, namespace), **kwargs)
+
+
+_CLIENTS = {}
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_client(kubeconfig=None, state_dir=None, **kwargs):
+    """Return the process-wide client of a kubeconfig, built on first use (unless replaying a cassette).
+
+    ``kubeconfig`` defaults to ``$KUBECONFIG`` and ``state_dir`` to
+    ``$SDN_OVN_STATE_DIR``. The controller-side checks pass the ones of their
+    task, so checks for several clusters in one process never share a client
+    or touch the process environment.
+    """
+    key = (kubeconfig or os.environ.get("KUBECONFIG"), state_dir)
+    with _CLIENT_LOCK:
+        recording = cassette.active()
+        client = _CLIENTS.get(key)
+        if client is None:
+            if recording is not None and recording.replaying:
+                # Every request is served from the cassette, so no kubeconfig or credentials are needed
+                client = KubeClient(recording.server or "https://replay.invalid", **kwargs)
+            else:
+                client = KubeClient.from_kubeconfig(kubeconfig, **kwargs)
+            client.state_dir = state_dir
+            _CLIENTS[key] = client
+        if recording is not None and recording.server is None:
+            recording.server = client.server
+        return client
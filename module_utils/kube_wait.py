@@ -0,0 +1,104 @@
+"""Watch-based condition waiter.
+
+``wait_for`` lists the watched objects once, then follows a watch stream from
+the list's resourceVersion and evaluates a predicate on every event, so it
+returns as soon as the condition holds instead of on the next poll tick.
+"""
+
+import math
+import time
+
+from ansible.module_utils import metrics
+from ansible.module_utils.kube_client import KubeAPIError
+from ansible.module_utils.polling import Backoff
+
+
+def _key(obj):
+    metadata = obj.get("metadata", {})
+    return metadata.get("namespace"), metadata.get("name")
+
+
+def wait_for(client, resource, predicate, timeout, name=None, namespace=None,
+             label_selector=None, field_selector=None, retry_interval=5, on_error=None):
+    """Wait until ``predicate(objects)`` is true for the watched objects.
+
+    ``objects`` is the current list of objects matching the selectors (or the
+    single object called ``name``), kept up to date from watch events. The
+    watch resumes from the last seen resourceVersion when the server closes
+    the stream, and falls back to a fresh list when that version has expired
+    (410 Gone). Returns ``(satisfied, objects)``. The wait is recorded in the
+    module metrics with the number of times the predicate was evaluated.
+    """
+    started = time.time()
+    evaluations = [0]
+
+    def evaluate(objects):
+        evaluations[0] += 1
+        return predicate(objects)
+
+    satisfied, objects = _wait(client, resource, evaluate, started + timeout, name, namespace,
+                               label_selector, field_selector, retry_interval, on_error)
+    metrics.record_wait(f"{resource}/{name}" if name else resource, started, satisfied, evaluations[0])
+    return satisfied, objects
+
+
+def _wait(client, resource, predicate, deadline, name, namespace, label_selector, field_selector,
+          retry_interval, on_error):
+    if name:
+        name_selector = f"metadata.name={name}"
+        field_selector = f"{field_selector},{name_selector}" if field_selector else name_selector
+    selectors = {"labelSelector": label_selector, "fieldSelector": field_selector}
+
+    objects = {}
+    resource_version = None
+    backoff = Backoff(interval=retry_interval, max_interval=max(retry_interval, 30))
+
+    while True:
+        remaining = deadline - time.time()
+        try:
+            if resource_version is None:
+                listing, error = client.get(resource, namespace=namespace, params=selectors)
+                if error:
+                    raise error
+                objects = {_key(obj): obj for obj in listing.get("items", [])}
+                resource_version = listing.get("metadata", {}).get("resourceVersion")
+                if predicate(list(objects.values())):
+                    return True, list(objects.values())
+                remaining = deadline - time.time()
+
+            if remaining <= 0:
+                return False, list(objects.values())
+
+            params = dict(selectors, resourceVersion=resource_version, allowWatchBookmarks="true",
+                          timeoutSeconds=max(1, math.ceil(remaining)))
+            for event in client.watch(resource, namespace=namespace, params=params, timeout=remaining + 10):
+                event_type = event.get("type")
+                obj = event.get("object", {})
+                if event_type == "ERROR":
+                    if obj.get("code") == 410:
+                        resource_version = None
+                        break
+                    raise KubeAPIError(f"WATCH {resource} failed: {obj.get('message')}", status=obj.get("code"))
+
+                backoff.reset()
+                resource_version = obj.get("metadata", {}).get("resourceVersion", resource_version)
+                if event_type == "BOOKMARK":
+                    continue
+                if event_type == "DELETED":
+                    objects.pop(_key(obj), None)
+                else:
+                    objects[_key(obj)] = obj
+
+                if predicate(list(objects.values())):
+                    return True, list(objects.values())
+                if time.time() >= deadline:
+                    return False, list(objects.values())
+        except KubeAPIError as ex:
+            if ex.status == 410:
+                resource_version = None
+                continue
+            if on_error:
+                on_error(ex)
+            if time.time() >= deadline:
+                return False, list(objects.values())
+            metrics.sleep(min(backoff.next_delay(), max(deadline - time.time(), 0)))
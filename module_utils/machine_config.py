@@ -0,0 +1,154 @@
+"""MachineConfigPool membership, rendered MachineConfig differences and pausing.
+
+A pool's ``status.configuration`` names the rendered MachineConfig its nodes
+run, ``spec.configuration`` the one the render controller wants them on. The
+two differ from the moment the MCO renders a change for the pool until the
+last node of the pool runs it. ``render_current`` tells whether the render
+controller caught up with a pool: its target holds the merged files and units
+of exactly the MachineConfigs its ``machineConfigSelector`` selects now, so a
+pool whose target did not move is confirmed unchanged rather than not yet
+rendered. ``config_changes`` then says what a moved target changes.
+
+``set_pools_paused`` pauses or resumes every pool, custom pools included,
+with one list and one concurrent round of patches.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from ansible.module_utils.kube_client import KubeAPIError, selector_matches
+from ansible.module_utils.polling import poll
+
+WORKER_POOL = "worker"
+
+
+def node_pool(node, pools):
+    """Return the name of the pool a node belongs to, or None.
+
+    Nodes of a custom pool usually keep the worker role label as well; like
+    the MCO, the custom pool wins over the worker pool.
+    """
+    labels = node.get("metadata", {}).get("labels") or {}
+    names = sorted(pool["metadata"]["name"] for pool in pools
+                   if selector_matches(pool.get("spec", {}).get("nodeSelector"), labels))
+    if len(names) > 1 and WORKER_POOL in names:
+        names.remove(WORKER_POOL)
+    return names[0] if names else None
+
+
+def rendered_configs(pool):
+    """Return ``(current, target)``, the rendered config the pool runs and the one it is moving to."""
+    return (pool.get("status", {}).get("configuration", {}).get("name"),
+            pool.get("spec", {}).get("configuration", {}).get("name"))
+
+
+def _files(machine_config):
+    files = machine_config.get("spec", {}).get("config", {}).get("storage", {}).get("files") or []
+    return {item.get("path"): (item.get("contents"), item.get("mode"), item.get("overwrite")) for item in files}
+
+
+def _units(machine_config):
+    units = machine_config.get("spec", {}).get("config", {}).get("systemd", {}).get("units") or []
+    return {item.get("name"): item for item in units}
+
+
+def _changed_keys(current, target):
+    return sorted(key for key in set(current) | set(target) if current.get(key) != target.get(key))
+
+
+def config_changes(current, target):
+    """Return what differs between two rendered MachineConfigs: files, units, other Ignition and OS settings."""
+    current_spec, target_spec = current.get("spec", {}), target.get("spec", {})
+    current_config, target_config = current_spec.get("config", {}), target_spec.get("config", {})
+    return {
+        "files": _changed_keys(_files(current), _files(target)),
+        "units": _changed_keys(_units(current), _units(target)),
+        "ignition": sorted(key for key in set(current_config) | set(target_config)
+                           if key not in ("storage", "systemd") and current_config.get(key) != target_config.get(key)),
+        "os": sorted(field for field in ("osImageURL", "kernelArguments", "kernelType", "extensions", "fips")
+                     if current_spec.get(field) != target_spec.get(field)),
+    }
+
+
+def has_changes(changes):
+    return any(changes.values())
+
+
+def render_current(pool, sources, rendered):
+    """Return True once the pool's target rendered config is the render of ``sources``.
+
+    ``sources`` are the MachineConfigs the pool's ``machineConfigSelector``
+    selects now and ``rendered`` the target rendered MachineConfig. The pool
+    must have observed its latest spec, list exactly those sources, and its
+    target must hold their files and units merged by name, later names
+    winning, the way the render controller merges them.
+    """
+    metadata, status = pool.get("metadata", {}), pool.get("status", {})
+    if status.get("observedGeneration", 0) < metadata.get("generation", 0) or rendered is None:
+        return False
+    listed = {source.get("name") for source in pool.get("spec", {}).get("configuration", {}).get("source") or []}
+    if listed != {source["metadata"]["name"] for source in sources}:
+        return False
+    files, units = {}, {}
+    for source in sorted(sources, key=lambda source: source["metadata"]["name"]):
+        files.update(_files(source))
+        units.update(_units(source))
+    return files == _files(rendered) and units == _units(rendered)
+
+
+def patch_paused(client, names, paused, timeout=None):
+    """Patch ``spec.paused`` of the named pools concurrently.
+
+    Returns ``{name: error}``; the error is None when the patch response
+    shows ``spec.paused`` at the requested value.
+    """
+    def patch(name):
+        pool, error = client.patch("machineconfigpools", name, {"spec": {"paused": paused}}, timeout=timeout)
+        if error:
+            return error
+        if pool.get("spec", {}).get("paused", False) != paused:
+            return KubeAPIError(f"PATCH machineconfigpools/{name} returned spec.paused={not paused}.")
+        return None
+
+    if not names:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(len(names), 10)) as executor:
+        return dict(zip(names, executor.map(patch, names)))
+
+
+def set_pools_paused(client, paused, names=None, label_selector=None, timeout=300, interval=10, on_error=None,
+                     check_mode=False):
+    """Set ``spec.paused`` on every pool (or the ``names``/``label_selector`` subset) and return ``(result, error)``.
+
+    The pools are listed once; the ones not at the requested value yet are
+    patched concurrently, and the ones whose patch failed are patched again
+    with backoff until ``timeout``. ``result`` lists the ``patched``,
+    ``unchanged`` and still ``pending`` pool names.
+    """
+    pools, error = client.list("machineconfigpools", label_selector=label_selector, retries=3, delay=5)
+    if error:
+        return None, error
+    found = {pool["metadata"]["name"]: pool for pool in pools}
+    missing = sorted(set(names or ()) - set(found))
+    if missing:
+        return None, KubeAPIError(f"MachineConfigPools not found: {', '.join(missing)}", status=404)
+
+    selected = [found[name] for name in sorted(names if names is not None else found)]
+    pending = [pool["metadata"]["name"] for pool in selected if pool.get("spec", {}).get("paused", False) != paused]
+    result = {"patched": [], "unchanged": sorted(set(pool["metadata"]["name"] for pool in selected) - set(pending)),
+              "pending": pending}
+    if check_mode or not pending:
+        return result, None
+
+    def patch_pending(timeout):
+        errors = patch_paused(client, list(result["pending"]), paused, timeout=timeout)
+        for name, error in errors.items():
+            if not error:
+                result["pending"].remove(name)
+                result["patched"].append(name)
+        failed = [error for error in errors.values() if error]
+        return None, failed[0] if failed else None
+
+    _, error = poll(patch_pending, timeout, interval=interval, max_interval=max(interval, 60), on_error=on_error,
+                    name="machineconfigpools paused")
+    result["patched"].sort()
+    return result, error
@@ -0,0 +1,83 @@
+"""In-process counters and wait timings reported back by the modules.
+
+The client, ``poll``, ``run_command`` and ``wait_for`` record into a single
+process-wide collector: API requests per method, watch streams and events,
+``oc`` invocations, poll iterations, seconds spent sleeping between attempts,
+and one entry per wait with its time-to-condition. ``attach(module)`` makes
+the module's ``exit_json``/``fail_json`` include that data as ``metrics``,
+which the ``migration_metrics`` callback plugin turns into a timeline and a
+Prometheus textfile. It also hands the module to the cassette being recorded.
+"""
+
+import threading
+import time
+
+from ansible.module_utils import cassette
+
+_lock = threading.Lock()
+_counters = {}
+_waits = []
+_started = time.time()
+
+
+def count(name, amount=1):
+    """Add ``amount`` to the counter ``name``."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def record_wait(name, started, satisfied, iterations):
+    """Record one wait: how long it took from ``started`` and whether the condition held."""
+    with _lock:
+        _waits.append({
+            "name": name,
+            "seconds": round(time.time() - started, 3),
+            "satisfied": bool(satisfied),
+            "iterations": iterations,
+        })
+
+
+def sleep(seconds):
+    """``time.sleep`` that also accounts the time spent waiting between attempts."""
+    if seconds > 0:
+        count("sleep_seconds", seconds)
+        if not cassette.replaying():
+            time.sleep(seconds)
+
+
+def reset():
+    """Start a new collection, for a process that runs several checks one after another."""
+    global _started
+    with _lock:
+        _counters.clear()
+        del _waits[:]
+        _started = time.time()
+
+
+def snapshot():
+    """Return the metrics collected so far in this process."""
+    with _lock:
+        counters = {name: round(value, 3) if isinstance(value, float) else value for name, value in _counters.items()}
+        return {
+            "duration": round(time.time() - _started, 3),
+            "counters": dict(sorted(counters.items())),
+            "waits": list(_waits),
+        }
+
+
+def attach(module):
+    """Add ``metrics`` to everything ``module`` returns."""
+    cassette.begin(module)
+    exit_json, fail_json = module.exit_json, module.fail_json
+
+    def exit_with_metrics(**kwargs):
+        kwargs.setdefault("metrics", snapshot())
+        exit_json(**kwargs)
+
+    def fail_with_metrics(msg, **kwargs):
+        kwargs.setdefault("metrics", snapshot())
+        fail_json(msg=msg, **kwargs)
+
+    module.exit_json = exit_with_metrics
+    module.fail_json = fail_with_metrics
+    return module
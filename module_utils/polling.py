@@ -0,0 +1,110 @@
+"""Polling primitives shared by the modules.
+
+``poll`` calls a ``(result, error)`` function until it succeeds and an optional
+success predicate holds, returning immediately on success. Attempts are spaced
+with exponential backoff plus jitter, every attempt gets its own deadline, and
+the whole loop is bounded by an overall timeout. ``run_command`` applies the
+same rules to the few ``oc`` invocations that remain.
+"""
+
+import random
+import subprocess
+import time
+
+from ansible.module_utils import cassette, metrics
+
+
+class PollTimeout(Exception):
+    """Returned as the error when the success predicate never held before the deadline."""
+
+
+class Backoff:
+    """Exponential backoff with jitter: interval, interval*factor, ... capped at max_interval."""
+
+    def __init__(self, interval=3, max_interval=30, factor=1.5, jitter=0.2):
+        self.interval = interval
+        self.max_interval = max_interval
+        self.factor = factor
+        self.jitter = jitter
+        self.attempt = 0
+
+    def next_delay(self):
+        delay = min(self.interval * self.factor ** self.attempt, self.max_interval)
+        self.attempt += 1
+        return max(0, delay * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def reset(self):
+        self.attempt = 0
+
+
+def poll(func, timeout, predicate=None, interval=3, max_interval=30, factor=1.5, jitter=0.2,
+         attempt_timeout=30, attempts=None, on_error=None, name="poll"):
+    """Call ``func(timeout=...)`` until it returns without error and ``predicate(result)`` holds.
+
+    ``func`` returns ``(result, error)`` and receives the time left for that
+    attempt (at most ``attempt_timeout``). Returns ``(result, None)`` on success
+    or ``(last_result, error)`` once ``timeout`` seconds or ``attempts`` tries
+    are used up; ``error`` is the last error or a ``PollTimeout``. The wait is
+    recorded in the module metrics under ``name``.
+    """
+    started = time.time()
+    deadline = started + timeout
+    backoff = Backoff(interval, max_interval, factor, jitter)
+    result, error = None, None
+    attempt = 0
+
+    while True:
+        attempt += 1
+        metrics.count("poll_iterations")
+        remaining = deadline - time.time()
+        result, error = func(timeout=max(1, min(attempt_timeout, remaining)))
+        if error:
+            if on_error:
+                on_error(error)
+        elif predicate is None or predicate(result):
+            metrics.record_wait(name, started, True, attempt)
+            return result, None
+
+        if (attempts and attempt >= attempts) or time.time() >= deadline:
+            break
+        metrics.sleep(min(backoff.next_delay(), max(deadline - time.time(), 0)))
+        if time.time() >= deadline:
+            break
+
+    metrics.record_wait(name, started, False, attempt)
+    return result, error or PollTimeout(f"Condition not met after {attempt} attempts in {timeout}s.")
+
+
+def _run(command, timeout):
+    """Run ``command`` and return ``(returncode, stdout, stderr)``; the return code is None on timeout."""
+    try:
+        result = subprocess.run(command, shell=True, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return None, "", ""
+    return result.returncode, result.stdout, result.stderr
+
+
+def run_command(command, timeout=60, retries=1, delay=3):
+    """Run a shell command with a per-attempt timeout and retries; return ``(stdout, error)``.
+
+    Every attempt reports its own error; the one returned after the last
+    attempt also says how many attempts were made.
+    """
+    attempts = 0
+
+    def attempt(timeout):
+        nonlocal attempts
+        attempts += 1
+        metrics.count("oc_calls" if command.startswith("oc ") else "commands")
+        returncode, stdout, stderr = cassette.command_exchange(command, lambda: _run(command, timeout))
+        if returncode is None:
+            return None, f"Command '{command}' timed out after {timeout:.0f}s."
+        if returncode:
+            return None, f"Command '{command}' failed: {stderr.strip()}"
+        return stdout.strip(), None
+
+    stdout, error = poll(attempt, timeout * retries + delay * (retries - 1), interval=delay, factor=1, jitter=0,
+                         attempt_timeout=timeout, attempts=retries, name=command.split(" -")[0])
+    if error:
+        return None, f"{error} (after {attempts} attempts)"
+    return stdout, None
@@ -0,0 +1,348 @@
+"""Precheck functions shared by the individual check modules and ``run_prechecks``.
+
+Every check takes the module (for warnings) and the precheck parameters and
+returns ``(result, error)``: ``result`` is a dict of values to report, and
+``error`` is the failure message or None. ``CHECKS`` maps the precheck names
+accepted by ``run_prechecks`` to these functions. ``ARGUMENT_SPECS`` holds the
+argument spec of every read-only check module, shared with the action plugins
+that run the same checks on the controller. There the module carries its
+task's ``environment``, which takes precedence over the process environment.
+"""
+
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ansible.module_utils.kube_client import get_client, condition_status
+from ansible.module_utils.cluster_snapshot import DEFAULT_MAX_AGE, get_resource
+from ansible.module_utils.cidr_overlap import find_overlaps, to_range
+from ansible.module_utils.polling import poll, run_command
+
+
+def task_env(module, name):
+    """Return an environment variable of the task the check runs for."""
+    return (getattr(module, "environment", None) or {}).get(name) or os.environ.get(name)
+
+
+def task_client(module):
+    """Return the client of the task's cluster, from its KUBECONFIG and state directory."""
+    return get_client(kubeconfig=task_env(module, "KUBECONFIG"), state_dir=task_env(module, "SDN_OVN_STATE_DIR"))
+
+
+def check_kubeconfig(module, params):
+    """Check that KUBECONFIG is set and points to an existing file."""
+    kubeconfig_path = task_env(module, "KUBECONFIG")
+    if not kubeconfig_path:
+        return {}, "The KUBECONFIG environment variable is not set."
+    if not os.path.isfile(kubeconfig_path):
+        return ({"kubeconfig_path": kubeconfig_path},
+                f"The KUBECONFIG file does not exist at the specified path: {kubeconfig_path}.")
+    return {
+        "msg": f"KUBECONFIG is set, and the file exists at: {kubeconfig_path}.",
+        "kubeconfig_path": kubeconfig_path,
+    }, None
+
+
+def check_oc_client(module, params):
+    """Check that the oc binary is in PATH and works."""
+    if shutil.which("oc") is None:
+        return {}, "The oc binary is not present in the system's PATH."
+    version, error = run_command("oc version --client", timeout=30, retries=3)
+    if error:
+        return {}, f"The oc binary is present but not functional: {error}"
+    return {"version": version}, None
+
+
+def check_whoami(module, params):
+    """Check that the current user is ``system:admin`` (equivalent of ``oc whoami``)."""
+    user, error = task_client(module).get("users", "~", retries=3, delay=3)
+    if error:
+        return {}, "Failed to execute `oc whoami`. Ensure `oc` client is configured correctly."
+    if "system:admin" not in user.get("metadata", {}).get("name", ""):
+        return {}, "Not logged in as `system:admin`. Please switch to `system:admin`."
+    return {"message": "Logged in as `system:admin`."}, None
+
+
+ADDRESS_SOURCES = ["host_subnets", "node_addresses", "egress_ips"]
+
+
+def get_used_cidrs(module, timeout, snapshot_max_age=DEFAULT_MAX_AGE):
+    """Retrieve the cluster, service and machine networks as (cidr, kind) pairs."""
+    client = task_client(module)
+    network_config, _ = poll(
+        lambda timeout: get_resource(client, "network_config", snapshot_max_age, timeout=timeout),
+        timeout,
+        on_error=lambda error: module.warn(f"Retrying as got an error: {error}"),
+    )
+    networks = []
+    if network_config:
+        # Check clusterNetwork
+        cluster_networks = network_config.get("spec", {}).get("clusterNetwork", [])
+        for network in cluster_networks:
+            networks.append((network.get("cidr"), "clusterNetwork"))
+        # Check serviceNetwork
+        service_networks = network_config.get("spec", {}).get("serviceNetwork", [])
+        networks.extend((network, "serviceNetwork") for network in service_networks)
+        # Check machineNetwork
+        machine_networks = network_config.get("status", {}).get("networking", {}).get("machineNetwork", [])
+        for network in machine_networks:
+            networks.append((network.get("cidr"), "machineNetwork"))
+    return networks
+
+
+def list_optional(client, resource, timeout):
+    """List a resource that only exists with one of the network plugins; a missing API means no items."""
+    items, error = client.list(resource, timeout=timeout)
+    if error and error.status == 404:
+        return [], None
+    return items, error
+
+
+def get_address_ranges(module, sources, timeout, snapshot_max_age=DEFAULT_MAX_AGE):
+    """Collect HostSubnets, node addresses and EgressIPs as AddressRanges, fetched concurrently."""
+    client = task_client(module)
+    fetchers = {
+        "hostsubnets": lambda: list_optional(client, "hostsubnets", timeout),
+        "netnamespaces": lambda: list_optional(client, "netnamespaces", timeout),
+        "egressips": lambda: list_optional(client, "egressips", timeout),
+        "nodes": lambda: get_resource(client, "nodes", snapshot_max_age, timeout=timeout),
+    }
+    wanted = {
+        "host_subnets": ["hostsubnets"],
+        "egress_ips": ["hostsubnets", "netnamespaces", "egressips"],
+        "node_addresses": ["nodes"],
+    }
+    names = sorted({name for source in sources for name in wanted[source]})
+    if not names:
+        return []
+    with ThreadPoolExecutor(max_workers=len(names)) as executor:
+        fetched = dict(zip(names, executor.map(lambda name: fetchers[name](), names)))
+    for name, (_, error) in fetched.items():
+        if error:
+            raise error
+    objects = {name: items for name, (items, _) in fetched.items()}
+
+    ranges = []
+    for subnet in objects.get("hostsubnets", []):
+        owner = f"hostsubnet/{subnet['metadata']['name']}"
+        if "host_subnets" in sources and subnet.get("subnet"):
+            ranges.append(to_range(subnet["subnet"], "hostSubnet", owner))
+        if "egress_ips" in sources:
+            ranges.extend(to_range(cidr, "egressCIDR", owner) for cidr in subnet.get("egressCIDRs") or [])
+            ranges.extend(to_range(ip, "egressIP", owner) for ip in subnet.get("egressIPs") or [])
+    for namespace in objects.get("netnamespaces", []):
+        owner = f"netnamespace/{namespace['metadata']['name']}"
+        ranges.extend(to_range(ip, "egressIP", owner) for ip in namespace.get("egressIPs") or [])
+    for egress_ip in objects.get("egressips", []):
+        owner = f"egressip/{egress_ip['metadata']['name']}"
+        ranges.extend(to_range(ip, "egressIP", owner) for ip in egress_ip.get("spec", {}).get("egressIPs") or [])
+    for node in objects.get("nodes", []):
+        owner = f"node/{node['metadata']['name']}"
+        for address in node.get("status", {}).get("addresses") or []:
+            if address.get("type") in ("InternalIP", "ExternalIP"):
+                ranges.append(to_range(address["address"], "nodeAddress", owner))
+    return ranges
+
+
+def find_cidr_conflicts(conflicting_ranges, used_ranges, external_ranges=(), address_ranges=()):
+    """Find every conflicting overlap between the given ranges in a single sweep.
+
+    Returns ``(conflicting_cidrs, overlaps)``: the reserved ranges that are in
+    use, and every conflicting pair as a dict.
+    """
+    ranges = [to_range(cidr, "conflicting") for cidr in conflicting_ranges]
+    ranges += [to_range(cidr, "external") for cidr in external_ranges]
+    ranges += [to_range(cidr, kind) for cidr, kind in used_ranges if cidr]
+    ranges += list(address_ranges)
+
+    conflicting_cidrs = []
+    overlaps = []
+    for first, second in find_overlaps(ranges):
+        overlaps.append({
+            "cidr": first.cidr, "source": first.source,
+            "overlaps_cidr": second.cidr, "overlaps_source": second.source,
+        })
+        for reserved in (first, second):
+            if reserved.kind == "conflicting" and reserved.cidr not in conflicting_cidrs:
+                conflicting_cidrs.append(reserved.cidr)
+    return conflicting_cidrs, overlaps
+
+
+def check_cidr_ranges(module, params):
+    """Check the reserved and external ranges against every address space of the cluster."""
+    timeout = params["timeout"]
+    snapshot_max_age = params["snapshot_max_age"]
+    used_ranges = get_used_cidrs(module, timeout, snapshot_max_age)
+    address_ranges = get_address_ranges(module, params["sources"], timeout, snapshot_max_age)
+    conflicting_cidrs, overlaps = find_cidr_conflicts(
+        params["conflicting_ranges"], used_ranges, params["external_ranges"], address_ranges)
+    used_cidrs = [cidr for cidr, _ in used_ranges]
+    if overlaps:
+        conflicts = conflicting_cidrs or sorted({overlap["cidr"] for overlap in overlaps})
+        return {
+            "conflicting_cidrs": conflicting_cidrs,
+            "overlaps": overlaps,
+            "used_cidrs": used_cidrs,
+        }, f"Conflicting CIDR ranges found: {', '.join(conflicts)}"
+    return {
+        "msg": "No conflicting CIDR ranges found.",
+        "used_cidrs": used_cidrs,
+        "checked_ranges": len(used_ranges) + len(address_ranges),
+    }, None
+
+
+def check_network_policy_mode(module, params):
+    """Check that OpenShift SDN uses the NetworkPolicy isolation mode, the only one OVNKubernetes supports."""
+    client = task_client(module)
+    network_config, _ = poll(
+        lambda timeout: get_resource(client, "network_operator", params["snapshot_max_age"], timeout=timeout),
+        params["timeout"],
+        on_error=lambda error: module.warn(f"Retrying as got an error: {error}"),
+    )
+
+    mode = "unknown"
+    if network_config:
+        sdn_config = (
+            network_config.get("spec", {})
+            .get("defaultNetwork", {})
+            .get("openshiftSDNConfig", {})
+        )
+        mode = sdn_config.get("mode", "unknown")
+    if mode == "NetworkPolicy":
+        return {"msg": "The cluster is correctly configured with NetworkPolicy isolation mode.", "mode": mode}, None
+    if mode == "unknown":
+        return {
+            "msg": "Could not determine the isolation mode. Please check your configuration. The default mode is NetworkPolicy",
+            "mode": mode,
+        }, None
+    return {"mode": mode}, (
+        f"The cluster is not configured with NetworkPolicy isolation mode (current mode: '{mode}'). "
+        "OVNKubernetes supports only NetworkPolicy isolation mode. Please update your configuration."
+    )
+
+
+def get_ocp_version(module, params):
+    """Read the OpenShift version from the ClusterVersion history."""
+    client = task_client(module)
+    version_data, error = get_resource(client, "cluster_version", params["snapshot_max_age"])
+    if error:
+        version_data, error = client.get("clusterversions", "version", retries=params["retries"], delay=params["delay"])
+    if error:
+        return {}, str(error)
+    try:
+        return {"version": version_data["status"]["history"][0]["version"]}, None
+    except (KeyError, IndexError) as e:
+        return {}, f"Failed to parse OpenShift version: {str(e)}"
+
+
+def check_network_provider(module, params):
+    """Check that the cluster runs the expected network type."""
+    client = task_client(module)
+    network_config, error = poll(
+        lambda timeout: get_resource(client, "network_config", params["snapshot_max_age"], timeout=timeout),
+        params["timeout"],
+        on_error=lambda error: module.warn(f"Retrying as got an error: {error}"),
+    )
+    if error:
+        raise error
+    network_type = network_config.get("status", {}).get("networkType", None)
+    if network_type != params["expected_network_type"]:
+        return {"network_type": network_type}, (
+            f"Expected network provider {params['expected_network_type']}, but found {network_type}.")
+    return {"msg": f"The current network provider is {network_type}, as expected.", "network_type": network_type}, None
+
+
+def check_nodes_ready(module, params):
+    """Report the nodes that are not Ready; not-ready nodes are reported, not failed."""
+    client = task_client(module)
+    nodes, error = poll(
+        lambda timeout: get_resource(client, "nodes", params["snapshot_max_age"], timeout=timeout),
+        params["timeout"],
+        on_error=lambda error: module.warn(f"Retrying as got an error: {error}"),
+    )
+    if error:
+        raise error
+    not_ready_nodes = []
+    for node in nodes:
+        status = condition_status(node, "Ready") or "Unknown"
+        if status != "True":
+            not_ready_nodes.append({"name": node.get("metadata", {}).get("name"), "status": status})
+    if not_ready_nodes:
+        return {
+            "msg": "Some nodes are not in the Ready state. Please investigate the machine config daemon pod logs using the command `oc get pod -n openshift-machine-config-operator` and resolve any errors.",
+            "not_ready_nodes": not_ready_nodes,
+        }, None
+    return {"msg": "All nodes are in the Ready state.", "not_ready_nodes": []}, None
+
+
+CHECKS = {
+    "kubeconfig": check_kubeconfig,
+    "oc_client": check_oc_client,
+    "whoami": check_whoami,
+    "cidr_ranges": check_cidr_ranges,
+    "network_policy_mode": check_network_policy_mode,
+    "ocp_version": get_ocp_version,
+}
+
+
+def run_check(module, name, params):
+    """Run one precheck and return its outcome; exceptions count as a failed check."""
+    started = time.time()
+    try:
+        result, error = CHECKS[name](module, params)
+    except Exception as ex:
+        result, error = {}, str(ex)
+    outcome = dict(result, passed=not error, duration=round(time.time() - started, 2))
+    if error:
+        outcome["msg"] = error
+    return outcome
+
+
+def run_prechecks(module, params):
+    """Run the requested prechecks concurrently; the pass takes as long as the slowest check."""
+    names = list(dict.fromkeys(params["checks"]))
+    if not names:
+        return {"msg": "No prechecks requested.", "checks": {}, "failed_checks": []}, None
+
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=len(names)) as executor:
+        results = dict(zip(names, executor.map(lambda name: run_check(module, name, params), names)))
+    failed_checks = [name for name in names if not results[name]["passed"]]
+    result = {"checks": results, "failed_checks": failed_checks, "duration": round(time.time() - started, 2)}
+    if failed_checks:
+        return result, "Prechecks failed: " + "; ".join(f"{name}: {results[name]['msg']}" for name in failed_checks)
+    return dict(result, msg=f"All {len(names)} prechecks passed."), None
+
+
+CLUSTER_READ_ARGS = {
+    "timeout": {"type": "int", "default": 120},  # Timeout in seconds
+    "snapshot_max_age": {"type": "int", "default": DEFAULT_MAX_AGE},  # Accept snapshot data this fresh
+}
+RANGE_ARGS = {
+    "external_ranges": {"type": "list", "elements": "str", "default": []},
+    "sources": {"type": "list", "elements": "str", "choices": ADDRESS_SOURCES, "default": ADDRESS_SOURCES},
+}
+ARGUMENT_SPECS = {
+    "check_kubeconfig": {},
+    "check_oc_client": {},
+    "check_whoami": {},
+    "get_ocp_version": {
+        "retries": {"type": "int", "default": 3},
+        "delay": {"type": "int", "default": 5},
+        "snapshot_max_age": CLUSTER_READ_ARGS["snapshot_max_age"],
+    },
+    "check_network_provider": dict(CLUSTER_READ_ARGS, expected_network_type={"type": "str", "required": True}),
+    "check_network_policy_mode": CLUSTER_READ_ARGS,
+    "check_nodes_ready": CLUSTER_READ_ARGS,
+    "check_cidr_ranges": dict(CLUSTER_READ_ARGS, **RANGE_ARGS,
+                              conflicting_ranges={"type": "list", "elements": "str", "required": True}),
+    "run_prechecks": dict(
+        CLUSTER_READ_ARGS, **RANGE_ARGS,  # The timeout applies to each check
+        checks={"type": "list", "elements": "str", "choices": list(CHECKS),
+                "default": ["oc_client", "kubeconfig", "whoami"]},
+        conflicting_ranges={"type": "list", "elements": "str", "default": []},
+        retries={"type": "int", "default": 3},
+        delay={"type": "int", "default": 5},
+    ),
+}
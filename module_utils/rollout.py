@@ -0,0 +1,195 @@
+"""Follow the rollout of several DaemonSets and Deployments at once.
+
+Every workload is followed by its own watch (``kube_wait.wait_for``) on its
+``status`` fields, the same checks ``oc rollout status`` performs, so the
+wait ends the moment the last one converges. While some are still rolling
+out, their pods are listed every ``check_interval`` seconds to name the
+nodes that lag behind: pods of an older template generation or not Ready.
+A node is stuck once its pod waits in a crash or image pull back-off, or
+once its pod has not been Ready for ``stuck_after`` seconds. Ready pods of
+the older generation only wait for their turn and are never stuck.
+"""
+
+import concurrent.futures
+import time
+
+from ansible.module_utils.kube_client import condition_status
+from ansible.module_utils.kube_wait import wait_for
+
+PLURALS = {"daemonset": "daemonsets", "deployment": "deployments"}
+# The DaemonSet controller labels its pods with this template generation, which
+# only moves with the pod template while metadata.generation moves with any spec change
+TEMPLATE_GENERATION_ANNOTATION = "deprecated.daemonset.template.generation"
+STUCK_REASONS = ("CrashLoopBackOff", "ImagePullBackOff", "ErrImagePull", "CreateContainerConfigError",
+                 "CreateContainerError", "InvalidImageName")
+
+
+def workload_key(workload):
+    return f"{workload['kind']}/{workload['namespace']}/{workload['name']}"
+
+
+def rollout_status(kind, obj):
+    """Return ``(converged, counts)`` from the status of a DaemonSet or Deployment."""
+    metadata, spec, status = obj.get("metadata", {}), obj.get("spec", {}), obj.get("status", {})
+    observed = status.get("observedGeneration", 0) >= metadata.get("generation", 0)
+    if kind == "daemonset":
+        desired = status.get("desiredNumberScheduled", 0)
+        updated, available = status.get("updatedNumberScheduled", 0), status.get("numberAvailable", 0)
+        converged = observed and updated >= desired and available >= desired
+    else:
+        desired = spec.get("replicas", 1)
+        updated, available = status.get("updatedReplicas", 0), status.get("availableReplicas", 0)
+        converged = observed and updated >= desired and available >= desired and status.get("replicas", 0) <= desired
+    return converged, {"desired": desired, "updated": updated, "available": available}
+
+
+def _owned(kind, name, pod):
+    """Return True when the DaemonSet, or a ReplicaSet of the Deployment, called ``name`` owns the pod."""
+    for owner in pod["metadata"].get("ownerReferences") or []:
+        owner_kind, owner_name = owner.get("kind"), owner.get("name", "")
+        if kind == "daemonset" and owner_kind == "DaemonSet" and owner_name == name:
+            return True
+        if kind == "deployment" and owner_kind == "ReplicaSet" and owner_name.rsplit("-", 1)[0] == name:
+            return True
+    return False
+
+
+def _waiting_reason(pod):
+    for container in pod.get("status", {}).get("containerStatuses") or []:
+        reason = (container.get("state", {}).get("waiting") or {}).get("reason")
+        if reason:
+            return reason
+    return None
+
+
+class RolloutTracker:
+    """Rollout state of the workloads, with the lagging and stuck nodes of each."""
+
+    def __init__(self, workloads, stuck_after=300):
+        self.workloads = {workload_key(workload): workload for workload in workloads}
+        self.stuck_after = stuck_after
+        self.started = time.time()
+        self.objects = {}
+        self.status = {key: {"converged": False, "found": False} for key in self.workloads}
+        self.lagging = {}  # key -> {node: {"pod", "reason"}}
+        self.lagging_since = {}  # (key, node) -> first time seen lagging
+        self.stuck = {}  # (key, node) -> entry
+
+    def observe(self, key, objects):
+        """Update a workload from its watched object list; True once it converged."""
+        workload = self.workloads[key]
+        if not objects:
+            return False
+        self.objects[key] = objects[0]
+        converged, counts = rollout_status(workload["kind"], objects[0])
+        entry = self.status[key]
+        entry.update(counts, found=True)
+        if converged and not entry["converged"]:
+            entry.update(converged=True, seconds=round(time.time() - self.started, 1))
+            self.lagging.pop(key, None)
+        return converged
+
+    def pending(self):
+        return sorted(key for key, entry in self.status.items() if not entry["converged"])
+
+    def inspect(self, client, keys):
+        """List the pods of the ``keys`` workloads and return the newly stuck nodes."""
+        now, newly_stuck = time.time(), []
+        for key in keys:
+            workload, obj = self.workloads[key], self.objects.get(key)
+            if obj is None:
+                continue
+            selector = ",".join(f"{name}={value}" for name, value in
+                                (obj.get("spec", {}).get("selector", {}).get("matchLabels") or {}).items())
+            pods, error = client.list("pods", namespace=workload["namespace"], label_selector=selector or None,
+                                      retries=3, delay=3)
+            if error:
+                continue
+            generation = (obj.get("metadata", {}).get("annotations") or {}).get(TEMPLATE_GENERATION_ANNOTATION)
+            lagging = {}
+            for pod in pods:
+                if not _owned(workload["kind"], workload["name"], pod):
+                    continue
+                node = pod.get("spec", {}).get("nodeName") or "(unscheduled)"
+                template = pod["metadata"].get("labels", {}).get("pod-template-generation")
+                reason = _waiting_reason(pod)
+                ready = condition_status(pod, "Ready") == "True"
+                if not ready:
+                    reason = reason or f"not ready ({pod.get('status', {}).get('phase')})"
+                elif workload["kind"] == "daemonset" and template and generation and template != generation:
+                    reason = f"template generation {template}, want {generation}"
+                else:
+                    continue
+                lagging[node] = {"pod": pod["metadata"]["name"], "reason": reason, "ready": ready}
+            self.lagging[key] = lagging
+            recovered = [(lagged_key, node) for lagged_key, node in self.lagging_since
+                         if lagged_key == key and (node not in lagging or lagging[node]["ready"])]
+            for item in recovered:
+                del self.lagging_since[item]
+            for node, entry in lagging.items():
+                if entry["ready"]:
+                    continue
+                since = self.lagging_since.setdefault((key, node), now)
+                entry["lagging_for"] = round(now - since)
+                if (key, node) not in self.stuck and (
+                        entry["reason"] in STUCK_REASONS or now - since >= self.stuck_after):
+                    self.stuck[(key, node)] = dict(entry, workload=key, node=node)
+                    newly_stuck.append(self.stuck[(key, node)])
+        return newly_stuck
+
+    def summary(self):
+        return {
+            "workloads": self.status,
+            "lagging": {key: nodes for key, nodes in sorted(self.lagging.items()) if nodes},
+            "stuck": [self.stuck[key] for key in sorted(self.stuck)],
+        }
+
+
+def describe_lagging(tracker, limit=10):
+    parts = []
+    for key in tracker.pending():
+        nodes = tracker.lagging.get(key) or {}
+        entry = tracker.status[key]
+        if not entry["found"]:
+            parts.append(f"{key} not found")
+            continue
+        detail = ", ".join(f"{node} ({item['reason']})" for node, item in sorted(nodes.items())[:limit])
+        parts.append(f"{key} {entry['updated']}/{entry['desired']} updated, {entry['available']} available"
+                     + (f"; lagging: {detail}" if detail else ""))
+    return "; ".join(parts)
+
+
+def wait_for_rollouts(client, tracker, timeout, check_interval=15, on_error=None, on_stuck=None):
+    """Wait until every workload of ``tracker`` converged; return True on success.
+
+    Optional workloads that do not exist when the wait starts are dropped.
+    """
+    deadline = time.time() + timeout
+    for key, workload in list(tracker.workloads.items()):
+        if workload.get("optional"):
+            _, error = client.get(PLURALS[workload["kind"]], workload["name"], namespace=workload["namespace"])
+            if error and error.status == 404:
+                del tracker.workloads[key], tracker.status[key]
+
+    def follow(key):
+        workload = tracker.workloads[key]
+        converged, _ = wait_for(client, PLURALS[workload["kind"]], lambda objects: tracker.observe(key, objects),
+                                max(deadline - time.time(), 1), name=workload["name"],
+                                namespace=workload["namespace"], on_error=on_error)
+        return converged
+
+    keys = sorted(tracker.workloads)
+    if not keys:
+        return True
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(keys)) as executor:
+        pending = {executor.submit(follow, key) for key in keys}
+        while pending:
+            _, pending = concurrent.futures.wait(pending, timeout=check_interval)
+            if pending:
+                for entry in tracker.inspect(client, tracker.pending()):
+                    if on_stuck:
+                        on_stuck(entry)
+    converged = not tracker.pending()
+    if not converged:
+        tracker.inspect(client, tracker.pending())
+    return converged
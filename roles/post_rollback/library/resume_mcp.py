@@ -1,15 +1,7 @@
 from ansible.module_utils.basic import AnsibleModule
-import subprocess
-import time
-
-
-def run_command(command):
-    """Run a shell command and return its output or error."""
-    try:
-        result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
-        return result.stdout.strip(), None
-    except subprocess.CalledProcessError as e:
-        return None, e.stderr.strip()
+from ansible.module_utils.metrics import attach
+from ansible.module_utils.kube_client import get_client
+from ansible.module_utils.machine_config import set_pools_paused
 
 
 def main():
@@ -19,30 +11,26 @@ def main():
     )
 
     module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
+    attach(module)
 
     timeout = module.params["timeout"]
     sleep_interval = module.params["sleep_interval"]
 
-    # Patch commands for MCPs
-    patch_master_cmd = (
-        "oc patch MachineConfigPool master --type='merge' --patch '{\"spec\":{\"paused\":false}}'"
-    )
-    patch_worker_cmd = (
-        "oc patch MachineConfigPool worker --type='merge' --patch '{\"spec\":{\"paused\":false}}'"
-    )
-
-    end_time = time.time() + timeout
-
-    while time.time() < end_time:
-        master_output, master_error = run_command(patch_master_cmd)
-        worker_output, worker_error = run_command(patch_worker_cmd)
-
-        if not master_error and not worker_error:
-            module.exit_json(changed=True, msg="Successfully resumed master and worker MCPs.")
-
-        time.sleep(sleep_interval)
-
-    module.fail_json(msg="Failed to resume MCPs within the timeout period.")
+    # Every pool, custom pools included, is resumed with one list and concurrent patches
+    try:
+        result, error = set_pools_paused(get_client(), False, timeout=timeout, interval=sleep_interval,
+                                         check_mode=module.check_mode)
+    except Exception as ex:
+        module.fail_json(msg=str(ex))
+    if module.check_mode and not error:
+        module.exit_json(changed=bool(result["pending"]),
+                         msg=f"Check mode: would resume {', '.join(result['pending']) or 'no pool'}.", **result)
+    if not error:
+        module.exit_json(changed=bool(result["patched"]),
+                         msg=f"Successfully resumed MCPs: {', '.join(result['patched']) or 'none were paused'}.",
+                         **result)
+
+    module.fail_json(msg="Failed to resume MCPs within the timeout period.", error=str(error), **(result or {}))
 
 
 if __name__ == "__main__":
@@ -1,67 +1,226 @@
 #!/usr/bin/python
 
 from ansible.module_utils.basic import AnsibleModule
-import subprocess
+from ansible.module_utils.metrics import attach
+from ansible.module_utils.kube_client import get_client, condition_status
+from ansible.module_utils.cluster_snapshot import invalidate_snapshot
+from ansible.module_utils.drain import drain_nodes, plan_drain_batches, set_unschedulable
+from ansible.module_utils.kube_wait import wait_for
+from ansible.module_utils.journal import load_journal, rebooted_nodes, record_node, save_journal
+from ansible.module_utils.machine_config import node_pool
+from ansible.module_utils.polling import run_command
+from concurrent.futures import ThreadPoolExecutor
+import math
+import threading
 import time
 
 
-def run_command_with_retries(command, retries=3, delay=3):
-    """Execute a shell command with retries on failure."""
-    for attempt in range(retries):
-        try:
-            result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
-            return result.stdout.strip(), None
-        except subprocess.CalledProcessError as e:
-            if attempt < retries - 1:
-                time.sleep(delay)
-            else:
-                return None, f"Command failed after {retries} attempts: {e.stderr.strip()}"
-    return None, "Unknown error"
-
-
 def get_nodes(role, retries, delay):
-    """Retrieve a list of nodes by role (master/worker)."""
-    command = f"oc get nodes -o custom-columns=NAME:.metadata.name,ROLE:.metadata.labels.node-role.kubernetes.io/{role} | grep -v ROLE | awk '{{print $1}}'"
-    stdout, error = run_command_with_retries(command, retries, delay)
+    """Retrieve the node objects of a role (master/worker)."""
+    client = get_client()
+    items, error = client.list("nodes", label_selector=f"node-role.kubernetes.io/{role}", retries=retries, delay=delay)
     if error:
         return None, error
-    return stdout.splitlines(), None
+    return items, None
 
 
-def get_pod_on_node(node, namespace, daemonset_label, retries, delay):
-    """Retrieve the pod name on a specific node."""
-    command = (
-        f"oc get pods -n {namespace} -o custom-columns=NAME:.metadata.name,NODE:.spec.nodeName "
-        f"| grep {node} | grep {daemonset_label} | awk '{{print $1}}'"
-    )
-    stdout, error = run_command_with_retries(command, retries, delay)
+def get_batch_nodes(names, retries, delay):
+    """Read the node objects of a batch again, concurrently, right before its reboot.
+
+    Earlier batches and the drain take long enough for a node to have
+    rebooted or changed in the meantime, so its bootID must be current.
+    """
+    client = get_client()
+    with ThreadPoolExecutor(max_workers=min(len(names), 10)) as executor:
+        results = list(executor.map(lambda name: client.get("nodes", name, retries=retries, delay=delay), names))
+    errors = [error for _, error in results if error]
+    if errors:
+        return None, errors[0]
+    return [node for node, _ in results], None
+
+
+def filter_pools(nodes, names, retries, delay):
+    """Split nodes into the ones in a MachineConfigPool of ``names`` and the others, ``(kept, skipped)``."""
+    client = get_client()
+    pools, error = client.list("machineconfigpools", retries=retries, delay=delay)
+    if error:
+        return None, None, error
+    kept, skipped = [], []
+    for node in nodes:
+        (kept if node_pool(node, pools) in names else skipped).append(node)
+    return kept, sorted(node["metadata"]["name"] for node in skipped), None
+
+
+def parse_max_parallel(max_parallel, node_count):
+    """Turn a batch size given as a count ("3") or a percentage ("25%") into a node count."""
+    value = str(max_parallel).strip()
+    if value.endswith("%"):
+        size = math.ceil(node_count * float(value[:-1]) / 100)
+    else:
+        size = int(value)
+    return max(1, size)
+
+
+def plan_batches(nodes, max_parallel, zone_label=None):
+    """Split nodes into reboot batches of at most ``max_parallel`` nodes.
+
+    With ``zone_label`` set, nodes are grouped by that label first and a
+    batch never spans two zones, so one zone is rebooted at a time.
+    """
+    batch_size = parse_max_parallel(max_parallel, len(nodes))
+    zones = {}
+    for node in nodes:
+        labels = node["metadata"].get("labels", {})
+        zone = labels.get(zone_label, "") if zone_label else ""
+        zones.setdefault(zone, []).append(node["metadata"]["name"])
+
+    batches = []
+    for zone in sorted(zones):
+        names = sorted(zones[zone])
+        for index in range(0, len(names), batch_size):
+            batches.append({"zone": zone or None, "nodes": names[index:index + batch_size]})
+    return batches
+
+
+def plan_budgeted_batches(nodes, max_parallel, zone_label, retries, delay):
+    """Plan batches that respect every PodDisruptionBudget, from one list of the pods and of the budgets."""
+    client = get_client()
+    pdbs, error = client.list("poddisruptionbudgets", retries=retries, delay=delay)
     if error:
         return None, error
-    return stdout.strip(), None
+    pods = (pod for page in client.list_pages("pods", limit=2000, retries=retries, delay=delay) for pod in page)
+    return plan_drain_batches(nodes, pods, pdbs, parse_max_parallel(max_parallel, len(nodes)), zone_label), None
+
+
+class DaemonPodIndex:
+    """Node name -> pod of the ``daemonset_label`` DaemonSet, from one label-selected pod list.
+
+    The pods are selected by their ``k8s-app`` label and kept when the
+    DaemonSet of that name owns them, so a node or pod name that contains
+    another one cannot match the wrong pod. A node without a pod in the
+    index (its pod was recreated) lists the pods again, once per batch.
+    """
+
+    def __init__(self, namespace, daemonset_label, retries, delay):
+        self.namespace = namespace
+        self.daemonset_label = daemonset_label
+        self.retries = retries
+        self.delay = delay
+        self.pods = None
+        self.fresh = False
+        self._lock = threading.Lock()
+
+    def owned(self, pod):
+        owners = pod["metadata"].get("ownerReferences") or []
+        return not owners or any(owner.get("kind") == "DaemonSet" and owner.get("name") == self.daemonset_label
+                                 for owner in owners)
+
+    def refresh(self):
+        client = get_client()
+        items, error = client.list("pods", namespace=self.namespace, label_selector=f"k8s-app={self.daemonset_label}",
+                                   retries=self.retries, delay=self.delay)
+        if error:
+            return error
+        self.pods = {}
+        for item in items:
+            if self.owned(item) and item.get("status", {}).get("phase") == "Running":
+                self.pods[item.get("spec", {}).get("nodeName")] = item["metadata"]["name"]
+        self.fresh = True
+        return None
+
+    def expire(self):
+        """Allow one more list for nodes missing from the index, e.g. before the next batch."""
+        self.fresh = False
+
+    def pod(self, node):
+        """Return ``(pod name, error)`` for the DaemonSet pod on ``node``."""
+        with self._lock:
+            if self.pods is None or (node not in self.pods and not self.fresh):
+                error = self.refresh()
+                if error:
+                    return None, error
+        if node not in self.pods:
+            return None, f"No {self.daemonset_label} pod found on node {node}"
+        return self.pods[node], None
 
 
 def reboot_node(pod, namespace, delay, retries):
     """Reboot a node by executing a reboot command on its pod."""
+    # Exec needs a streaming (SPDY/websocket) upgrade, so this step still goes through `oc rsh`.
     command = f"oc rsh -n {namespace} {pod} chroot /rootfs shutdown -r +{delay}"
-    stdout, error = run_command_with_retries(command, retries, delay)
+    stdout, error = run_command(command, timeout=60, retries=retries, delay=3)
     return stdout, error
 
 
-def wait_for_nodes_unreachable(delay):
-    """Wait for the API server to become unreachable after node reboots."""
-    time.sleep(delay * 60)  # Wait for the specified delay in minutes
+def boot_id(node):
+    return node.get("status", {}).get("nodeInfo", {}).get("bootID")
+
+
+class RebootTracker:
+    """Follow a batch of nodes until each one reports a new bootID and Ready=True."""
+
+    def __init__(self, nodes, scheduled_at):
+        self.boot_ids = {node["metadata"]["name"]: boot_id(node) for node in nodes}
+        self.scheduled_at = scheduled_at
+        self.down_at = {}
+        self.up_at = {}
+        self.new_boot_ids = {}
+
+    def observe(self, items):
+        """Update per-node state from the current node list; True once every node is back."""
+        now = time.time()
+        for item in items:
+            name = item["metadata"]["name"]
+            if name not in self.boot_ids or name in self.up_at:
+                continue
+            ready = condition_status(item, "Ready") == "True"
+            if not ready:
+                self.down_at.setdefault(name, now)
+            elif boot_id(item) != self.boot_ids[name]:
+                self.up_at[name] = now
+                self.new_boot_ids[name] = boot_id(item)
+        return len(self.up_at) == len(self.boot_ids)
+
+    def pending(self):
+        return sorted(set(self.boot_ids) - set(self.up_at))
 
+    def results(self):
+        results = {}
+        for name in self.boot_ids:
+            down_at = self.down_at.get(name, self.scheduled_at)
+            up_at = self.up_at.get(name)
+            results[name] = {
+                "previous_boot_id": self.boot_ids[name],
+                "boot_id": self.new_boot_ids.get(name),
+                "rebooted": up_at is not None,
+                "downtime_seconds": round(up_at - down_at, 1) if up_at else None,
+            }
+        return results
+
+
+def wait_for_nodes_rebooted(module, tracker, timeout, retry_delay):
+    """Wait until every tracked node has rebooted and is Ready again."""
+    client = get_client()
+    rebooted, _ = wait_for(client, "nodes", tracker.observe, timeout, retry_interval=retry_delay,
+                           on_error=lambda error: module.warn(f"Retrying as got an error: {error}"))
+    return rebooted
+
+
+def reboot_batch(batch, pod_index, namespace, delay, retries):
+    """Issue the reboot for every node of a batch concurrently."""
+    pod_index.expire()
+
+    def reboot(node):
+        pod, error = pod_index.pod(node)
+        if error:
+            return {"node": node, "status": "failed", "error": f"Failed to get pod for node {node}: {error}"}
+        stdout, error = reboot_node(pod, namespace, delay, retries)
+        if error:
+            return {"node": node, "status": "failed", "error": str(error)}
+        return {"node": node, "status": "success", "output": stdout}
 
-def wait_for_nodes_ready(timeout, retries, delay):
-    """Wait for all nodes to become ready within a timeout."""
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        command = "oc wait node --all --for condition=ready --timeout=10s"
-        stdout, error = run_command_with_retries(command, retries, delay)
-        if not error:
-            return True
-        time.sleep(10)
-    return False
+    with ThreadPoolExecutor(max_workers=len(batch["nodes"])) as executor:
+        return list(executor.map(reboot, batch["nodes"]))
 
 
 def main():
@@ -73,9 +232,16 @@ def main():
         retries=dict(type="int", default=3),
         retry_delay=dict(type="int", default=3),
         timeout=dict(type="int", default=1800),  # Default timeout for nodes to come back
+        max_parallel=dict(type="str", default="1"),  # Nodes rebooted together, as a count or a percentage
+        zone_label=dict(type="str", required=False),  # Node label used to keep batches within one zone
+        journal=dict(type="str", required=False),  # Journal recording rebooted nodes, so a re-run skips them
+        pools=dict(type="list", elements="str", required=False),  # Reboot only the nodes of these pools
+        drain=dict(type="bool", default=False),  # Drain every batch first; batches then respect the PDBs
+        drain_timeout=dict(type="int", default=600),  # Seconds to evict the pods of one batch
     )
 
     module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
+    attach(module)
 
     role = module.params["role"]
     namespace = module.params["namespace"]
@@ -84,35 +250,111 @@ def main():
     retries = module.params["retries"]
     retry_delay = module.params["retry_delay"]
     timeout = module.params["timeout"]
+    max_parallel = module.params["max_parallel"]
+    zone_label = module.params["zone_label"]
+    drain = module.params["drain"]
+    phase = f"reboot_{role}"
+
+    try:
+        client = get_client()
+        journal = load_journal(client, module.params["journal"], warn=module.warn) if module.params["journal"] else None
+    except Exception as ex:
+        module.fail_json(msg=str(ex))
 
-    # Step 1: Get nodes of the specified role
+    # Step 1: Get nodes of the specified role, drop the ones an earlier run already rebooted, and split the
+    # rest into batches
     nodes, error = get_nodes(role, retries, retry_delay)
     if error:
         module.fail_json(msg=f"Failed to get {role} nodes: {error}")
-
-    # Step 2: Reboot nodes sequentially
-    reboot_results = []
-    for node in nodes:
-        pod, error = get_pod_on_node(node, namespace, daemonset_label, retries, retry_delay)
+    unchanged_pool_nodes = []
+    if module.params["pools"] is not None:
+        nodes, unchanged_pool_nodes, error = filter_pools(nodes, module.params["pools"], retries, retry_delay)
         if error:
-            module.fail_json(msg=f"Failed to get pod for node {node}: {error}")
-
-        stdout, error = reboot_node(pod, namespace, delay, retries)
-        if error:
-            reboot_results.append({"node": node, "status": "failed", "error": error})
-            module.fail_json(msg=f"failed to reboot node {node} due to error: {error}")
+            module.fail_json(msg=f"Failed to get the MachineConfigPools: {error}")
+    already_rebooted = sorted(rebooted_nodes(journal, nodes, phase)) if journal else []
+    nodes = [node for node in nodes if node["metadata"]["name"] not in already_rebooted]
+    try:
+        if nodes and drain:
+            batches, error = plan_budgeted_batches(nodes, max_parallel, zone_label, retries, retry_delay)
+            if error:
+                module.fail_json(msg=f"Failed to read the pods and PodDisruptionBudgets: {error}")
         else:
-            reboot_results.append({"node": node, "status": "success", "output": stdout})
-        delay += 3  # Increment delay for subsequent nodes
+            batches = plan_batches(nodes, max_parallel, zone_label) if nodes else []
+    except ValueError:
+        module.fail_json(msg=f"Invalid max_parallel value: {max_parallel}")
 
-    # Step 3: Wait for API server to become unreachable
-    wait_for_nodes_unreachable(delay)
+    if not nodes:
+        module.exit_json(changed=False, results=[], batches=[], already_rebooted=already_rebooted,
+                         unchanged_pool_nodes=unchanged_pool_nodes,
+                         msg=f"All {role} nodes were already rebooted by an earlier run or are in pools without a "
+                             f"new machine config.")
+    if module.check_mode:
+        module.exit_json(changed=True, batches=batches, already_rebooted=already_rebooted,
+                         unchanged_pool_nodes=unchanged_pool_nodes,
+                         msg=f"Check mode: would reboot {len(nodes)} {role} nodes.")
+
+    # Step 2: Reboot one batch at a time, gating each batch on the previous one being back
+    pod_index = DaemonPodIndex(namespace, daemonset_label, retries, retry_delay)
+    reboot_results = []
+    for batch in batches:
+        if drain:
+            evicted, error = drain_nodes(get_client(), batch["nodes"], module.params["drain_timeout"],
+                                         on_error=lambda error: module.warn(f"Retrying as got an error: {error}"))
+            if error:
+                set_unschedulable(get_client(), batch["nodes"], False)
+                module.fail_json(msg=f"Failed to drain {', '.join(batch['nodes'])}: {error}",
+                                 results=reboot_results, batches=batches, already_rebooted=already_rebooted)
+            batch["evicted"] = len(evicted)
+        batch_nodes, error = get_batch_nodes(batch["nodes"], retries, retry_delay)
+        if error:
+            if drain:
+                set_unschedulable(get_client(), batch["nodes"], False)
+            module.fail_json(msg=f"Failed to get the nodes of batch {', '.join(batch['nodes'])}: {error}",
+                             results=reboot_results, batches=batches, already_rebooted=already_rebooted)
+        tracker = RebootTracker(batch_nodes, time.time() + delay * 60)
+        results = reboot_batch(batch, pod_index, namespace, delay, retries)
+        invalidate_snapshot(get_client(), ["nodes"])
+        reboot_results.extend(results)
+        failed = [result for result in results if result["status"] == "failed"]
+        if failed:
+            # Nodes of a drained batch stay cordoned: some of them may still reboot
+            cordoned = batch["nodes"] if drain else []
+            module.fail_json(
+                msg=f"failed to reboot node {failed[0]['node']} due to error: {failed[0]['error']}"
+                    + (f" Nodes left cordoned: {', '.join(cordoned)}." if cordoned else ""),
+                results=reboot_results,
+                batches=batches,
+                already_rebooted=already_rebooted,
+                cordoned=cordoned,
+            )
 
-    # Step 4: Wait for all nodes to become ready
-    if not wait_for_nodes_ready(timeout, retries, retry_delay):
-        module.fail_json(msg="Nodes did not become ready within the timeout period.")
+        # Step 3: Wait until every node of the batch reports a new bootID and is Ready
+        rebooted = wait_for_nodes_rebooted(module, tracker, timeout, retry_delay)
+        node_results = tracker.results()
+        for result in results:
+            result.update(node_results[result["node"]])
+        if drain:
+            for error in set_unschedulable(get_client(), sorted(tracker.up_at), False):
+                module.warn(f"Failed to uncordon a node: {error}")
+        if journal:
+            for name, new_boot_id in tracker.new_boot_ids.items():
+                record_node(journal, name, new_boot_id, phase)
+            save_journal(client, journal, warn=module.warn)
+        if not rebooted:
+            # Nodes that are not back stay cordoned until someone looks at them
+            cordoned = tracker.pending() if drain else []
+            module.fail_json(
+                msg=f"Nodes {', '.join(tracker.pending())} did not reboot and become ready within the timeout period."
+                    + (" They are left cordoned; uncordon them with `oc adm uncordon` once they are back."
+                       if cordoned else ""),
+                results=reboot_results,
+                batches=batches,
+                already_rebooted=already_rebooted,
+                cordoned=cordoned,
+            )
 
-    module.exit_json(changed=True, results=reboot_results, msg="All nodes rebooted and ready.")
+    module.exit_json(changed=True, results=reboot_results, batches=batches, already_rebooted=already_rebooted,
+                     unchanged_pool_nodes=unchanged_pool_nodes, msg="All nodes rebooted and ready.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,240 @@
+"""Phase model of the migration and rollback playbooks.
+
+``build_plan`` turns a cluster layout (nodes per MachineConfigPool, pool
+``maxUnavailable``, reboot batch sizes) into the activities the playbook runs
+and the activities each one waits for: the roles run one after another, the
+MachineConfigPools roll out in parallel batches of ``maxUnavailable`` nodes
+and reboot_nodes reboots one batch at a time. ``simulate`` samples every
+activity's duration from its ``Distribution`` many times, schedules each run
+on that graph and returns the percentiles of every phase together with the
+critical path of the median run.
+"""
+
+import math
+import random
+from collections import namedtuple
+
+# One activity of the plan: it starts when every activity in ``deps`` has ended and lasts the longest of
+# ``parallel`` samples of ``timing`` (a batch of nodes ends with its slowest node), times ``scale``, plus ``fixed``.
+Step = namedtuple("Step", "name phase group timing deps parallel scale fixed")
+
+
+def step(name, phase, timing, deps=(), group=None, parallel=1, scale=1.0, fixed=0):
+    return Step(name, phase, group or name, timing, tuple(deps), parallel, scale, fixed)
+
+
+# Default timings in seconds (median, spread of the log-normal distribution) for clusters without traces
+DEFAULT_TIMINGS = {
+    "prechecks": (10, 0.3),
+    "snapshot": (5, 0.3),
+    "migration_setup": (15, 0.3),  # ClusterOperator check, journal and version
+    "pause_pools": (5, 0.3),
+    "network_type_change": (40, 0.3),
+    "mco_start": (90, 0.4),
+    "node_update": (420, 0.3),  # The MCO drains, updates and reboots one node until it is Ready again
+    "verify_machine_config": (15, 0.3),
+    "network_type_trigger": (30, 0.3),
+    "network_co_progressing": (60, 0.4),
+    "multus_batch": (20, 0.4),  # One batch of the multus DaemonSet rollout
+    "node_reboot": (240, 0.3),  # From the scheduled shutdown until the node is Ready with a new bootID
+    "operators_settle": (390, 0.5),  # Includes the three consecutive checks 30 seconds apart
+    "post_checks": (30, 0.3),
+    "pod_scan": (0.3, 0.3),  # Per 1000 pods
+    "cleanup": (60, 0.3),
+}
+
+
+class Distribution:
+    """Duration distribution: resamples recorded durations, or a log-normal around a default median."""
+
+    def __init__(self, median, spread, samples=None):
+        self.median = median
+        self.spread = spread
+        self.samples = list(samples or [])
+
+    def sample(self, rng):
+        if self.samples:
+            return rng.choice(self.samples)
+        return rng.lognormvariate(math.log(self.median), self.spread)
+
+    def describe(self):
+        if self.samples:
+            ordered = sorted(self.samples)
+            return f"{len(ordered)} recorded, median {ordered[len(ordered) // 2]:.0f}s"
+        return f"default, median {self.median:g}s"
+
+
+def default_timings():
+    return {key: Distribution(median, spread) for key, (median, spread) in DEFAULT_TIMINGS.items()}
+
+
+def batch_size(value, total, round_up=False):
+    """Nodes per batch for a count ("2") or a percentage ("10%") of ``total``.
+
+    The MCO rounds a percentage ``maxUnavailable`` down, reboot_nodes rounds
+    its ``max_parallel`` up; both take at least one node.
+    """
+    value = str(value).strip()
+    if value.endswith("%"):
+        nodes = total * float(value[:-1]) / 100
+        return max(1, math.ceil(nodes) if round_up else math.floor(nodes))
+    return max(1, int(value))
+
+
+def batches(total, size):
+    """Split ``total`` nodes into consecutive batch sizes."""
+    return [min(size, total - start) for start in range(0, total, size)]
+
+
+def _chain(steps, name, phase, timing, sizes, after, **kwargs):
+    """Append one step per batch, each waiting for the previous one; return the name of the last step."""
+    for index, size in enumerate(sizes):
+        steps.append(step(f"{name} batch {index + 1}", phase, timing, deps=[after] if after else [], group=name,
+                          parallel=size, **kwargs))
+        after = steps[-1].name
+    return after
+
+
+def _rollout(steps, phase, pools, after):
+    """Parallel MachineConfigPool rollouts; return the last step of every pool."""
+    ends = []
+    for pool, layout in sorted(pools.items()):
+        if not layout["nodes"]:
+            continue
+        size = batch_size(layout.get("max_unavailable", 1), layout["nodes"])
+        ends.append(_chain(steps, f"rollout {pool}", phase, "node_update", batches(layout["nodes"], size), after))
+    return ends or [after]
+
+
+def _reboots(steps, pools, settings, after):
+    masters = pools.get("master", {}).get("nodes", 0)
+    workers = sum(layout["nodes"] for pool, layout in pools.items() if pool != "master")
+    delay = settings["reboot_delay"] * 60
+    after = _chain(steps, "reboot masters", "reboot_nodes", "node_reboot",
+                   batches(masters, batch_size(settings["master_max_parallel"], masters, True)), after, fixed=delay)
+    return _chain(steps, "reboot workers", "reboot_nodes", "node_reboot",
+                  batches(workers, batch_size(settings["worker_max_parallel"], workers, True)), after, fixed=delay)
+
+
+def _multus(steps, phase, pools, settings, after):
+    nodes = sum(layout["nodes"] for layout in pools.values())
+    return _chain(steps, "multus restart", phase, "multus_batch",
+                  [1] * len(batches(nodes, batch_size(settings["daemonset_max_unavailable"], nodes))), after)
+
+
+def build_plan(playbook, pools, settings):
+    """Return the steps of ``playbook`` (migration or rollback) for a cluster layout."""
+    steps = []
+
+    def add(name, phase, timing, after, **kwargs):
+        steps.append(step(name, phase, timing, deps=after if isinstance(after, list) else [after], **kwargs))
+        return name
+
+    pods_scale = settings["pods"] / 1000
+    after = add("prechecks", "prechecks", "prechecks", [])
+    after = add("cluster snapshot", "prechecks", "snapshot", after)
+    if playbook == "migration":
+        after = add("migration setup", "migration", "migration_setup", after)
+        after = add("change network type", "migration", "network_type_change", after)
+        after = add("wait for MCO to start", "migration", "mco_start", after)
+        after = add("verify machine config", "migration", "verify_machine_config",
+                    _rollout(steps, "migration", pools, after))
+        after = add("trigger OVN-Kubernetes", "migration", "network_type_trigger", after)
+        after = add("network operator progressing", "migration", "network_co_progressing", after)
+        after = _multus(steps, "migration", pools, settings, after)
+        after = _reboots(steps, pools, settings, after)
+        after = add("cluster operators settle", "post_migration", "operators_settle", after)
+        after = add("post checks", "post_migration", "post_checks", after)
+        after = add("pod health scan", "post_migration", "pod_scan", after, scale=pods_scale)
+        add("clean up", "post_migration", "cleanup", after)
+    else:
+        after = add("pause pools", "rollback", "pause_pools", after)
+        after = add("change network type", "rollback", "network_type_change", after)
+        after = add("trigger OpenShift SDN", "rollback", "network_type_trigger", after)
+        after = add("network operator progressing", "rollback", "network_co_progressing", after)
+        after = _multus(steps, "rollback", pools, settings, after)
+        after = _reboots(steps, pools, settings, after)
+        after = add("resume pools", "post_rollback", "pause_pools", after)
+        after = add("wait for MCO to start", "post_rollback", "mco_start", after)
+        after = add("cluster operators settle", "post_rollback", "operators_settle",
+                    _rollout(steps, "post_rollback", pools, after))
+        after = add("verify machine config", "post_rollback", "verify_machine_config", after)
+        after = add("post checks", "post_rollback", "post_checks", after)
+        after = add("pod health scan", "post_rollback", "pod_scan", after, scale=pods_scale)
+        add("clean up", "post_rollback", "cleanup", after)
+    return steps
+
+
+def run_once(steps, timings, rng):
+    """Schedule one sampled run; return ``(start, end, critical)`` with the critical path as step names."""
+    start, end, previous = {}, {}, {}
+    for item in steps:
+        begin = 0.0
+        for dep in item.deps:
+            if end[dep] > begin:
+                begin, previous[item.name] = end[dep], dep
+        timing = timings[item.timing]
+        duration = max(timing.sample(rng) for _ in range(item.parallel)) * item.scale + item.fixed
+        start[item.name], end[item.name] = begin, begin + duration
+    name = max(end, key=end.get)
+    critical = [name]
+    while name in previous:
+        name = previous[name]
+        critical.append(name)
+    return start, end, critical[::-1]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def simulate(steps, timings, runs=200, seed=0):
+    """Run the plan ``runs`` times and summarize phases, groups and the critical path."""
+    rng = random.Random(seed)
+    step_groups = {item.name: item.group for item in steps}
+    groups = {}
+    for item in steps:
+        groups.setdefault(item.group, {"phase": item.phase, "steps": []})["steps"].append(item.name)
+
+    totals, group_spans, critical_counts, outcomes = [], {group: [] for group in groups}, {}, []
+    for _ in range(runs):
+        start, end, critical = run_once(steps, timings, rng)
+        total = max(end.values())
+        totals.append(total)
+        outcomes.append((total, critical))
+        for group, info in groups.items():
+            group_spans[group].append((min(start[name] for name in info["steps"]),
+                                       max(end[name] for name in info["steps"])))
+        for group in {step_groups[name] for name in critical}:
+            critical_counts[group] = critical_counts.get(group, 0) + 1
+
+    median_total, median_critical = sorted(outcomes, key=lambda outcome: outcome[0])[runs // 2]
+    critical_path = []
+    for name in median_critical:
+        if not critical_path or critical_path[-1] != step_groups[name]:
+            critical_path.append(step_groups[name])
+
+    timeline = []
+    for group, info in groups.items():
+        spans = group_spans[group]
+        timeline.append({
+            "activity": group,
+            "phase": info["phase"],
+            "steps": len(info["steps"]),
+            "start_p50": round(percentile([span[0] for span in spans], 0.5)),
+            "end_p50": round(percentile([span[1] for span in spans], 0.5)),
+            "end_p90": round(percentile([span[1] for span in spans], 0.9)),
+            "duration_p50": round(percentile([span[1] - span[0] for span in spans], 0.5)),
+            "criticality": round(critical_counts.get(group, 0) / runs, 2),
+        })
+    timeline.sort(key=lambda entry: (entry["start_p50"], entry["end_p50"]))
+    return {
+        "runs": runs,
+        "total_p10": round(percentile(totals, 0.1)),
+        "total_p50": round(percentile(totals, 0.5)),
+        "total_p90": round(percentile(totals, 0.9)),
+        "median_run_total": round(median_total),
+        "timeline": timeline,
+        "critical_path": critical_path,
+    }
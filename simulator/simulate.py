@@ -0,0 +1,257 @@
+"""Predict how long a migration or rollback takes, offline.
+
+Builds the phase plan of the playbook for a cluster layout, samples every
+activity from timings learned from earlier runs (or defaults) and reports the
+predicted timeline, the total at the 10th/50th/90th percentile and the
+critical path. Nothing talks to a cluster; a run takes a few seconds even for
+thousands of nodes.
+
+The layout comes from a cluster snapshot (``snapshot.json`` in the state
+directory), from ``--nodes``/``--masters`` or from ``--pool`` entries. Timings
+are learned from the JSON timelines of the ``migration_metrics`` callback
+(task durations and the reboot waits of reboot_nodes) and from the
+``mco-progress.jsonl`` files of wait_for_mco_completion (per-node update time
+of every pool):
+
+    python simulator/simulate.py --nodes 250 --pool worker=247:2 \\
+        --trace ~/.ansible/sdn_ovn_migration/metrics/timeline-*.json \\
+        --trace ~/.ansible/sdn_ovn_migration/*/mco-progress.jsonl
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+from model import batch_size, build_plan, default_timings, simulate
+
+ROLE_PAIRS = {
+    "setup": ("migration", "rollback"),
+    "rollout": ("migration", "post_rollback"),
+    "post": ("post_migration", "post_rollback"),
+}
+
+# Timing -> (roles, task names) whose summed durations in one recorded run make one sample
+TRACE_TASKS = {
+    "prechecks": (("prechecks",), ["Run the prechecks concurrently"]),
+    "snapshot": (("prechecks",), ["Take a snapshot of the cluster state shared by the following checks"]),
+    "migration_setup": (("migration",), [
+        "Ensure all ClusterOperators are in the desired state",
+        "Read the migration journal to skip the phases that already completed",
+        "Get OpenShift version using custom module",
+    ]),
+    "pause_pools": (("rollback",), ["Pause updates for every MachineConfigPool",
+                                    "Pause updates for master MachineConfigPool",
+                                    "Pause updates for worker MachineConfigPool"]),
+    "network_type_change": (ROLE_PAIRS["setup"], [
+        "Patch Network.operator.openshift.io and wait for migration field to clear",
+        "Change network type to trigger MCO update",
+        "Customize network settings if parameters are provided",
+    ]),
+    "mco_start": (ROLE_PAIRS["rollout"], ["Find the MachineConfigPools that get a new rendered config",
+                                          "Wait until MCO starts applying new machine config to nodes"]),
+    "verify_machine_config": (ROLE_PAIRS["rollout"], ["Verify machine configuration status on nodes"]),
+    "network_type_trigger": (ROLE_PAIRS["setup"], ["Trigger OVN-Kubernetes deployment",
+                                                   "Trigger OpenshiftSDN deployment"]),
+    "network_co_progressing": (ROLE_PAIRS["setup"],
+                               ["Wait until the Network Cluster Operator is in PROGRESSING=True state"]),
+    "operators_settle": (ROLE_PAIRS["post"], ["Check all cluster operators back to normal"]),
+    "post_checks": (ROLE_PAIRS["post"], [
+        "Refresh the cluster state snapshot used by the following checks",
+        "Check the CNI network provider",
+        "Check if all cluster nodes are in Ready state",
+    ]),
+    "cleanup": (ROLE_PAIRS["post"], ["Patch Network.operator.openshift.io and wait for migration field to clear",
+                                     "Remove network configuration and namespace"]),
+}
+
+
+def task_samples(timeline):
+    """Return ``{timing: [seconds]}`` from one timeline, one sample per timing and host."""
+    runs = {}
+    for event in timeline.get("tasks", []):
+        if event["status"] == "skipped":
+            continue
+        task = event["task"].split(" : ")[-1]
+        for timing, (roles, names) in TRACE_TASKS.items():
+            if event["role"] in roles and task in names:
+                run = runs.setdefault((event["host"], timing), {"seconds": 0.0, "failed": False})
+                run["seconds"] += event["duration"]
+                run["failed"] |= event["status"] == "failed"
+    samples = {}
+    for (_, timing), run in runs.items():
+        if not run["failed"]:
+            samples.setdefault(timing, []).append(run["seconds"])
+    return samples
+
+
+def reboot_samples(timeline, reboot_delay):
+    """Return the reboot time of every batch, from the node waits of reboot_nodes, without the shutdown delay."""
+    return [
+        max(wait["seconds"] - reboot_delay * 60, 0)
+        for event in timeline.get("tasks", []) if event["role"] == "reboot_nodes"
+        for wait in event.get("waits", []) if wait["name"] == "nodes" and wait["satisfied"]
+    ]
+
+
+def node_update_samples(lines):
+    """Return per-node update times from wait_for_mco_completion progress events.
+
+    The time between two increases of a pool's updated count covers one round
+    of ``maxUnavailable`` nodes updating side by side.
+    """
+    samples, last = [], {}
+    for line in lines:
+        try:
+            event = json.loads(line)
+        except ValueError:
+            continue
+        if event.get("event") != "pool":
+            continue
+        pool, updated = event["pool"], event["updatedMachineCount"]
+        previous = last.get(pool)
+        last[pool] = (event["time"], updated)
+        if previous is None or updated <= previous[1]:
+            continue
+        slots = batch_size(event.get("maxUnavailable", 1), event["machineCount"])
+        delta = updated - previous[1]
+        samples.extend([(event["time"] - previous[0]) * min(slots, delta) / delta] * delta)
+    return samples
+
+
+def learn_timings(paths, reboot_delay):
+    """Return the default timings with recorded samples from the trace files added."""
+    timings = default_timings()
+    for path in paths:
+        try:
+            with open(path) as fh:
+                if path.endswith(".jsonl"):
+                    timings["node_update"].samples.extend(node_update_samples(fh))
+                    continue
+                timeline = json.load(fh)
+        except (OSError, ValueError) as ex:
+            print(f"Skipping trace {path}: {ex}", file=sys.stderr)
+            continue
+        for timing, samples in task_samples(timeline).items():
+            timings[timing].samples.extend(samples)
+        timings["node_reboot"].samples.extend(reboot_samples(timeline, reboot_delay))
+    return timings
+
+
+def layout_from_snapshot(path):
+    """Count the nodes of every pool from a cluster snapshot, by their node-role label."""
+    with open(path) as fh:
+        nodes = json.load(fh)["resources"]["nodes"]["object"]
+    pools = {}
+    for node in nodes:
+        roles = {label.split("/", 1)[1] for label in node["metadata"].get("labels") or {}
+                 if label.startswith("node-role.kubernetes.io/")}
+        if roles & {"master", "control-plane"}:
+            pool = "master"
+        else:
+            pool = next(iter(sorted(roles - {"worker"})), "worker")
+        pools.setdefault(pool, {"nodes": 0, "max_unavailable": 1})["nodes"] += 1
+    return pools
+
+
+def parse_pool(value):
+    """Parse ``NAME=NODES[:MAX_UNAVAILABLE]``."""
+    name, _, spec = value.partition("=")
+    nodes, _, max_unavailable = spec.partition(":")
+    if not name or not nodes.isdigit():
+        raise argparse.ArgumentTypeError(f"expected NAME=NODES[:MAX_UNAVAILABLE], got {value!r}")
+    return name, {"nodes": int(nodes), "max_unavailable": max_unavailable or 1}
+
+
+def format_duration(seconds):
+    hours, rest = divmod(int(seconds), 3600)
+    return f"{hours}h{rest // 60:02d}m" if hours else f"{rest // 60}m{rest % 60:02d}s"
+
+
+def print_report(result, playbook, pools, timings):
+    layout = ", ".join(f"{name} {pool['nodes']} (maxUnavailable {pool['max_unavailable']})"
+                       for name, pool in sorted(pools.items()))
+    print(f"Simulated {playbook} over {result['runs']} runs: {layout}")
+    print(f"Total: p10 {format_duration(result['total_p10'])}, p50 {format_duration(result['total_p50'])}, "
+          f"p90 {format_duration(result['total_p90'])}\n")
+
+    header = f"{'activity':<32} {'phase':<15} {'steps':>5} {'start':>8} {'duration':>9} {'end p50':>8} " \
+             f"{'end p90':>8} {'critical':>8}"
+    print(header)
+    print("-" * len(header))
+    for entry in result["timeline"]:
+        print(f"{entry['activity']:<32} {entry['phase']:<15} {entry['steps']:>5} "
+              f"{format_duration(entry['start_p50']):>8} {format_duration(entry['duration_p50']):>9} "
+              f"{format_duration(entry['end_p50']):>8} {format_duration(entry['end_p90']):>8} "
+              f"{entry['criticality']:>8.0%}")
+
+    print("\nCritical path of the median run:")
+    print("  " + " -> ".join(result["critical_path"]))
+    print("\nTimings:")
+    for name, timing in sorted(timings.items()):
+        print(f"  {name:<24} {timing.describe()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--playbook", choices=["migration", "rollback"], default="migration")
+    parser.add_argument("--snapshot", help="cluster snapshot.json to take the pools and node counts from")
+    parser.add_argument("--nodes", type=int, help="total nodes, when no snapshot is given")
+    parser.add_argument("--masters", type=int, default=3)
+    parser.add_argument("--pool", type=parse_pool, action="append", default=[],
+                        help="NAME=NODES[:MAX_UNAVAILABLE]; a worker entry takes its nodes from the default pool")
+    parser.add_argument("--pods", type=int, help="pods in the cluster (default: 30 per node)")
+    parser.add_argument("--master-max-parallel", default="1")
+    parser.add_argument("--worker-max-parallel", default="10%")
+    parser.add_argument("--reboot-delay", type=int, default=1, help="minutes between reboot and shutdown")
+    parser.add_argument("--daemonset-max-unavailable", default="10%")
+    parser.add_argument("--trace", action="append", default=[],
+                        help="timeline JSON or mco-progress.jsonl of an earlier run (globs allowed)")
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the prediction as JSON to this file")
+    args = parser.parse_args()
+
+    if args.snapshot:
+        pools = layout_from_snapshot(os.path.expanduser(args.snapshot))
+    elif args.nodes:
+        pools = {"master": {"nodes": args.masters, "max_unavailable": 1},
+                 "worker": {"nodes": args.nodes - args.masters, "max_unavailable": 1}}
+    else:
+        pools = {}
+    for name, pool in args.pool:
+        if name != "worker" and "worker" in pools:
+            # Nodes of a custom pool come out of the worker pool
+            moved = pool["nodes"] - pools.get(name, {}).get("nodes", 0)
+            pools["worker"]["nodes"] = max(pools["worker"]["nodes"] - moved, 0)
+        pools[name] = pool
+    if not pools:
+        parser.error("give --snapshot, --nodes or --pool")
+
+    paths = [path for pattern in args.trace for path in sorted(glob.glob(os.path.expanduser(pattern)))]
+    settings = {
+        "pods": args.pods if args.pods is not None else 30 * sum(pool["nodes"] for pool in pools.values()),
+        "master_max_parallel": args.master_max_parallel,
+        "worker_max_parallel": args.worker_max_parallel,
+        "reboot_delay": args.reboot_delay,
+        "daemonset_max_unavailable": args.daemonset_max_unavailable,
+    }
+
+    started = time.time()
+    timings = learn_timings(paths, args.reboot_delay)
+    steps = build_plan(args.playbook, pools, settings)
+    result = simulate(steps, timings, args.runs, args.seed)
+    result.update(playbook=args.playbook, pools=pools, settings=settings, traces=paths,
+                  seconds=round(time.time() - started, 2))
+
+    print_report(result, args.playbook, pools, timings)
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(result, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())